@@ -1,9 +1,40 @@
+import math
+
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, BasePermission, SAFE_METHODS
+from rest_framework.response import Response
 
 from database import models
+from database.rates import DEFAULT_TEMPS, get_reaction_rate_comparisons
 from api import serializers
 
+MAX_GRID_SIZE = 100
+MAX_REACTIONS = 500
+
+
+def parse_floats(query_params, name, default=None, maximum=MAX_GRID_SIZE):
+    """
+    Parse a comma separated list of positive numbers in the query parameters
+    """
+
+    value = query_params.get(name)
+    if not value:
+        return default
+    try:
+        values = [float(item) for item in value.split(",")]
+    except ValueError:
+        raise ValidationError({name: "Must be a comma separated list of numbers"})
+    if not all(math.isfinite(value) for value in values):
+        raise ValidationError({name: "Must be finite numbers"})
+    if min(values) <= 0:
+        raise ValidationError({name: "Must be positive"})
+    if len(values) > maximum:
+        raise ValidationError({name: f"At most {maximum} values are allowed"})
+
+    return values
+
 
 class ReadOnly(BasePermission):
     def has_permission(self, request, view):
@@ -33,6 +64,41 @@ class ReactionViewSet(PermissionsViewSet):
     queryset = models.Reaction.objects.all()
     serializer_class = serializers.ReactionSerializer
 
+    @action(detail=True)
+    def rates(self, request, pk=None):
+        """
+        The rate coefficients (SI units) of every kinetics entry of the reaction on a grid of
+        `temps` (K) and optionally `pressures` (Pa), with their spread across kinetic models
+        """
+
+        reaction = self.get_object()
+        temps = parse_floats(request.query_params, "temps", DEFAULT_TEMPS)
+        pressures = parse_floats(request.query_params, "pressures")
+        comparisons = get_reaction_rate_comparisons([reaction.pk], temps, pressures)
+
+        return Response(comparisons[reaction.pk])
+
+    @action(detail=False, url_path="rates")
+    def list_rates(self, request):
+        """
+        The rates of the reactions with the comma separated `ids`, on a shared grid
+        """
+
+        try:
+            ids = [int(item) for item in request.query_params.get("ids", "").split(",")]
+        except ValueError:
+            raise ValidationError({"ids": "Must be a comma separated list of reaction ids"})
+        if len(ids) > MAX_REACTIONS:
+            raise ValidationError({"ids": f"At most {MAX_REACTIONS} reactions are allowed"})
+        temps = parse_floats(request.query_params, "temps", DEFAULT_TEMPS)
+        pressures = parse_floats(request.query_params, "pressures")
+        reaction_ids = list(
+            self.get_queryset().filter(pk__in=ids).order_by("pk").values_list("pk", flat=True)
+        )
+        comparisons = get_reaction_rate_comparisons(reaction_ids, temps, pressures)
+
+        return Response([comparisons[reaction_id] for reaction_id in reaction_ids])
+
 
 class ThermoViewSet(PermissionsViewSet):
     queryset = models.Thermo.objects.all()
@@ -1,4 +1,5 @@
 #!/bin/bash
 
 pip install debugpy -t /tmp
+python manage.py createcachetable
 python /tmp/debugpy --wait-for-client --listen 0.0.0.0:5678 manage.py migrate
@@ -0,0 +1,59 @@
+import hashlib
+
+import numpy as np
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+
+"""
+Caching:
+Computed results are cached in the Django cache under keys of a namespace, which include
+the version of the namespace. Invalidating a namespace changes its version, so every result
+cached before is ignored and expires on its own, without having to know their keys.
+
+The versions only reach every process through a shared cache backend, like the database
+cache in the settings. With a per-process cache like LocMemCache, the other processes keep
+serving their results until CACHE_TIMEOUT.
+"""
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_grid_digest(*grids):
+    """
+    Get a digest of arrays of conditions (or None) to use in cache keys
+    """
+
+    digest = hashlib.md5()
+    for grid in grids:
+        if grid is None:
+            digest.update(b"none")
+        else:
+            digest.update(np.asarray(grid, dtype=float).ravel().tobytes())
+        digest.update(b";")
+
+    return digest.hexdigest()
+
+
+def get_cache_key(namespace, *parts):
+    version = cache.get_or_set(f"{namespace}:version", 0, None)
+
+    return ":".join([namespace, str(version), *(str(part) for part in parts)])
+
+
+def invalidate_cache(namespace):
+    """
+    Ignore the results cached in the namespace from now on.
+
+    Nothing is cached before the table of the database cache is created, which the migrations
+    (like the RMG-models import) may run before, so then there is nothing to invalidate.
+    """
+
+    try:
+        # In a savepoint, so a missing table doesn't break the caller's transaction
+        with transaction.atomic():
+            try:
+                cache.incr(f"{namespace}:version")
+            except ValueError:
+                cache.set(f"{namespace}:version", 1, None)
+    except DatabaseError:
+        pass
@@ -0,0 +1,128 @@
+import hashlib
+import io
+import multiprocessing
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.http import urlencode
+from rmgpy.molecule import Molecule
+from rmgpy.molecule.draw import MoleculeDrawer
+
+"""
+Drawing:
+Structures are drawn with RMG's MoleculeDrawer, which is slow, so the images are stored in
+the default (media) storage once they are drawn. They are named by the structure id and
+a digest of its adjacency list, so an image never goes stale: a changed adjacency list
+gets a new name. Pages link to the images with the digest in the URL (`get_image_url`),
+so browsers can cache those for as long as they like, since a changed adjacency list
+is linked with a new URL. Other URLs are revalidated with the digest as the ETag.
+
+Images are drawn as PNG or SVG. SVG drawings are smaller, so lists of structures load them
+in batches as JSON instead of one request per image.
+"""
+
+IMAGE_DIRECTORY = "structures"
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def get_adjacency_list_digest(adjacency_list):
+    return hashlib.md5(adjacency_list.encode()).hexdigest()
+
+
+def get_image_name(structure_id, adjacency_list, file_format="png"):
+    digest = get_adjacency_list_digest(adjacency_list)
+
+    return f"{IMAGE_DIRECTORY}/{structure_id}-{digest}.{file_format}"
+
+
+def get_image_url(structure, file_format="png"):
+    """
+    Get the URL of the image of a structure, versioned by its adjacency list's digest
+    """
+
+    query = urlencode({"v": get_adjacency_list_digest(structure.adjacency_list)})
+    if file_format != "png":
+        query += f"&format={file_format}"
+
+    return f"{reverse('draw-structure', args=[structure.pk])}?{query}"
+
+
+def draw_adjacency_list(adjacency_list, file_format="png"):
+    """
+    Draw the molecule of an adjacency list, returning the image as bytes
+    """
+
+    molecule = Molecule().from_adjacency_list(adjacency_list)
+    if file_format == "svg":
+        # Vector surfaces are written to their target as they are drawn, and flushed when finished
+        target = io.BytesIO()
+        surface, _, _ = MoleculeDrawer().draw(molecule, file_format=file_format, target=target)
+        surface.finish()
+
+        return target.getvalue()
+
+    surface, _, _ = MoleculeDrawer().draw(molecule, file_format=file_format)
+
+    return surface.write_to_png()
+
+
+def get_structure_image(structure_id, adjacency_list, file_format="png"):
+    """
+    Get the stored image of a structure, drawing and storing it if it isn't stored yet
+    """
+
+    name = get_image_name(structure_id, adjacency_list, file_format)
+    if default_storage.exists(name):
+        with default_storage.open(name) as f:
+            return f.read()
+
+    image = draw_adjacency_list(adjacency_list, file_format)
+    store_image(name, image)
+
+    return image
+
+
+def store_image(name, image):
+    # Another request may have stored the same image meanwhile, which is just as good
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(image))
+
+
+def _draw_structure(args):
+    structure_id, adjacency_list, file_format = args
+
+    return structure_id, adjacency_list, draw_adjacency_list(adjacency_list, file_format)
+
+
+def draw_structures(structures, file_format="png", workers=1, force=False):
+    """
+    Draw and store the images of (structure id, adjacency list) pairs that aren't stored yet,
+    or all of them if `force`, yielding the ids of the structures as they are drawn.
+
+    With more than one worker the drawing is done in a pool of forked processes,
+    while the images are stored by this one.
+    """
+
+    # Listed here, since the pool feeds the jobs to its workers from another thread
+    jobs = [
+        (structure_id, adjacency_list, file_format)
+        for structure_id, adjacency_list in structures
+        if force
+        or not default_storage.exists(get_image_name(structure_id, adjacency_list, file_format))
+    ]
+    if workers <= 1:
+        drawings = map(_draw_structure, jobs)
+    else:
+        pool = multiprocessing.get_context("fork").Pool(workers)
+        drawings = pool.imap_unordered(_draw_structure, jobs, chunksize=16)
+    try:
+        for structure_id, adjacency_list, image in drawings:
+            name = get_image_name(structure_id, adjacency_list, file_format)
+            if force and default_storage.exists(name):
+                default_storage.delete(name)
+            store_image(name, image)
+            yield structure_id
+    finally:
+        if workers > 1:
+            pool.terminate()
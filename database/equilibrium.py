@@ -0,0 +1,186 @@
+import numpy as np
+from django.core.cache import cache
+from rmgpy.constants import R
+
+from database.caching import CACHE_TIMEOUT, get_cache_key, get_grid_digest, invalidate_cache
+from database.models import KineticsComment, Stoichiometry, Thermo
+from database.models.thermo_transport import POLYNOMIAL_FIELDS, get_thermo_properties
+from database.rates import RateCoefficients, get_kinetic_model_rate_coefficients
+
+"""
+Equilibrium:
+Computes the standard Gibbs energies of reaction and the equilibrium constants of reactions
+on a grid of temperatures, from the stoichiometries and the NASA polynomials of their species,
+which are read with one query each and evaluated with the vectorized thermo functions.
+The thermo of a species is the one its kinetic model used, or its first thermo entry otherwise.
+
+The results are cached per reaction (or kinetic model), kinetic model and temperature grid.
+Saving or deleting thermo or stoichiometries invalidates the cache, but bulk imports
+don't send these signals, so the RMG-models import invalidates it when it finishes.
+"""
+
+STANDARD_PRESSURE = 1e5
+
+
+class Equilibrium:
+    """
+    The equilibrium of reactions on a grid of temperatures (K).
+
+    `gibbs_energies[i]` holds the standard Gibbs energies of reaction (J/mol) of the reaction
+    `reaction_ids[i]` by temperature, and `equilibrium_constants[i]` its equilibrium constants
+    in concentration units, (mol/m^3)^delta_n[i]. They are NaN when a species has no thermo
+    or the temperature is outside the bounds of its thermo.
+    """
+
+    def __init__(self, reaction_ids, reversible, temps, delta_n, gibbs_energies):
+        self.reaction_ids = reaction_ids
+        self.reversible = reversible
+        self.temps = temps
+        self.delta_n = delta_n
+        self.gibbs_energies = gibbs_energies
+        with np.errstate(over="ignore"):
+            self.equilibrium_constants = (
+                np.exp(-gibbs_energies / (R * temps))
+                * (STANDARD_PRESSURE / (R * temps)) ** delta_n[:, np.newaxis]
+            )
+
+    def __len__(self):
+        return len(self.reaction_ids)
+
+    def get_index(self, reaction_ids):
+        """
+        Get the rows of the reactions, or -1 for the reactions that aren't included
+        """
+
+        reaction_ids = np.asarray(reaction_ids, dtype=int)
+        index = np.searchsorted(self.reaction_ids, reaction_ids)
+        index = np.minimum(index, max(len(self) - 1, 0))
+        found = len(self) > 0 and self.reaction_ids[index] == reaction_ids
+
+        return np.where(found, index, -1)
+
+
+def get_reaction_equilibrium(reaction, temps, kinetic_model=None):
+    """
+    Get the cached equilibrium of the reaction, with the thermo of the kinetic model if given
+    """
+
+    kinetic_model_id = getattr(kinetic_model, "pk", kinetic_model)
+    key = get_cache_key(
+        "equilibrium", "reaction", reaction.pk, kinetic_model_id, get_grid_digest(temps)
+    )
+
+    return cache.get_or_set(
+        key, lambda: get_equilibrium([reaction.pk], temps, kinetic_model_id), CACHE_TIMEOUT
+    )
+
+
+def get_kinetic_model_equilibrium(kinetic_model, temps):
+    """
+    Get the cached equilibrium of every reaction of the kinetic model, with its thermo
+    """
+
+    key = get_cache_key("equilibrium", "kinetic_model", kinetic_model.pk, get_grid_digest(temps))
+    reaction_ids = KineticsComment.objects.filter(kinetic_model=kinetic_model).values(
+        "kinetics__reaction_id"
+    )
+
+    return cache.get_or_set(
+        key, lambda: get_equilibrium(reaction_ids, temps, kinetic_model.pk), CACHE_TIMEOUT
+    )
+
+
+def get_reverse_rate_coefficients(kinetic_model, temps, pressures=None):
+    """
+    Get the rate coefficients of every kinetics entry of the kinetic model in the opposite
+    direction, k_reverse = k_forward / Kc (or the other way around for reverse kinetics).
+    They are NaN for irreversible reactions.
+    """
+
+    rate_coefficients = get_kinetic_model_rate_coefficients(kinetic_model, temps, pressures)
+    equilibrium = get_kinetic_model_equilibrium(kinetic_model, rate_coefficients.temps)
+
+    index = equilibrium.get_index(rate_coefficients.reaction_ids)
+    constants = np.full((len(index), len(rate_coefficients.temps)), np.nan)
+    found = index >= 0
+    reversible = equilibrium.reversible[index[found]]
+    constants[found] = np.where(
+        reversible[:, np.newaxis], equilibrium.equilibrium_constants[index[found]], np.nan
+    )
+    if pressures is not None:
+        constants = constants[:, :, np.newaxis]
+    reverse = rate_coefficients.reverse.reshape((-1,) + (1,) * (constants.ndim - 1))
+    with np.errstate(divide="ignore", over="ignore"):
+        values = np.where(
+            reverse, rate_coefficients.values * constants, rate_coefficients.values / constants
+        )
+
+    return RateCoefficients(
+        kinetics_ids=rate_coefficients.kinetics_ids,
+        reaction_ids=rate_coefficients.reaction_ids,
+        reverse=~rate_coefficients.reverse,
+        temps=rate_coefficients.temps,
+        pressures=rate_coefficients.pressures,
+        values=values,
+    )
+
+
+def get_equilibrium(reaction_ids, temps, kinetic_model=None):
+    """
+    Compute the equilibrium of the reactions (ids or a subquery of ids) on the temperatures,
+    with two queries
+    """
+
+    temps = np.asarray(temps, dtype=float).ravel()
+    rows = list(
+        Stoichiometry.objects.filter(reaction_id__in=reaction_ids)
+        .order_by("reaction_id")
+        .values_list("reaction_id", "reaction__reversible", "species_id", "coeff")
+    )
+    reaction_ids, reaction_index = np.unique(
+        np.array([row[0] for row in rows], dtype=int), return_inverse=True
+    )
+    reversible = np.zeros(len(reaction_ids), dtype=bool)
+    reversible[reaction_index] = [row[1] for row in rows]
+    species_ids, species_index = np.unique(
+        np.array([row[2] for row in rows], dtype=int), return_inverse=True
+    )
+    coeffs = np.array([row[3] for row in rows], dtype=float)
+
+    free_energies = get_free_energies(species_ids, temps, kinetic_model)
+    gibbs_energies = np.zeros((len(reaction_ids), len(temps)))
+    np.add.at(gibbs_energies, reaction_index, coeffs[:, np.newaxis] * free_energies[species_index])
+    delta_n = np.bincount(reaction_index, weights=coeffs, minlength=len(reaction_ids))
+
+    return Equilibrium(reaction_ids, reversible, temps, delta_n, gibbs_energies)
+
+
+def get_free_energies(species_ids, temps, kinetic_model=None):
+    """
+    Get the standard Gibbs energies (J/mol) of the species (sorted ids) on the temperatures,
+    which are NaN for the species without thermo
+    """
+
+    thermo = Thermo.objects.filter(species_id__in=species_ids.tolist())
+    if kinetic_model is not None:
+        thermo = thermo.filter(thermocomment__kinetic_model=kinetic_model)
+    rows = list(
+        thermo.order_by("species_id", "id")
+        .distinct("species_id")
+        .values("species_id", *POLYNOMIAL_FIELDS)
+    )
+
+    free_energies = np.full((len(species_ids), len(temps)), np.nan)
+    if rows:
+        index = np.searchsorted(species_ids, [row["species_id"] for row in rows])
+        free_energies[index] = get_thermo_properties(rows, temps)["free_energy"]
+
+    return free_energies
+
+
+def invalidate_equilibrium_cache(**kwargs):
+    """
+    Invalidate every cached equilibrium, eg. when thermo or stoichiometries change
+    """
+
+    invalidate_cache("equilibrium")
@@ -30,6 +30,16 @@ class SpeciesFilter(django_filters.FilterSet):
             attrs={"data-html": True},
         ),
     )
+    thermo__enthalpy298 = django_filters.RangeFilter(
+        field_name="thermo__enthalpy298",
+        distinct=True,
+        label="Enthalpy at 298 K (J/mol)",
+    )
+    thermo__entropy298 = django_filters.RangeFilter(
+        field_name="thermo__entropy298",
+        distinct=True,
+        label="Entropy at 298 K (J/mol/K)",
+    )
 
     class Meta:
         model = models.Species
@@ -37,6 +47,8 @@ class SpeciesFilter(django_filters.FilterSet):
 
 
 class ReactionFilter(django_filters.FilterSet):
+    # The trigram index on the stored equations serves case insensitive searches (ILIKE) too
+    equation = django_filters.CharFilter(lookup_expr="icontains", label="Equation")
     reactant1 = django_filters.ModelChoiceFilter(
         queryset=models.Species.objects.annotate(reaction_count=Count("reaction")).filter(
             reaction_count__gt=0
@@ -0,0 +1,146 @@
+import os
+import json
+import tempfile
+import subprocess
+from datetime import datetime
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from database.scripts.import_rmg_models import canonicalization_cache, import_rmg_models
+from database.scripts.import_stats import write_summary
+from database.scripts.synthetic_rmg_models import generate_rmg_models, KINETICS_TYPES
+
+
+def parse_kinetics_mix(value):
+    """
+    Parse a kinetics mix like "arrhenius=6,troe=1" into a dict
+    """
+
+    kinetics_mix = {}
+    for item in value.split(","):
+        kinetics_type, _, weight = item.partition("=")
+        if kinetics_type not in KINETICS_TYPES:
+            raise CommandError(
+                f"Unknown kinetics type {kinetics_type}, choose from {', '.join(KINETICS_TYPES)}"
+            )
+        kinetics_mix[kinetics_type] = float(weight or 1)
+
+    return kinetics_mix
+
+
+def get_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the RMG-models import of synthetic kinetic models, end to end and per stage. "
+        "The models are imported into a throwaway database, created like the test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--models", type=int, default=2, help="Number of kinetic models")
+        parser.add_argument("--species", type=int, default=50, help="Species per model")
+        parser.add_argument("--reactions", type=int, default=100, help="Reactions per model")
+        parser.add_argument(
+            "--kinetics-mix",
+            type=parse_kinetics_mix,
+            help="Relative frequency of the kinetics types, eg. arrhenius=6,troe=1",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the generated models")
+        parser.add_argument(
+            "--workers", type=int, help="Number of parser processes (default: RMGIMPORTWORKERS)"
+        )
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="Use the canonicalization cache of the imports (RMGIMPORTCANONCACHE) "
+            "instead of an empty one",
+        )
+        parser.add_argument(
+            "--output",
+            default="rmg-import-benchmarks.jsonl",
+            help="JSON lines file the results are appended to",
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rmg-models")
+            stats_path = os.path.join(directory, "stats.jsonl")
+            generate_rmg_models(
+                path,
+                models=options["models"],
+                species=options["species"],
+                reactions=options["reactions"],
+                kinetics_mix=options["kinetics_mix"],
+                seed=options["seed"],
+            )
+            empty_path = os.path.join(directory, "empty")
+            os.makedirs(empty_path)
+            environment = {
+                # The import migration run while creating the database imports nothing
+                "RMGMODELSPATH": empty_path,
+                "RMGIMPORTSTATS": stats_path,
+                "RMGIMPORTSTATE": "",
+                "RMGDOIRESOLVER": "none",
+                "RMGDOICACHE": "",
+            }
+            previous_environment = {name: os.environ.get(name) for name in environment}
+            os.environ.update(environment)
+            canonicalization_cache_path = canonicalization_cache.path
+            if not options["warm_cache"]:
+                canonicalization_cache.open(os.path.join(directory, "canonicalization.sqlite3"))
+            database_name = connection.settings_dict["NAME"]
+            test_settings = connection.settings_dict["TEST"]
+            connection.settings_dict["TEST"] = {
+                **test_settings,
+                "NAME": f"benchmark_{database_name}",
+            }
+            try:
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    # Committed in batches like any other import
+                    import_rmg_models(apps, None, path=path, workers=options["workers"])
+                finally:
+                    connection.creation.destroy_test_db(database_name, verbosity=0)
+            finally:
+                connection.settings_dict["TEST"] = test_settings
+                canonicalization_cache.open(canonicalization_cache_path)
+                for name, value in previous_environment.items():
+                    if value is None:
+                        os.environ.pop(name)
+                    else:
+                        os.environ[name] = value
+
+            with open(stats_path, "r") as f:
+                summaries = [json.loads(line) for line in f]
+
+        run = summaries[-1]
+        result = {
+            "timestamp": datetime.now().isoformat(),
+            "revision": get_revision(),
+            "parameters": {
+                name: options[name]
+                for name in ["models", "species", "reactions", "kinetics_mix", "seed", "workers"]
+            },
+            "canonicalization_cache": "warm" if options["warm_cache"] else "cold",
+            "seconds": run["seconds"],
+            "stages": run["stages"],
+            "kinetic_models": summaries[:-1],
+        }
+        write_summary(options["output"], result)
+
+        self.stdout.write(f"Imported {options['models']} kinetic models in {run['seconds']} s")
+        for stage, stats in run["stages"].items():
+            self.stdout.write(
+                f"{stage:>24}: {stats['seconds']:>10} s {stats['entries']:>8} entries "
+                f"{stats['entries_per_second'] or '':>10} entries/s {stats['queries']:>8} queries"
+            )
+        self.stdout.write(f"Results appended to {options['output']}")
@@ -0,0 +1,34 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from database.scripts.import_rmg_models import import_rmg_models
+
+
+class Command(BaseCommand):
+    help = "Import the kinetic models in RMG-models into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", help="Path of the RMG-models repo (default: RMGMODELSPATH)")
+        parser.add_argument(
+            "--workers", type=int, help="Number of parser processes (default: RMGIMPORTWORKERS)"
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only import the libraries that changed since they were last imported",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint of an unfinished import instead of resuming it",
+        )
+
+    def handle(self, *args, **options):
+        import_rmg_models(
+            apps,
+            None,
+            path=options["path"],
+            workers=options["workers"],
+            incremental=options["incremental"],
+            resume=not options["restart"],
+        )
@@ -0,0 +1,42 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from database.drawing import CONTENT_TYPES, draw_structures
+from database.models import Structure
+
+
+class Command(BaseCommand):
+    help = "Draw and store the images of the structures that don't have one yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(), help="Number of drawing processes"
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Redraw the structures that already have one"
+        )
+        parser.add_argument(
+            "--format",
+            choices=[*CONTENT_TYPES, "all"],
+            default="all",
+            help="Format of the images to draw, lists of structures load them as SVG",
+        )
+
+    def handle(self, *args, **options):
+        file_formats = list(CONTENT_TYPES) if options["format"] == "all" else [options["format"]]
+        structures = Structure.objects.order_by("id").values_list("id", "adjacency_list")
+        for file_format in file_formats:
+            count = 0
+            for count, _ in enumerate(
+                draw_structures(
+                    structures,
+                    file_format=file_format,
+                    workers=options["workers"],
+                    force=options["force"],
+                ),
+                1,
+            ):
+                if count % 1000 == 0:
+                    self.stdout.write(f"Drew {count} {file_format.upper()} structures")
+            self.stdout.write(self.style.SUCCESS(f"Drew {count} {file_format.upper()} structures"))
@@ -0,0 +1,124 @@
+import django.contrib.postgres.fields
+import numpy as np
+from django.db import migrations, models
+from rmgpy.constants import R
+
+# The summary is computed here rather than with the Thermo model's code, which may change
+POLYNOMIAL_FIELDS = ["coeffs_poly1", "coeffs_poly2", "temp_min_1", "temp_max_1", "temp_max_2"]
+SUMMARY_FIELDS = ["enthalpy298", "entropy298", "heat_capacities"]
+HEAT_CAPACITY_TEMPS = [300.0, 400.0, 500.0, 600.0, 800.0, 1000.0, 1500.0]
+BATCH_SIZE = 5000
+
+
+def get_coeffs(row, temp):
+    """
+    Get the coefficients of the NASA polynomial of a Thermo row used at the temperature,
+    or None outside its bounds
+    """
+
+    if temp < row["temp_min_1"]:
+        return None
+    elif temp < row["temp_max_1"]:
+        return row["coeffs_poly1"]
+    elif temp < row["temp_max_2"]:
+        return row["coeffs_poly2"]
+    else:
+        return None
+
+
+def get_heat_capacity(coeffs, temp):
+    c1, c2, c3, c4, c5, _, _ = coeffs
+    return (c1 + temp * (c2 + temp * (c3 + temp * (c4 + c5 * temp)))) * R
+
+
+def get_enthalpy(coeffs, temp):
+    c1, c2, c3, c4, c5, c6, _ = coeffs
+    temp2 = temp * temp
+    return (
+        c1 * temp
+        + c2 * temp2 / 2.0
+        + c3 * temp2 * temp / 3.0
+        + c4 * temp2 * temp2 / 4.0
+        + c5 * temp2 * temp2 * temp / 5.0
+        + c6
+    ) * R
+
+
+def get_entropy(coeffs, temp):
+    c1, c2, c3, c4, c5, _, c7 = coeffs
+    temp2 = temp * temp
+    return (
+        c1 * np.log(temp)
+        + c2 * temp
+        + c3 * temp2 / 2.0
+        + c4 * temp2 * temp / 3.0
+        + c5 * temp2 * temp2 / 4.0
+        + c7
+    ) * R
+
+
+def get_thermo_summary(row):
+    def evaluate(function, temp):
+        coeffs = get_coeffs(row, temp)
+        return None if coeffs is None else float(function(coeffs, temp))
+
+    return {
+        "enthalpy298": evaluate(get_enthalpy, 298.15),
+        "entropy298": evaluate(get_entropy, 298.15),
+        "heat_capacities": [evaluate(get_heat_capacity, temp) for temp in HEAT_CAPACITY_TEMPS],
+    }
+
+
+def backfill_thermo_summaries(apps, schema_editor):
+    """
+    Compute the summary fields of the existing Thermo entries, in batches ordered by id
+    """
+
+    Thermo = apps.get_model("database", "Thermo")
+    last_id = 0
+    while True:
+        rows = list(
+            Thermo.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values("id", *POLYNOMIAL_FIELDS)[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        Thermo.objects.bulk_update(
+            [Thermo(id=row["id"], **get_thermo_summary(row)) for row in rows], SUMMARY_FIELDS
+        )
+        last_id = rows[-1]["id"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("database", "import_rmg_models")]
+
+    operations = [
+        migrations.AddField(
+            model_name="thermo",
+            name="enthalpy298",
+            field=models.FloatField(
+                db_index=True, help_text="units: J/mol", null=True, verbose_name="Enthalpy (298 K)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="thermo",
+            name="entropy298",
+            field=models.FloatField(
+                db_index=True, help_text="units: J/mol/K", null=True, verbose_name="Entropy (298 K)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="thermo",
+            name="heat_capacities",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(null=True),
+                help_text="units: J/mol/K, at 300, 400, 500, 600, 800, 1000, 1500 K",
+                null=True,
+                size=len(HEAT_CAPACITY_TEMPS),
+                verbose_name="Heat Capacities",
+            ),
+        ),
+        migrations.RunPython(backfill_thermo_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reaction_counts(apps, schema_editor):
+    Reaction = apps.get_model("database", "Reaction")
+    Kinetics = apps.get_model("database", "Kinetics")
+    KineticsComment = apps.get_model("database", "KineticsComment")
+    kinetics_count = (
+        Kinetics.objects.filter(reaction=OuterRef("pk"))
+        .order_by()
+        .values("reaction")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    kinetic_model_count = (
+        KineticsComment.objects.filter(kinetics__reaction=OuterRef("pk"))
+        .order_by()
+        .values("kinetics__reaction")
+        .annotate(count=Count("kinetic_model", distinct=True))
+        .values("count")
+    )
+    Reaction.objects.update(
+        kinetics_count=Coalesce(Subquery(kinetics_count), 0),
+        kinetic_model_count=Coalesce(Subquery(kinetic_model_count), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("database", "0002_thermo_summary")]
+
+    operations = [
+        migrations.AddField(
+            model_name="reaction",
+            name="kinetics_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="reaction",
+            name="kinetic_model_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+import math
+from collections import defaultdict
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def format_equation(stoich_formulas, reversible):
+    """
+    Format the equation of a reaction from (coefficient, species id, formula) tuples,
+    as the Reaction model did when this migration was written
+    """
+
+    stoich_reactants = []
+    stoich_products = []
+    for stoich, _, formula in sorted(stoich_formulas, key=lambda x: x[1] * math.copysign(1, x[0])):
+        if stoich < 0:
+            stoich_reactants.append((stoich, formula))
+        elif stoich == 0:
+            stoich_reactants.append((-1, formula))
+            stoich_products.append((1, formula))
+        else:
+            stoich_products.append((stoich, formula))
+    left_side = " + ".join(
+        f"{int(abs(stoich)) if abs(stoich) != 1 else ''}{formula}"
+        for stoich, formula in stoich_reactants
+    )
+    right_side = " + ".join(
+        f"{int(stoich) if stoich != 1 else ''}{formula}" for stoich, formula in stoich_products
+    )
+    arrow = "<=>" if reversible else "->"
+
+    return f"{left_side} {arrow} {right_side}"
+
+
+def backfill_formulas_equations(apps, schema_editor):
+    """
+    Store the formula of the first isomer of every species, then the equations of the reactions
+    from these formulas, in batches ordered by id
+    """
+
+    Species = apps.get_model("database", "Species")
+    Isomer = apps.get_model("database", "Isomer")
+    Reaction = apps.get_model("database", "Reaction")
+    Stoichiometry = apps.get_model("database", "Stoichiometry")
+    formula = (
+        Isomer.objects.filter(species=OuterRef("pk")).order_by("pk").values("formula__formula")[:1]
+    )
+    Species.objects.update(formula=Coalesce(Subquery(formula), Value("")))
+
+    last_id = 0
+    while True:
+        batch = list(
+            Reaction.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "reversible")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        stoich_formulas = defaultdict(list)
+        for reaction_id, *stoich_formula in Stoichiometry.objects.filter(
+            reaction_id__in=[reaction_id for reaction_id, _ in batch]
+        ).values_list("reaction_id", "coeff", "species_id", "species__formula"):
+            stoich_formulas[reaction_id].append(stoich_formula)
+        Reaction.objects.bulk_update(
+            [
+                Reaction(
+                    pk=reaction_id,
+                    equation=format_equation(stoich_formulas[reaction_id], reversible),
+                )
+                for reaction_id, reversible in batch
+            ],
+            ["equation"],
+        )
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("database", "0003_reaction_counts")]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="species",
+            name="formula",
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name="reaction",
+            name="equation",
+            field=models.CharField(blank=True, editable=False, max_length=1000),
+        ),
+        migrations.AddIndex(
+            model_name="reaction",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["equation"], name="reaction_equation_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.RunPython(backfill_formulas_equations, migrations.RunPython.noop),
+    ]
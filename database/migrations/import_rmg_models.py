@@ -3,6 +3,8 @@ from django.db import migrations
 from database.scripts.import_rmg_models import import_rmg_models
 
 class Migration(migrations.Migration):
+    # Each kinetic model is committed on its own, so a failed import can resume from its checkpoint
+    atomic = False
     dependencies = [("database", "0001_initial")]
 
     operations = [migrations.RunPython(import_rmg_models)]
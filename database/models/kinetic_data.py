@@ -1,12 +1,17 @@
+import copy
+from functools import lru_cache
 from typing import List, Optional
 
+import numpy as np
 import rmgpy.kinetics as kinetics
+from numpy.polynomial.chebyshev import chebval2d
 from titlecase import titlecase
 from django.core.exceptions import ValidationError as DJValidationError
 from django.db import models
 from django.contrib.postgres.fields import JSONField
-from pydantic.typing import Literal
+from pydantic.typing import Literal, get_args
 from pydantic import BaseModel, ValidationError, validator
+from rmgpy.constants import R
 from rmgpy.quantity import ScalarQuantity, ArrayQuantity, RATECOEFFICIENT_COMMON_UNITS, Energy
 
 
@@ -35,12 +40,66 @@ def validate_energy_units(units):
     return units
 
 
+@lru_cache(maxsize=None)
+def get_si_factor(units):
+    """
+    Get the factor converting a quantity in `units` to SI units
+    """
+
+    return ScalarQuantity(1.0, units).value_si
+
+
+def broadcast_conditions(temps, pressures=None, pressure_dependent=False):
+    """
+    Get the temperatures and pressures as float arrays broadcast against each other.
+
+    Pass eg. `temps[:, None]` and `pressures[None, :]` to evaluate over a grid.
+    """
+
+    temps = np.asarray(temps, dtype=float)
+    if pressures is None:
+        if pressure_dependent:
+            raise ValueError("Pressures are required to evaluate pressure dependent kinetics")
+        return temps, None
+
+    return tuple(np.broadcast_arrays(temps, np.asarray(pressures, dtype=float)))
+
+
+def get_concentrations(temps, pressures):
+    """
+    Get the total concentrations (mol/m^3) of an ideal gas at the temperatures and pressures
+    """
+
+    return pressures / (R * temps)
+
+
+"""
+Rate Coefficients:
+Every kinetics data class has a `get_rate_coefficient` method that evaluates its rate coefficient
+in SI units with NumPy, over arrays of temperatures (K) and pressures (Pa) that are broadcast
+against each other, without building RMG objects. It takes the same bounds as `to_rmg`,
+which only Chebyshev kinetics need. Arrhenius expressions are evaluated with T0 = 1 K,
+which is what the RMG-models importer assumes.
+"""
+
+
 @register
 class KineticsData(BaseModel):
     type: Literal["kinetics_data"]
     temps: List[float]
     rate_coeffs: List[float]
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        """
+        Interpolate ln(k) linearly in temperature, clamping to the tabulated temperatures
+        """
+
+        temps, _ = broadcast_conditions(temps, pressures)
+        order = np.argsort(self.temps)
+        log_k = np.log(np.asarray(self.rate_coeffs, dtype=float)[order])
+
+        return np.exp(np.interp(temps, np.asarray(self.temps, dtype=float)[order], log_k))
+
 
 @register
 class Arrhenius(BaseModel):
@@ -63,6 +122,11 @@ class Arrhenius(BaseModel):
     def e_units_common(cls, v):
         return validate_energy_units(v)
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        temps, _ = broadcast_conditions(temps, pressures)
+
+        return self.a_si * temps**self.n * np.exp(-self.e_si / (R * temps))
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, *args):
         """
         Return an rmgpy.kinetics.Arrhenius object for this rate expression.
@@ -112,8 +176,9 @@ class ArrheniusEP(BaseModel):
     type: Literal["arrhenius_ep"]
     a: float
     a_si: float
-    a_units: float
+    a_units: str
     n: float
+    alpha: float
     e0: float
     e0_si: float
     e0_units: str
@@ -126,12 +191,42 @@ class ArrheniusEP(BaseModel):
     def e0_units_common(cls, v):
         return validate_energy_units(v)
 
-    def to_rmg(self):
+    def get_activation_energy(self, dh_rxn):
+        """
+        Get the Evans-Polanyi activation energy (J/mol) for the reaction enthalpy (J/mol),
+        which like RMG's is 0 for very exothermic reactions and the reaction enthalpy
+        for very endothermic ones, when the intrinsic barrier is positive
+        """
+
+        if self.e0_si > 0:
+            if dh_rxn < -4 * self.e0_si:
+                return 0.0
+            elif dh_rxn > 4 * self.e0_si:
+                return dh_rxn
+
+        return self.e0_si + self.alpha * dh_rxn
+
+    def get_rate_coefficient(self, temps, pressures=None, *args, dh_rxn=0.0):
+        """
+        The rate coefficient depends on the reaction enthalpy (J/mol), which the stored data
+        doesn't have, so it has to be passed as `dh_rxn`
+        """
+
+        temps, _ = broadcast_conditions(temps, pressures)
+        e = self.get_activation_energy(dh_rxn)
+
+        return self.a_si * temps**self.n * np.exp(-e / (R * temps))
+
+    def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, *args):
         return kinetics.ArrheniusEP(
             A=ScalarQuantity(self.a, self.a_units),
             n=self.n,
             alpha=self.alpha,
             E0=ScalarQuantity(self.e0, self.e0_units),
+            Tmin=ScalarQuantity(min_temp, "K"),
+            Tmax=ScalarQuantity(max_temp, "K"),
+            Pmin=ScalarQuantity(min_pressure, "Pa"),
+            Pmax=ScalarQuantity(max_pressure, "Pa"),
         )
 
     def table_data(self):
@@ -155,6 +250,41 @@ class PDepArrhenius(BaseModel):
     type: Literal["pdep_arrhenius"]
     pressure_set: List[Pressure]
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        """
+        Interpolate ln(k) linearly in ln(P) between the pressures of the set,
+        clamping to its lowest and highest pressures.
+        Rate expressions at the same pressure are added up.
+        """
+
+        temps, pressures = broadcast_conditions(temps, pressures, pressure_dependent=True)
+        levels = sorted({p.pressure for p in self.pressure_set})
+        log_k = np.stack(
+            [
+                np.log(
+                    sum(
+                        p.arrhenius.get_rate_coefficient(temps)
+                        for p in self.pressure_set
+                        if p.pressure == level
+                    )
+                )
+                for level in levels
+            ]
+        )
+        if len(levels) == 1:
+            return np.exp(log_k[0])
+
+        log_levels = np.log(levels)
+        log_pressures = np.clip(np.log(pressures), log_levels[0], log_levels[-1])
+        low = np.clip(
+            np.searchsorted(log_levels, log_pressures, side="right") - 1, 0, len(levels) - 2
+        )
+        weights = (log_pressures - log_levels[low]) / (log_levels[low + 1] - log_levels[low])
+        log_k_low = np.take_along_axis(log_k, low[np.newaxis], axis=0)[0]
+        log_k_high = np.take_along_axis(log_k, low[np.newaxis] + 1, axis=0)[0]
+
+        return np.exp(log_k_low + weights * (log_k_high - log_k_low))
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, *args):
         return kinetics.PDepArrhenius(
             pressures=ArrayQuantity([p.pressure for p in self.pressure_set], "Pa"),
@@ -183,6 +313,11 @@ class MultiArrhenius(BaseModel):
     type: Literal["multi_arrhenius"]
     arrhenius_set: List[Arrhenius]
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        temps, _ = broadcast_conditions(temps, pressures)
+
+        return sum(arrhenius.get_rate_coefficient(temps) for arrhenius in self.arrhenius_set)
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, *args):
         return kinetics.MultiArrhenius(
             arrhenius=[a.arrhenius.to_rmg() for a in self.arrhenius_set],
@@ -207,6 +342,14 @@ class MultiPDepArrhenius(BaseModel):
     type: Literal["multi_pdep_arrhenius"]
     pdep_arrhenius_set: List[PDepArrhenius]
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        temps, pressures = broadcast_conditions(temps, pressures, pressure_dependent=True)
+
+        return sum(
+            pdep_arrhenius.get_rate_coefficient(temps, pressures)
+            for pdep_arrhenius in self.pdep_arrhenius_set
+        )
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, *args):
         return kinetics.MultiPdepArrhenius(
             arrhenius=[
@@ -234,6 +377,32 @@ class Chebyshev(BaseModel):
     coefficient_matrix: List[List[float]]
     units: str
 
+    def get_rate_coefficient(
+        self,
+        temps,
+        pressures=None,
+        min_temp=None,
+        max_temp=None,
+        min_pressure=None,
+        max_pressure=None,
+    ):
+        """
+        The coefficient matrix is indexed by the degree in reduced inverse temperature, then in
+        reduced log pressure, and gives log10(k) in `units` over the temperature and pressure bounds
+        """
+
+        if None in (min_temp, max_temp, min_pressure, max_pressure):
+            raise ValueError("Temperature and pressure bounds are required for Chebyshev kinetics")
+        temps, pressures = broadcast_conditions(temps, pressures, pressure_dependent=True)
+        reduced_temps = (2 / temps - 1 / min_temp - 1 / max_temp) / (1 / max_temp - 1 / min_temp)
+        log_min_pressure, log_max_pressure = np.log10(min_pressure), np.log10(max_pressure)
+        reduced_pressures = (2 * np.log10(pressures) - log_min_pressure - log_max_pressure) / (
+            log_max_pressure - log_min_pressure
+        )
+        log_k = chebval2d(reduced_temps, reduced_pressures, np.asarray(self.coefficient_matrix))
+
+        return 10**log_k * get_si_factor(self.units)
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, *args):
         return kinetics.Chebyshev(
             coeffs=self.coefficient_matrix,
@@ -250,6 +419,11 @@ class ThirdBody(BaseModel):
     type: Literal["third_body"]
     low_arrhenius: Arrhenius
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        temps, pressures = broadcast_conditions(temps, pressures, pressure_dependent=True)
+
+        return self.low_arrhenius.get_rate_coefficient(temps) * get_concentrations(temps, pressures)
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, *args):
         return kinetics.ThirdBody(
             arrheniusLow=self.low_arrhenius.to_rmg(),
@@ -269,6 +443,17 @@ class Lindemann(BaseModel):
     low_arrhenius: Arrhenius
     high_arrhenius: Arrhenius
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        temps, pressures = broadcast_conditions(temps, pressures, pressure_dependent=True)
+        k_inf = self.high_arrhenius.get_rate_coefficient(temps)
+        reduced_pressures = (
+            self.low_arrhenius.get_rate_coefficient(temps)
+            * get_concentrations(temps, pressures)
+            / k_inf
+        )
+
+        return k_inf * reduced_pressures / (1 + reduced_pressures)
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, efficiencies, *args):
         rmg_efficiencies = {e.species.to_rmg(): e.efficiency for e in self.efficiency_set.all()}
 
@@ -298,6 +483,31 @@ class Troe(BaseModel):
     t2: float = 0.0
     t3: float
 
+    def get_rate_coefficient(self, temps, pressures=None, *args):
+        """
+        A t2 of 0 means the Troe expression has no t2 term, as in Chemkin
+        """
+
+        temps, pressures = broadcast_conditions(temps, pressures, pressure_dependent=True)
+        k_inf = self.high_arrhenius.get_rate_coefficient(temps)
+        reduced_pressures = (
+            self.low_arrhenius.get_rate_coefficient(temps)
+            * get_concentrations(temps, pressures)
+            / k_inf
+        )
+
+        f_cent = (1 - self.alpha) * np.exp(-temps / self.t3) + self.alpha * np.exp(-temps / self.t1)
+        if self.t2:
+            f_cent += np.exp(-self.t2 / temps)
+        log_f_cent = np.log10(f_cent)
+        c = -0.4 - 0.67 * log_f_cent
+        n = 0.75 - 1.27 * log_f_cent
+        d = 0.14
+        log_reduced_pressures = np.log10(reduced_pressures) + c
+        log_f = log_f_cent / (1 + (log_reduced_pressures / (n - d * log_reduced_pressures)) ** 2)
+
+        return k_inf * reduced_pressures / (1 + reduced_pressures) * 10**log_f
+
     def to_rmg(self, min_temp, max_temp, min_pressure, max_pressure, efficiencies, *args):
         rmg_efficiencies = {e.species.to_rmg(): e.efficiency for e in efficiencies}
 
@@ -349,23 +559,31 @@ class Efficiency(models.Model):
         )
 
 
+# The registered kinetics data classes keyed by the literal of their `type` field
+kinetics_data_types = {
+    type_literal: model
+    for model in register
+    if "type" in model.__fields__
+    for type_literal in get_args(model.__fields__["type"].outer_type_)
+}
+
+
 def validate_kinetics_data(data, returns=False):
-    error = None
-    valid = False
-    for model in register:
-        try:
-            obj = model(**data)
-            if returns:
-                return obj
-            valid = True
-        except ValidationError as e:
-            locs = [v for error in e.errors() for v in error.get("loc") if error.get("loc")]
-            if "type" not in locs:
-                error = e
-
-    if not valid:
-        error_msgs = [f"{', '.join(e.get('loc'))}: {e.get('msg')}" for e in error.errors()]
-        raise DJValidationError(error_msgs or f"Invalid type: {data.get('type')}")
+    if not isinstance(data, dict):
+        raise DJValidationError("Kinetics data must be an object")
+    model = kinetics_data_types.get(data.get("type"))
+    if model is None:
+        raise DJValidationError(f"Invalid type: {data.get('type')}")
+
+    try:
+        obj = model(**data)
+    except ValidationError as e:
+        raise DJValidationError(
+            [f"{', '.join(str(v) for v in error['loc'])}: {error['msg']}" for error in e.errors()]
+        )
+
+    if returns:
+        return obj
 
 
 class Kinetics(models.Model):
@@ -409,13 +627,34 @@ class Kinetics(models.Model):
         """
         return self.to_rmg().to_chemkin()
 
+    def get_rate_coefficient(self, temps, pressures=None):
+        """
+        Evaluate the rate coefficient (SI units) over arrays of temperatures (K) and pressures (Pa)
+        """
+
+        return self.data.get_rate_coefficient(
+            temps, pressures, self.min_temp, self.max_temp, self.min_pressure, self.max_pressure
+        )
+
     @property
     def type(self):
         return " ".join(titlecase(s) for s in self.data.type.split("_"))
 
     @property
     def data(self):
-        return validate_kinetics_data(self.raw_data, returns=True)
+        """
+        The parsed `raw_data`, cached until `raw_data` changes
+        """
+
+        cached = getattr(self, "_data_cache", None)
+        if cached is None or cached[0] != self.raw_data:
+            cached = (
+                copy.deepcopy(self.raw_data),
+                validate_kinetics_data(self.raw_data, returns=True),
+            )
+            self._data_cache = cached
+
+        return cached[1]
 
     def __str__(self):
         return f"{self.id} Reaction: {self.reaction.id}"
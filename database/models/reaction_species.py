@@ -1,10 +1,12 @@
-from functools import lru_cache
 import math
+from collections import defaultdict
 
 import rmgpy
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
 from rmgpy.molecule import Molecule
-from . import KineticModel, Kinetics
 
 
 class Formula(models.Model):
@@ -47,6 +49,8 @@ class Species(models.Model):
     prime_id = models.CharField("PrIMe ID", blank=True, max_length=9)
     cas_number = models.CharField("CAS Registry Number", blank=True, max_length=400)
     isomers = models.ManyToManyField("Isomer")
+    # The formula of the first isomer, kept up to date by the signals and update_species_formulas
+    formula = models.CharField(blank=True, db_index=True, editable=False, max_length=50)
 
     def __str__(self):
         return f"{self.id} Formula: {self.formula or None}"
@@ -70,11 +74,22 @@ class Species(models.Model):
 
         return Structure.objects.filter(id__in=structure_ids)
 
-    @property
-    def formula(self):
-        isomers = Isomer.objects.filter(species=self)
-        if isomers:
-            return isomers.first().formula.formula
+    def get_formula(self):
+        isomer = self.isomers.select_related("formula").order_by("pk").first()
+
+        return isomer.formula.formula if isomer else ""
+
+
+class ReactionQuerySet(models.QuerySet):
+    def prefetch_stoichiometry(self):
+        """
+        Prefetch the stoichiometries of the reactions along with their species,
+        which is all `Reaction.get_equation` and eg. `Reaction.reactants` need
+        """
+
+        return self.prefetch_related(
+            Prefetch("stoichiometry_set", queryset=Stoichiometry.objects.select_related("species"))
+        )
 
 
 class Reaction(models.Model):
@@ -82,9 +97,19 @@ class Reaction(models.Model):
     species = models.ManyToManyField("Species", through="Stoichiometry")
     prime_id = models.CharField("PrIMe ID", blank=True, max_length=10)
     reversible = models.BooleanField()
+    # Kept up to date by update_reaction_counts, so lists of reactions don't count them
+    kinetics_count = models.PositiveIntegerField(default=0, editable=False)
+    kinetic_model_count = models.PositiveIntegerField(default=0, editable=False)
+    # Kept up to date by the signals and update_reaction_equations
+    equation = models.CharField(blank=True, editable=False, max_length=1000)
+
+    objects = ReactionQuerySet.as_manager()
 
     class Meta:
         ordering = ("prime_id",)
+        indexes = [
+            GinIndex(fields=["equation"], name="reaction_equation_trgm", opclasses=["gin_trgm_ops"])
+        ]
 
     def stoich_species(self):
         """
@@ -169,42 +194,125 @@ class Reaction(models.Model):
             reactants=rmg_reactants, products=rmg_products, reversible=self.reversible
         )
 
-    @property
-    @lru_cache(maxsize=None)
-    def kinetic_model_count(self):
-        return KineticModel.objects.filter(kinetics__reaction=self).count()
-
-    @property
-    @lru_cache(maxsize=None)
-    def kinetics_count(self):
-        return Kinetics.objects.filter(reaction=self).count()
-
     def __str__(self):
         return f"{self.id} {self.equation}"
 
-    @property
-    def equation(self):
-        stoich_reactants = []
-        stoich_products = []
-        for stoich, species in self.stoich_species():
-            if stoich < 0:
-                stoich_reactants.append((stoich, species))
-            elif stoich == 0:
-                stoich_reactants.append((-1, species))
-                stoich_products.append((1, species))
-            else:
-                stoich_products.append((stoich, species))
-        left_side = " + ".join(
-            f"{int(abs(stoich)) if abs(stoich) != 1 else ''}{species.formula}"
-            for stoich, species in stoich_reactants
+    def get_equation(self):
+        return format_equation(
+            [(stoich, species.pk, species.formula) for stoich, species in self.stoich_species()],
+            self.reversible,
+        )
+
+
+def format_equation(stoich_formulas, reversible):
+    """
+    Format the equation of a reaction from (coefficient, species id, formula) tuples
+    """
+
+    stoich_reactants = []
+    stoich_products = []
+    for stoich, _, formula in sorted(stoich_formulas, key=lambda x: x[1] * math.copysign(1, x[0])):
+        if stoich < 0:
+            stoich_reactants.append((stoich, formula))
+        elif stoich == 0:
+            stoich_reactants.append((-1, formula))
+            stoich_products.append((1, formula))
+        else:
+            stoich_products.append((stoich, formula))
+    left_side = " + ".join(
+        f"{int(abs(stoich)) if abs(stoich) != 1 else ''}{formula}"
+        for stoich, formula in stoich_reactants
+    )
+    right_side = " + ".join(
+        f"{int(stoich) if stoich != 1 else ''}{formula}" for stoich, formula in stoich_products
+    )
+    arrow = "<=>" if reversible else "->"
+
+    return f"{left_side} {arrow} {right_side}"
+
+
+def update_species_formulas(species):
+    """
+    Store the formulas of a queryset of species, with one UPDATE.
+
+    Like `update_reaction_counts`, this also works with the historical models of migrations.
+    """
+
+    Isomer = species.model._meta.get_field("isomers").related_model
+    formula = (
+        Isomer.objects.filter(species=OuterRef("pk")).order_by("pk").values("formula__formula")[:1]
+    )
+
+    return species.update(formula=Coalesce(Subquery(formula), Value("")))
+
+
+def update_reaction_equations(reactions, batch_size=1000):
+    """
+    Store the equations of a queryset of reactions, from the stored formulas of their species.
+
+    The reactions are updated in batches of `batch_size`, each with two queries and a bulk update.
+    Like `update_reaction_counts`, this also works with the historical models of migrations.
+    """
+
+    Reaction = reactions.model
+    Stoichiometry = Reaction._meta.get_field("stoichiometry").related_model
+    last_id = 0
+    while True:
+        batch = list(
+            reactions.filter(pk__gt=last_id)
+            .order_by("pk")
+            .distinct()
+            .values_list("pk", "reversible")[:batch_size]
         )
-        right_side = " + ".join(
-            f"{int(stoich) if stoich != 1 else ''}{species.formula}"
-            for stoich, species in stoich_products
+        if not batch:
+            break
+        stoich_formulas = defaultdict(list)
+        for reaction_id, *stoich_formula in Stoichiometry.objects.filter(
+            reaction_id__in=[reaction_id for reaction_id, _ in batch]
+        ).values_list("reaction_id", "coeff", "species_id", "species__formula"):
+            stoich_formulas[reaction_id].append(stoich_formula)
+        Reaction.objects.bulk_update(
+            [
+                Reaction(
+                    pk=reaction_id,
+                    equation=format_equation(stoich_formulas[reaction_id], reversible),
+                )
+                for reaction_id, reversible in batch
+            ],
+            ["equation"],
         )
-        arrow = "<=>" if self.reversible else "->"
+        last_id = batch[-1][0]
+
+
+def update_reaction_counts(reactions):
+    """
+    Recount the kinetics and the kinetic models of a queryset of reactions, with one UPDATE.
+
+    The related models are looked up from the queryset's model,
+    so this also works with the historical models of migrations.
+    """
 
-        return f"{left_side} {arrow} {right_side}"
+    Kinetics = reactions.model._meta.get_field("kinetics").related_model
+    KineticsComment = Kinetics._meta.get_field("kineticscomment").related_model
+    kinetics_count = (
+        Kinetics.objects.filter(reaction=OuterRef("pk"))
+        .order_by()
+        .values("reaction")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    kinetic_model_count = (
+        KineticsComment.objects.filter(kinetics__reaction=OuterRef("pk"))
+        .order_by()
+        .values("kinetics__reaction")
+        .annotate(count=Count("kinetic_model", distinct=True))
+        .values("count")
+    )
+
+    return reactions.update(
+        kinetics_count=Coalesce(Subquery(kinetics_count), 0),
+        kinetic_model_count=Coalesce(Subquery(kinetic_model_count), 0),
+    )
 
 
 class Stoichiometry(models.Model):
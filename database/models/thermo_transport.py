@@ -1,9 +1,149 @@
-from math import log
-
+import numpy as np
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
 from rmgpy.constants import R as gas_constant
 
+"""
+NASA Polynomials:
+The thermo properties are evaluated with NumPy over arrays of temperatures (K).
+`select_polynomials` gives the 7 coefficients of the polynomial used at each temperature
+along an extra last axis, which the `get_*` functions evaluate, so the same code
+evaluates a single Thermo entry or many at once (see `get_thermo_properties`).
+"""
+
+POLYNOMIAL_FIELDS = ["coeffs_poly1", "coeffs_poly2", "temp_min_1", "temp_max_1", "temp_max_2"]
+SUMMARY_FIELDS = ["enthalpy298", "entropy298", "heat_capacities"]
+HEAT_CAPACITY_TEMPS = [300.0, 400.0, 500.0, 600.0, 800.0, 1000.0, 1500.0]
+
+
+def select_polynomials(temps, coeffs_poly1, coeffs_poly2, temp_min_1, temp_max_1, temp_max_2):
+    """
+    Pick the coefficients of the polynomial for each temperature, which are NaN outside the bounds.
+
+    The temperatures are broadcast against the bounds, and the coefficients against the
+    temperatures with an extra last axis.
+    """
+
+    temps = np.asarray(temps, dtype=float)
+    first = temps < np.asarray(temp_max_1, dtype=float)
+    in_range = (temps >= np.asarray(temp_min_1, dtype=float)) & (
+        first | (temps < np.asarray(temp_max_2, dtype=float))
+    )
+    coeffs = np.where(
+        first[..., np.newaxis],
+        np.asarray(coeffs_poly1, dtype=float),
+        np.asarray(coeffs_poly2, dtype=float),
+    )
+
+    return np.where(in_range[..., np.newaxis], coeffs, np.nan)
+
+
+def get_heat_capacity(coeffs, temps):
+    "Heat capacity (J/mol/K)"
+    temps = np.asarray(temps, dtype=float)
+    c1, c2, c3, c4, c5, _, _ = np.moveaxis(coeffs, -1, 0)
+    return (c1 + temps * (c2 + temps * (c3 + temps * (c4 + c5 * temps)))) * gas_constant
+
+
+def get_enthalpy(coeffs, temps):
+    "Enthalpy (J/mol)"
+    temps = np.asarray(temps, dtype=float)
+    c1, c2, c3, c4, c5, c6, _ = np.moveaxis(coeffs, -1, 0)
+    temps2 = temps * temps
+    return (
+        c1 * temps
+        + c2 * temps2 / 2.0
+        + c3 * temps2 * temps / 3.0
+        + c4 * temps2 * temps2 / 4.0
+        + c5 * temps2 * temps2 * temps / 5.0
+        + c6
+    ) * gas_constant
+
+
+def get_entropy(coeffs, temps):
+    "Entropy (J/mol/K)"
+    temps = np.asarray(temps, dtype=float)
+    c1, c2, c3, c4, c5, _, c7 = np.moveaxis(coeffs, -1, 0)
+    temps2 = temps * temps
+    return (
+        c1 * np.log(temps)
+        + c2 * temps
+        + c3 * temps2 / 2.0
+        + c4 * temps2 * temps / 3.0
+        + c5 * temps2 * temps2 / 4.0
+        + c7
+    ) * gas_constant
+
+
+def get_free_energy(coeffs, temps):
+    "Gibbs Free Energy (J/mol)"
+    temps = np.asarray(temps, dtype=float)
+    return get_enthalpy(coeffs, temps) - temps * get_entropy(coeffs, temps)
+
+
+def get_thermo_properties(thermos, temps):
+    """
+    Evaluate the heat capacity, enthalpy, entropy and free energy of many Thermo entries at once.
+
+    `thermos` are Thermo objects or dicts of their `POLYNOMIAL_FIELDS`,
+    eg. from `Thermo.objects.values(*POLYNOMIAL_FIELDS)`.
+    Each property is an array indexed by Thermo entry, then like `temps`,
+    which is NaN at temperatures outside the bounds of the entry.
+    """
+
+    temps = np.asarray(temps, dtype=float)
+    rows = [
+        (
+            [row[f] for f in POLYNOMIAL_FIELDS]
+            if isinstance(row, dict)
+            else [getattr(row, f) for f in POLYNOMIAL_FIELDS]
+        )
+        for row in thermos
+    ]
+    shape = (len(rows),) + (1,) * temps.ndim
+    coeffs_poly1, coeffs_poly2, temp_min_1, temp_max_1, temp_max_2 = (
+        np.array([row[i] for row in rows], dtype=float) for i in range(len(POLYNOMIAL_FIELDS))
+    )
+    coeffs = select_polynomials(
+        temps,
+        coeffs_poly1.reshape(shape + (7,)),
+        coeffs_poly2.reshape(shape + (7,)),
+        temp_min_1.reshape(shape),
+        temp_max_1.reshape(shape),
+        temp_max_2.reshape(shape),
+    )
+
+    return {
+        "heat_capacity": get_heat_capacity(coeffs, temps),
+        "enthalpy": get_enthalpy(coeffs, temps),
+        "entropy": get_entropy(coeffs, temps),
+        "free_energy": get_free_energy(coeffs, temps),
+    }
+
+
+def get_thermo_summaries(thermos):
+    """
+    Get the values of the `SUMMARY_FIELDS` of Thermo entries (see `get_thermo_properties`),
+    which are None at temperatures outside the bounds of an entry
+    """
+
+    temps = np.array([298.15] + HEAT_CAPACITY_TEMPS)
+    properties = get_thermo_properties(thermos, temps)
+
+    def to_python(values):
+        return [None if np.isnan(value) else float(value) for value in values]
+
+    return [
+        {
+            "enthalpy298": to_python(enthalpies[:1])[0],
+            "entropy298": to_python(entropies[:1])[0],
+            "heat_capacities": to_python(heat_capacities[1:]),
+        }
+        for enthalpies, entropies, heat_capacities in zip(
+            properties["enthalpy"], properties["entropy"], properties["heat_capacity"]
+        )
+    ]
+
 
 class Thermo(models.Model):
     source = models.ForeignKey("Source", null=True, on_delete=models.CASCADE)
@@ -25,82 +165,75 @@ class Thermo(models.Model):
     temp_max_1 = models.FloatField("Polynomial 1 Upper Temp Bound", help_text="units: K")
     temp_min_2 = models.FloatField("Polynomial 2 Lower Temp Bound", help_text="units: K")
     temp_max_2 = models.FloatField("Polynomial 2 Upper Temp Bound", help_text="units: K")
+    # Computed from the polynomials on save, for sorting and filtering in SQL
+    enthalpy298 = models.FloatField(
+        "Enthalpy (298 K)", help_text="units: J/mol", null=True, db_index=True
+    )
+    entropy298 = models.FloatField(
+        "Entropy (298 K)", help_text="units: J/mol/K", null=True, db_index=True
+    )
+    heat_capacities = ArrayField(
+        models.FloatField(null=True),
+        verbose_name="Heat Capacities",
+        help_text=f"units: J/mol/K, at {', '.join(f'{t:g}' for t in HEAT_CAPACITY_TEMPS)} K",
+        size=len(HEAT_CAPACITY_TEMPS),
+        null=True,
+    )
 
     class Meta:
         verbose_name_plural = "Thermodynamics"
 
+    def save(self, *args, **kwargs):
+        self.update_summary()
+        super().save(*args, **kwargs)
+
+    def update_summary(self):
+        "Compute the `SUMMARY_FIELDS` from the polynomials"
+        for field, value in get_thermo_summaries([self])[0].items():
+            setattr(self, field, value)
+
     def heat_capacity(self, temp):
-        "Heat capacity (J/mol/K) at specified temperature (K)"
-        c1, c2, c3, c4, c5, _, _ = self._select_polynomial(temp)
-        return (c1 + temp * (c2 + temp * (c3 + temp * (c4 + c5 * temp)))) * gas_constant
+        "Heat capacity (J/mol/K) at specified temperature(s) (K)"
+        return get_heat_capacity(self._select_polynomial(temp), temp)
 
     def enthalpy(self, temp):
-        "Enthalpy (J/mol) at specified temperature (K)"
-        c1, c2, c3, c4, c5, c6, _ = self._select_polynomial(temp)
-        temp2 = temp * temp
-        return (
-            c1 * temp
-            + c2 * temp2 / 2.0
-            + c3 * temp2 * temp / 3.0
-            + c4 * temp2 * temp2 / 4.0
-            + c5 * temp2 * temp2 * temp / 5.0
-            + c6
-        ) * gas_constant
-
-    @property
-    def enthalpy298(self):
-        "Enthalpy (J/mol) at 298.15 K"
-        return self.enthalpy(298.15)
+        "Enthalpy (J/mol) at specified temperature(s) (K)"
+        return get_enthalpy(self._select_polynomial(temp), temp)
 
     def entropy(self, temp):
-        "Entropy (J/mol/K) at specified temperature (K)"
-        c1, c2, c3, c4, c5, _, c7 = self._select_polynomial(temp)
-        temp2 = temp * temp
-        return (
-            c1 * log(temp)
-            + c2 * temp
-            + c3 * temp2 / 2.0
-            + c4 * temp2 * temp / 3.0
-            + c5 * temp2 * temp2 / 4.0
-            + c7
-        ) * gas_constant
-
-    @property
-    def entropy298(self):
-        "Entropy (J/mol/K) at 298.15 K"
-        return self.entropy(298.15)
-
-    def free_energy(self, temp, poly_num):
-        "Gibbs Free Energy (J/mol) at specified temperature (K)"
-        return self.enthalpy(temp) - temp * self.entropy(temp)
+        "Entropy (J/mol/K) at specified temperature(s) (K)"
+        return get_entropy(self._select_polynomial(temp), temp)
+
+    def free_energy(self, temp):
+        "Gibbs Free Energy (J/mol) at specified temperature(s) (K)"
+        return get_free_energy(self._select_polynomial(temp), temp)
 
     def _select_polynomial(self, temperature):
         """
-        Picks the appropriate polynomial for the specified temperature
+        Picks the appropriate polynomial for the specified temperature(s)
         and returns the coefficients.
         """
-        if temperature < self.temp_min_1:
+        temperature = np.asarray(temperature, dtype=float)
+        if (temperature < self.temp_min_1).any():
             raise ValueError(
-                f"Requested temperature {temperature:.0f} K is below "
+                f"Requested temperature {temperature.min():.0f} K is below "
                 f"minimum {self.temp_min_1:.0f} K"
             )
-        elif temperature < self.temp_max_1:
-            return self.coeffs_poly1
-        elif temperature < self.temp_max_2:
-            return self.coeffs_poly2
-        else:
+        coeffs = select_polynomials(temperature, *(getattr(self, f) for f in POLYNOMIAL_FIELDS))
+        if np.isnan(coeffs).any():
             raise ValueError(
-                f"Requested temperature {temperature:.0f} K is above "
+                f"Requested temperature {temperature.max():.0f} K is above "
                 f"maximum {self.temp_max_2:.0f} K"
             )
 
+        return coeffs
+
     def __str__(self):
-        return (
-            f"{self.id} "
-            f"Species: {self.species.id} "
-            f"H298: {self.enthalpy298:g} "
-            f"S298: {self.entropy298:g}"
+        h298, s298 = (
+            "N/A" if value is None else f"{value:g}"
+            for value in [self.enthalpy298, self.entropy298]
         )
+        return f"{self.id} Species: {self.species.id} H298: {h298} S298: {s298}"
 
 
 class Transport(models.Model):
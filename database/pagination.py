@@ -0,0 +1,65 @@
+"""
+Keyset Pagination:
+Pages of objects ordered by their primary keys are found with `pk > after` (or `pk < before`)
+and a LIMIT, which is an indexed range scan, instead of an OFFSET that scans every row
+before the page. Every page costs the same however far it is, and there is no COUNT,
+so the pages are linked as first, previous and next instead of by number.
+"""
+
+
+class KeysetPage:
+    """
+    A page of objects, with the keys to pass as `after` or `before` to get the next
+    or the previous page, which are None if there is no such page
+    """
+
+    def __init__(self, object_list, next_key=None, previous_key=None):
+        self.object_list = object_list
+        self.next_key = next_key
+        self.previous_key = previous_key
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_key is not None
+
+    def has_previous(self):
+        return self.previous_key is not None
+
+
+def parse_key(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_keyset_page(queryset, per_page, after=None, before=None):
+    """
+    Get the page of the queryset after or before the given keys (or the first page),
+    with one query
+    """
+
+    after, before = parse_key(after), parse_key(before)
+    if before is not None:
+        objects = list(queryset.filter(pk__lt=before).order_by("-pk")[: per_page + 1])
+        has_previous, has_next = len(objects) > per_page, True
+        objects = objects[:per_page][::-1]
+    else:
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        objects = list(queryset.order_by("pk")[: per_page + 1])
+        has_previous, has_next = after is not None, len(objects) > per_page
+        objects = objects[:per_page]
+    if not objects:
+        return KeysetPage(objects)
+
+    return KeysetPage(
+        objects,
+        next_key=objects[-1].pk if has_next else None,
+        previous_key=objects[0].pk if has_previous else None,
+    )
@@ -0,0 +1,327 @@
+import warnings
+from collections import defaultdict
+
+import numpy as np
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from rmgpy.constants import R
+
+from database.caching import CACHE_TIMEOUT, get_cache_key, get_grid_digest, invalidate_cache
+from database.models import Kinetics, KineticsComment
+from database.models.kinetic_data import validate_kinetics_data
+
+"""
+Batch Rate Evaluation:
+Evaluates the rate coefficients of every kinetics entry of a kinetic model on a grid of
+temperatures (and pressures) at once. The parameters of the Arrhenius family (Arrhenius,
+MultiArrhenius, ThirdBody, Lindemann and Troe) are read straight from the raw data into
+contiguous arrays, so each of these families is evaluated in a single vectorized pass.
+The other kinetics types fall back to their own `get_rate_coefficient`, except ArrheniusEP
+(Evans-Polanyi) kinetics, which depend on the reaction enthalpy that isn't stored with
+the kinetics, so their rate coefficients are NaN.
+
+The rate coefficients of the kinetics of a reaction from different kinetic models can be
+compared on a shared grid, with their spread. The comparisons are cached per reaction and grid,
+in the cache shared by every process. Saving or deleting kinetics, their comments or kinetic
+models invalidates them, and so does the RMG-models import when it finishes, since bulk
+inserts don't send these signals.
+"""
+
+KINETICS_FIELDS = ["id", "reaction_id", "reverse", "raw_data"]
+BOUND_FIELDS = ["min_temp", "max_temp", "min_pressure", "max_pressure"]
+DEFAULT_TEMPS = [300.0, 400.0, 500.0, 600.0, 800.0, 1000.0, 1500.0, 2000.0]
+
+
+class RateCoefficients:
+    """
+    The rate coefficients (SI units) of a list of kinetics on a grid of conditions.
+
+    `values[i]` holds the rate coefficients of the kinetics `kinetics_ids[i]` of the reaction
+    `reaction_ids[i]`, indexed by temperature, then by pressure if pressures were given.
+    `reverse[i]` tells whether they are for the reverse direction of the reaction.
+    Rate coefficients that can't be evaluated at these conditions
+    (eg. of pressure dependent kinetics without pressures) or at all (ArrheniusEP) are NaN.
+    """
+
+    def __init__(self, kinetics_ids, reaction_ids, reverse, temps, pressures, values):
+        self.kinetics_ids = kinetics_ids
+        self.reaction_ids = reaction_ids
+        self.reverse = reverse
+        self.temps = temps
+        self.pressures = pressures
+        self.values = values
+
+    def __len__(self):
+        return len(self.kinetics_ids)
+
+
+def get_kinetic_model_rate_coefficients(kinetic_model, temps, pressures=None):
+    """
+    Evaluate every kinetics entry of the kinetic model on the grid, with a single query
+    """
+
+    rows = (
+        Kinetics.objects.filter(kineticscomment__kinetic_model=kinetic_model)
+        .order_by("id")
+        .distinct()
+        .values(*KINETICS_FIELDS, *BOUND_FIELDS)
+    )
+
+    return get_rate_coefficients(list(rows), temps, pressures)
+
+
+def get_rate_coefficients(rows, temps, pressures=None):
+    """
+    Evaluate the kinetics in `rows`, dicts of the Kinetics fields in `KINETICS_FIELDS`
+    and `BOUND_FIELDS`, on the temperatures (K) and optionally the pressures (Pa)
+    """
+
+    temps = np.asarray(temps, dtype=float).ravel()
+    if pressures is None:
+        grid_temps = temps
+        concentrations = None
+    else:
+        pressures = np.asarray(pressures, dtype=float).ravel()
+        grid_temps = temps[:, np.newaxis]
+        concentrations = pressures[np.newaxis, :] / (R * grid_temps)
+    values = np.full((len(rows),) + np.broadcast(grid_temps, concentrations).shape, np.nan)
+
+    families = {"arrhenius": [], "third_body": [], "falloff": [], "other": []}
+    for index, row in enumerate(rows):
+        kinetics_type = row["raw_data"].get("type")
+        if kinetics_type in ("arrhenius", "multi_arrhenius"):
+            families["arrhenius"].append(index)
+        elif kinetics_type == "third_body":
+            families["third_body"].append(index)
+        elif kinetics_type in ("lindemann", "troe"):
+            families["falloff"].append(index)
+        elif kinetics_type != "arrhenius_ep":
+            families["other"].append(index)
+
+    if families["arrhenius"]:
+        evaluate_arrhenius(rows, families["arrhenius"], grid_temps, values)
+    if concentrations is not None:
+        if families["third_body"]:
+            evaluate_third_body(rows, families["third_body"], grid_temps, concentrations, values)
+        if families["falloff"]:
+            evaluate_falloff(rows, families["falloff"], grid_temps, concentrations, values)
+    for index in families["other"]:
+        row = rows[index]
+        try:
+            data = validate_kinetics_data(row["raw_data"], returns=True)
+            values[index] = data.get_rate_coefficient(
+                grid_temps, pressures, *(row[field] for field in BOUND_FIELDS)
+            )
+        except (ValueError, ValidationError):
+            pass
+
+    return RateCoefficients(
+        kinetics_ids=np.array([row["id"] for row in rows], dtype=int),
+        reaction_ids=np.array([row["reaction_id"] for row in rows], dtype=int),
+        reverse=np.array([row["reverse"] for row in rows], dtype=bool),
+        temps=temps,
+        pressures=pressures,
+        values=values,
+    )
+
+
+def get_reaction_rate_comparisons(reaction_ids, temps, pressures=None):
+    """
+    Compare the rate coefficients of the kinetics of each reaction on a grid (see
+    `compare_rate_coefficients`), taking the comparisons computed before from the cache
+    and computing the others together
+    """
+
+    prefix = get_cache_key("rates", "comparison", get_grid_digest(temps, pressures))
+    keys = {reaction_id: f"{prefix}:{reaction_id}" for reaction_id in reaction_ids}
+    cached = cache.get_many(keys.values())
+    comparisons = {reaction_id: cached[key] for reaction_id, key in keys.items() if key in cached}
+    missing = [reaction_id for reaction_id in keys if reaction_id not in comparisons]
+    if missing:
+        computed = compare_rate_coefficients(missing, temps, pressures)
+        cache.set_many(
+            {keys[reaction_id]: comparison for reaction_id, comparison in computed.items()},
+            CACHE_TIMEOUT,
+        )
+        comparisons.update(computed)
+
+    return comparisons
+
+
+def compare_rate_coefficients(reaction_ids, temps, pressures=None):
+    """
+    Evaluate every kinetics entry of the reactions on the grid with two queries,
+    and get a JSON serializable comparison of them for each reaction.
+
+    The spread statistics are across the kinetics in the forward direction, by condition:
+    their count, minimum, maximum and the standard deviation of their log10.
+    Rate coefficients that can't be evaluated are None.
+    """
+
+    rows = list(
+        Kinetics.objects.filter(reaction_id__in=reaction_ids)
+        .order_by("reaction_id", "id")
+        .values(*KINETICS_FIELDS, *BOUND_FIELDS)
+    )
+    model_names = defaultdict(list)
+    for kinetics_id, model_name in (
+        KineticsComment.objects.filter(kinetics__reaction_id__in=reaction_ids)
+        .order_by("kinetic_model__model_name")
+        .values_list("kinetics_id", "kinetic_model__model_name")
+    ):
+        model_names[kinetics_id].append(model_name)
+    rate_coefficients = get_rate_coefficients(rows, temps, pressures)
+
+    indices = defaultdict(list)
+    for index, reaction_id in enumerate(rate_coefficients.reaction_ids.tolist()):
+        indices[reaction_id].append(index)
+    comparisons = {}
+    for reaction_id in reaction_ids:
+        index = indices[reaction_id]
+        forward = [i for i in index if not rate_coefficients.reverse[i]]
+        comparisons[reaction_id] = {
+            "reaction": reaction_id,
+            "temps": rate_coefficients.temps.tolist(),
+            "pressures": (
+                None
+                if rate_coefficients.pressures is None
+                else rate_coefficients.pressures.tolist()
+            ),
+            "kinetics": [
+                {
+                    "id": int(rate_coefficients.kinetics_ids[i]),
+                    "reverse": bool(rate_coefficients.reverse[i]),
+                    "kinetic_models": model_names[int(rate_coefficients.kinetics_ids[i])],
+                    "rate_coefficients": to_json(rate_coefficients.values[i]),
+                }
+                for i in index
+            ],
+            "statistics": {
+                name: to_json(values)
+                for name, values in get_spread_statistics(rate_coefficients.values[forward]).items()
+            },
+        }
+
+    return comparisons
+
+
+def get_spread_statistics(values):
+    """
+    Get the spread of rate coefficients along the first axis, ignoring those that are NaN
+    """
+
+    if not len(values):
+        values = np.full((1,) + values.shape[1:], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_values = np.log10(np.where(values > 0, values, np.nan))
+    count = np.isfinite(log_values).sum(axis=0)
+    with warnings.catch_warnings():
+        # The statistics of conditions without any rate coefficient are NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return {
+            "count": count,
+            "min": 10 ** np.nanmin(log_values, axis=0),
+            "max": 10 ** np.nanmax(log_values, axis=0),
+            "log10_std": np.nanstd(log_values, axis=0),
+        }
+
+
+def to_json(values):
+    """
+    Convert an array to nested lists, with None for the values that aren't finite
+    """
+
+    values = np.asarray(values)
+    if values.dtype.kind in "iub":
+        return values.tolist()
+
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def invalidate_rates_cache(**kwargs):
+    """
+    Invalidate every cached rate comparison, eg. when kinetics change
+    """
+
+    invalidate_cache("rates")
+
+
+def pack_arrhenius(arrhenius_data, ndim):
+    """
+    Pack the parameters of Arrhenius expressions into arrays shaped to broadcast against a grid
+    """
+
+    shape = (len(arrhenius_data),) + (1,) * ndim
+    a, n, e = (
+        np.array([arrhenius[field] for arrhenius in arrhenius_data], dtype=float).reshape(shape)
+        for field in ["a_si", "n", "e_si"]
+    )
+
+    return a, n, e
+
+
+def get_arrhenius_rate_coefficients(arrhenius_data, temps):
+    a, n, e = pack_arrhenius(arrhenius_data, temps.ndim)
+
+    return a * temps**n * np.exp(-e / (R * temps))
+
+
+def evaluate_arrhenius(rows, indices, temps, values):
+    """
+    Arrhenius and MultiArrhenius kinetics, as sums of Arrhenius expressions
+    """
+
+    arrhenius_data = []
+    starts = []
+    for index in indices:
+        raw_data = rows[index]["raw_data"]
+        starts.append(len(arrhenius_data))
+        if raw_data["type"] == "arrhenius":
+            arrhenius_data.append(raw_data)
+        else:
+            arrhenius_data.extend(raw_data["arrhenius_set"])
+
+    rate_coefficients = get_arrhenius_rate_coefficients(arrhenius_data, temps)
+    # Pad with a row of zeros, so that empty arrhenius_sets at the end have a valid start
+    padding = np.zeros((1,) + rate_coefficients.shape[1:])
+    sums = np.add.reduceat(np.concatenate([rate_coefficients, padding]), starts, axis=0)
+    # reduceat gives the sum of an empty arrhenius_set the next expression instead of 0
+    empty = np.diff(starts + [len(arrhenius_data)]) == 0
+    sums[empty] = 0.0
+    values[indices] = sums
+
+
+def evaluate_third_body(rows, indices, temps, concentrations, values):
+    low = get_arrhenius_rate_coefficients(
+        [rows[index]["raw_data"]["low_arrhenius"] for index in indices], temps
+    )
+    values[indices] = low * concentrations
+
+
+def evaluate_falloff(rows, indices, temps, concentrations, values):
+    """
+    Lindemann and Troe kinetics, where Lindemann kinetics have a broadening factor of 1
+    """
+
+    raw_data = [rows[index]["raw_data"] for index in indices]
+    low = get_arrhenius_rate_coefficients([data["low_arrhenius"] for data in raw_data], temps)
+    high = get_arrhenius_rate_coefficients([data["high_arrhenius"] for data in raw_data], temps)
+    reduced_pressures = low * concentrations / high
+
+    shape = (len(raw_data),) + (1,) * temps.ndim
+    troe = np.array([data["type"] == "troe" for data in raw_data]).reshape(shape)
+    alpha, t1, t2, t3 = (
+        np.array([data.get(field) or 0.0 for data in raw_data], dtype=float).reshape(shape)
+        for field in ["alpha", "t1", "t2", "t3"]
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_cent = (1 - alpha) * np.exp(-temps / t3) + alpha * np.exp(-temps / t1)
+        f_cent = f_cent + np.where(t2 != 0, np.exp(-t2 / temps), 0.0)
+        log_f_cent = np.log10(f_cent)
+        c = -0.4 - 0.67 * log_f_cent
+        n = 0.75 - 1.27 * log_f_cent
+        log_reduced_pressures = np.log10(reduced_pressures) + c
+        log_f = log_f_cent / (1 + (log_reduced_pressures / (n - 0.14 * log_reduced_pressures)) ** 2)
+    broadening = np.where(troe, 10**log_f, 1.0)
+
+    values[indices] = high * reduced_pressures / (1 + reduced_pressures) * broadening
@@ -0,0 +1,90 @@
+import io
+import json
+
+from django.db import connection, transaction
+
+
+def is_supported():
+    """
+    COPY is only available on PostgreSQL
+    """
+
+    return connection.vendor == "postgresql"
+
+
+def copy_insert(model, instances):
+    """
+    Insert the instances with PostgreSQL's COPY, skipping any that conflict with a unique column.
+
+    The rows are streamed into a temporary (so unlogged) staging table, then merged into the
+    model's table with a single INSERT ... SELECT ... ON CONFLICT DO NOTHING, in the order
+    they were given. This is what `bulk_create(ignore_conflicts=True)` does, minus the cost
+    of building and sending one large INSERT statement per batch.
+
+    It all runs in a savepoint, so if the COPY or the INSERT fails, rolling it back
+    drops the staging table too.
+    """
+
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    table = connection.ops.quote_name(model._meta.db_table)
+    staging_table = connection.ops.quote_name(f"staging_{model._meta.db_table}")
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+
+    buffer = io.StringIO()
+    for order, instance in enumerate(instances):
+        values = [format_value(getattr(instance, field.attname)) for field in fields]
+        buffer.write(",".join([str(order)] + values) + "\n")
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging_table} AS "
+            f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        cursor.execute(f"ALTER TABLE {staging_table} ADD COLUMN staging_order integer")
+        cursor.copy_expert(
+            f"COPY {staging_table} (staging_order, {columns}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) "
+            f"SELECT {columns} FROM {staging_table} ORDER BY staging_order "
+            f"ON CONFLICT DO NOTHING"
+        )
+        cursor.execute(f"DROP TABLE {staging_table}")
+
+
+def format_value(value):
+    """
+    Format a value as a field of a CSV row for COPY, where an unquoted empty field is NULL
+    """
+
+    if value is None:
+        return ""
+    elif isinstance(value, bool):
+        return "t" if value else "f"
+    elif isinstance(value, (int, float)):
+        return repr(value)
+    elif isinstance(value, (list, tuple)):
+        return quote(format_array(value))
+    elif isinstance(value, dict):
+        return quote(json.dumps(value))
+    else:
+        return quote(str(value))
+
+
+def format_array(values):
+    elements = []
+    for value in values:
+        if value is None:
+            elements.append("NULL")
+        elif isinstance(value, (list, tuple)):
+            elements.append(format_array(value))
+        else:
+            elements.append(repr(value))
+
+    return "{" + ",".join(elements) + "}"
+
+
+def quote(value):
+    return '"' + value.replace('"', '""') + '"'
@@ -0,0 +1,112 @@
+import os
+import json
+
+import habanero
+
+
+class CrossrefResolver:
+    """
+    Looks up the Crossref metadata of DOIs, asking for a batch of DOIs per request
+    """
+
+    batch_size = 20
+
+    def __init__(self, mailto="kianmehrabani@gmail.com"):
+        self.crossref = habanero.Crossref(mailto=mailto)
+
+    def resolve(self, dois):
+        references = {}
+        dois = list(dois)
+        for start in range(0, len(dois), self.batch_size):
+            end = start + self.batch_size
+            batch = dois[start:end]
+            response = self.crossref.works(filter={"doi": batch}, limit=len(batch))
+            items = {item["DOI"].lower(): item for item in response["message"]["items"]}
+            for doi in batch:
+                references[doi] = items.get(doi.lower())
+
+        return references
+
+
+class FileResolver:
+    """
+    Looks up DOIs in a JSON file mapping each DOI to its Crossref metadata,
+    for importing without network access
+    """
+
+    def __init__(self, path):
+        with open(path, "r") as f:
+            self.references = {doi.lower(): reference for doi, reference in json.load(f).items()}
+
+    def resolve(self, dois):
+        return {doi: self.references.get(doi.lower()) for doi in dois}
+
+
+class CachedResolver:
+    """
+    Caches the metadata found by another resolver in a JSON file, so repeated imports
+    don't have to look up the same DOIs again.
+
+    DOIs that the resolver couldn't find are only remembered until the resolver is discarded,
+    so they are looked up again by the next import.
+    Without a resolver, only the cache is used.
+    Passing an empty path keeps the cache in memory only.
+    """
+
+    def __init__(self, path, resolver=None):
+        self.path = path
+        self.resolver = resolver
+        self.references = {}
+        self.not_found = set()
+        if path:
+            try:
+                with open(path, "r") as f:
+                    self.references = json.load(f)
+            except FileNotFoundError:
+                pass
+        # Caches written by earlier versions kept the DOIs that weren't found
+        self.references = {
+            doi: reference for doi, reference in self.references.items() if reference is not None
+        }
+
+    def resolve(self, dois):
+        missing = list(
+            dict.fromkeys(
+                doi for doi in dois if doi not in self.references and doi not in self.not_found
+            )
+        )
+        if missing and self.resolver is not None:
+            for doi, reference in self.resolver.resolve(missing).items():
+                if reference is None:
+                    self.not_found.add(doi)
+                else:
+                    self.references[doi] = reference
+            self.save()
+
+        return {doi: self.references.get(doi) for doi in dois}
+
+    def save(self):
+        if self.path:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.references, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+def get_doi_resolver():
+    """
+    Get the cached DOI resolver configured by the RMGDOIRESOLVER, RMGDOIFILE
+    and RMGDOICACHE environment variables
+    """
+
+    backend = os.getenv("RMGDOIRESOLVER", "crossref")
+    if backend == "crossref":
+        resolver = CrossrefResolver()
+    elif backend == "file":
+        resolver = FileResolver(os.getenv("RMGDOIFILE", "rmg-dois.json"))
+    elif backend == "none":
+        resolver = None
+    else:
+        raise ValueError(f"Unknown DOI resolver {backend}")
+
+    return CachedResolver(os.getenv("RMGDOICACHE", "rmg-doi-cache.json"), resolver=resolver)
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from django.db import transaction
+
+
+class IdentityCache:
+    """
+    Ids of the Formulas, Isomers, Structures and Species in the database,
+    keyed by their formula, augmented InChI, adjacency list and hash respectively.
+
+    It is preloaded once at the start of an import,
+    so the importer only has to query the database for rows it hasn't seen yet.
+    """
+
+    tables = ["formulas", "isomers", "structures", "species"]
+
+    def __init__(self, models):
+        self.formulas = dict(models.Formula.objects.values_list("formula", "id"))
+        self.isomers = dict(models.Isomer.objects.values_list("inchi", "id"))
+        self.structures = dict(models.Structure.objects.values_list("adjacency_list", "id"))
+        self.species = dict(models.Species.objects.values_list("hash", "id"))
+        self.hits = Counter()
+        self.misses = Counter()
+        self._added = []
+
+    def get(self, table, key):
+        value = getattr(self, table).get(key)
+        if value is None:
+            self.misses[table] += 1
+        else:
+            self.hits[table] += 1
+
+        return value
+
+    def add(self, table, key, value):
+        getattr(self, table)[key] = value
+        if self._added:
+            self._added[-1].append((table, key))
+
+    def get_or_create(self, table, key, create):
+        """
+        Get the cached id for `key`, or call `create` to get or create the row and cache its id
+        """
+
+        value = self.get(table, key)
+        if value is None:
+            value = create()
+            self.add(table, key, value)
+
+        return value
+
+    def partition(self, table, keys):
+        """
+        Split the keys into a dict of the cached ones and their ids and a list of the missing ones
+        """
+
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get(table, key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        return found, missing
+
+    @contextmanager
+    def atomic(self):
+        """
+        A `transaction.atomic` block that forgets the ids cached inside it if it is rolled back
+        """
+
+        added = []
+        self._added.append(added)
+        try:
+            with transaction.atomic():
+                yield
+        except Exception:
+            for table, key in added:
+                getattr(self, table).pop(key, None)
+            raise
+        finally:
+            self._added.pop()
+
+        if self._added:
+            self._added[-1].extend(added)
+
+    def log_summary(self, logger):
+        for table in self.tables:
+            logger.info(
+                f"Identity cache for {table}: "
+                f"{self.hits[table]} hits, {self.misses[table]} misses, "
+                f"{len(getattr(self, table))} cached"
+            )
+
+
+class CanonicalizationCache:
+    """
+    A persistent cache of the identifiers of RMG molecules, keyed by their adjacency list.
+
+    Getting the SMILES and augmented InChI of a molecule is the most expensive part of parsing
+    the RMG libraries, so these are stored in a SQLite file that is shared between worker
+    processes and reused by later imports. Each process opens its own connection lazily.
+    The cache is emptied if it was written by a different version of RMG-Py.
+    Passing an empty path disables the on-disk cache.
+    """
+
+    columns = ["adjacency_list", "formula", "smiles", "inchi", "multiplicity"]
+
+    def __init__(self, path, version=""):
+        self.version = version
+        self.open(path)
+
+    def open(self, path):
+        """
+        Use the SQLite file at `path` from now on, forgetting the molecules cached in memory
+        """
+
+        self.path = path
+        self.molecules = {}
+        self.pending = []
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            with self._connection as connection:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS molecules "
+                    "(adjacency_list TEXT PRIMARY KEY, formula TEXT, smiles TEXT, inchi TEXT, "
+                    "multiplicity INTEGER)"
+                )
+                row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                if row is None or row[0] != self.version:
+                    connection.execute("DELETE FROM molecules")
+                    connection.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                        (self.version,),
+                    )
+
+        return self._connection
+
+    def get(self, adjacency_list):
+        molecule = self.molecules.get(adjacency_list)
+        if molecule is None and self.path:
+            row = self.connection.execute(
+                f"SELECT {', '.join(self.columns)} FROM molecules WHERE adjacency_list = ?",
+                (adjacency_list,),
+            ).fetchone()
+            if row is not None:
+                molecule = SimpleNamespace(**dict(zip(self.columns, row)))
+                self.molecules[adjacency_list] = molecule
+
+        return molecule
+
+    def add(self, molecule):
+        self.molecules[molecule.adjacency_list] = molecule
+        if self.path:
+            self.pending.append(tuple(getattr(molecule, column) for column in self.columns))
+
+    def commit(self):
+        """
+        Write the molecules added since the last commit to the SQLite file
+        """
+
+        if self.path and self.pending:
+            with self.connection as connection:
+                connection.executemany(
+                    f"INSERT OR IGNORE INTO molecules ({', '.join(self.columns)}) "
+                    f"VALUES ({', '.join('?' for _ in self.columns)})",
+                    self.pending,
+                )
+            self.pending = []
@@ -1,20 +1,38 @@
 import os
 import re
+import json
 import logging
 import hashlib
+import multiprocessing
+import traceback
+import time
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 from types import SimpleNamespace
 
-import habanero
+import rmgpy
 from django.db import transaction, IntegrityError
+from django.db.models import Q
 from dateutil import parser
 from rmgpy import kinetics, constants
 from rmgpy.data.kinetics.library import KineticsLibrary
 from rmgpy.data.thermo import ThermoLibrary
 from rmgpy.thermo import NASA, ThermoData, Wilhoit, NASAPolynomial
 
+from database.caching import invalidate_cache
 from database.models import kinetic_data as kd
+from database.models.reaction_species import (
+    update_reaction_counts,
+    update_reaction_equations,
+    update_species_formulas,
+)
+from database.models.thermo_transport import get_thermo_summaries
+from database.scripts.import_cache import IdentityCache, CanonicalizationCache
+from database.scripts.doi_resolvers import get_doi_resolver
+from database.scripts import copy_loader
+from database.scripts.import_stats import ImportStats, write_summary
+from database.scripts.import_state import ImportState, LibraryProgress, get_files_digest
 
 
 """
@@ -55,63 +73,376 @@ handler.setFormatter(
 )
 logger.addHandler(handler)
 
+canonicalization_cache = CanonicalizationCache(
+    os.getenv("RMGIMPORTCANONCACHE", "rmg-canonicalization.sqlite3"), version=rmgpy.__version__
+)
+# Recorded while parsing a kinetic model, possibly in a worker process, and sent along with it
+parse_stats = ImportStats()
+
+
+class ParseError(Exception):
+    """
+    Raised when importing something that failed to parse, carrying the parser's traceback
+    """
+
+
+def safe_import(func, *args, error_message=None, atomic=transaction.atomic, **kwargs):
+    """
+    Call the function in a transaction, logging and rolling back any error
+
+    Returns whether the function succeeded.
+    """
 
-def safe_import(func, *args, error_message=None, **kwargs):
     try:
-        with transaction.atomic():
+        with atomic():
             func(*args, **kwargs)
+        return True
     except Exception:
         message = error_message or f"Failed to execute {func.__name__}"
         logger.exception(message)
+        return False
 
 
-def import_rmg_models(apps, schema_editor):
-    model_names = [
-        "KineticModel",
-        "Source",
-        "Author",
-        "Authorship",
-        "Thermo",
-        "ThermoComment",
-        "Species",
-        "Formula",
-        "Isomer",
-        "Structure",
-        "SpeciesName",
-        "Efficiency",
-        "Kinetics",
-        "KineticsComment",
-        "Reaction",
-        "Stoichiometry",
-    ]
-    models = SimpleNamespace()
+LIBRARIES = ["source", "thermo", "kinetics"]
+IMPORT_BATCH_SIZE = int(os.getenv("RMGIMPORTBATCHSIZE", 5000))
+
+
+def import_rmg_models(apps, schema_editor, path=None, workers=None, incremental=False, resume=True):
+    """
+    Import every kinetic model in RMG-models
+
+    The time spent, entries processed and queries made in each stage are appended as JSON lines
+    to the RMGIMPORTSTATS file, one line per kinetic model and one for the whole run.
+
+    In incremental mode, only the libraries whose files changed since they were
+    last imported successfully are imported again, and unchanged models are skipped entirely.
+
+    The libraries are committed in batches of entries, and the import state keeps a checkpoint
+    of the committed batches until the import finishes. If a previous import didn't finish,
+    it is resumed from its checkpoint unless `resume` is False.
+    """
+
+    start = time.perf_counter()
     logger.info(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    for name in model_names:
-        setattr(models, name, apps.get_model("database", name))
-    path = os.getenv("RMGMODELSPATH", "./rmg-models/")
+    path = path or os.getenv("RMGMODELSPATH", "./rmg-models/")
+    workers = workers or int(os.getenv("RMGIMPORTWORKERS", 1))
     skip_list = ["PCI2011/193-Mehl"]
     model_paths = get_models(path, skip_list)
+    state = ImportState(os.getenv("RMGIMPORTSTATE", "rmg-import-state.json"))
+    if resume and state.has_checkpoint():
+        logger.info(
+            f"Resuming import from checkpoint, "
+            f"{len(state.checkpoint['completed'])} kinetic models already completed"
+        )
+    else:
+        state.clear_checkpoint()
+    models = get_import_models(apps)
+    # The kinetic models completed before the checkpoint were imported by a run that stopped
+    # before it updated the counts and equations of their reactions
+    models.kinetics_model_ids.update(
+        models.KineticModel.objects.filter(
+            model_name__in=state.checkpoint["completed"]
+        ).values_list("id", flat=True)
+    )
+    jobs = []
+    for job in get_import_jobs(model_paths, state, models, incremental=incremental):
+        if state.is_completed(job.name):
+            logger.info(f"Skipping kinetic model {job.name} completed before the checkpoint")
+        else:
+            jobs.append(job)
+    stats_path = os.getenv("RMGIMPORTSTATS", "rmg-import-stats.jsonl")
+    run_stats = ImportStats()
+    models.doi_resolver = get_doi_resolver()
+    with run_stats.time("prefetch_references", entries=len(jobs)):
+        prefetch_references(jobs, models.doi_resolver)
+
+    for kinetic_model_data in parse_kinetic_models(jobs, workers=workers):
+        logger.info(f"IMPORTING KINETIC MODEL: {kinetic_model_data.name}")
+        models.stats = kinetic_model_data.stats
+        with models.stats.time("kinetic_model", entries=1):
+            safe_import(
+                import_kinetic_model, kinetic_model_data, state, models, atomic=nullcontext
+            )
+        summary = {
+            "kinetic_model": kinetic_model_data.name,
+            "seconds": round(models.stats.seconds["kinetic_model"], 3),
+            "stages": models.stats.summary(),
+        }
+        logger.info(f"Import stats: {json.dumps(summary)}")
+        write_summary(stats_path, summary)
+        run_stats.merge(models.stats)
+
+    reactions = models.Reaction.objects.filter(
+        Q(
+            pk__in=models.KineticsComment.objects.filter(
+                kinetic_model_id__in=models.kinetics_model_ids
+            ).values("kinetics__reaction_id")
+        )
+        | Q(pk__in=models.cleared_reaction_ids)
+    )
+    # The counts of the historical model of the import migration are filled in by a later one
+    if has_field(models.Reaction, "kinetics_count") and models.kinetics_model_ids:
+        with run_stats.time("reaction_counts"):
+            update_reaction_counts(reactions)
+    # Only the new species and reactions, whose formulas and equations are still blank
+    if has_field(models.Species, "formula") and (jobs or models.kinetics_model_ids):
+        with run_stats.time("equations"):
+            update_species_formulas(models.Species.objects.filter(formula=""))
+            update_reaction_equations(reactions.filter(equation=""))
+    # The cached equilibria and rates are invalidated here rather than by the callers, so the
+    # import migration does it too
+    invalidate_cache("equilibrium")
+    invalidate_cache("rates")
+    state.clear_checkpoint()
+    transaction.on_commit(state.save)
+    models.cache.log_summary(logger)
+    summary = {
+        "kinetic_model": None,
+        "kinetic_models": len(jobs),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - start, 3),
+        "stages": run_stats.summary(),
+        "identity_cache": {
+            table: {"hits": models.cache.hits[table], "misses": models.cache.misses[table]}
+            for table in models.cache.tables
+        },
+    }
+    logger.info(f"Import stats: {json.dumps(summary)}")
+    write_summary(stats_path, summary)
+
+
+MODEL_NAMES = [
+    "KineticModel",
+    "Source",
+    "Author",
+    "Authorship",
+    "Thermo",
+    "ThermoComment",
+    "Species",
+    "Formula",
+    "Isomer",
+    "Structure",
+    "SpeciesName",
+    "Efficiency",
+    "Kinetics",
+    "KineticsComment",
+    "Reaction",
+    "Stoichiometry",
+]
+
+
+def get_import_models(apps):
+    """
+    Get the models the importer writes to, along with the identity cache and the ids
+    it collects while importing
+    """
+
+    models = SimpleNamespace()
+    for name in MODEL_NAMES:
+        setattr(models, name, apps.get_model("database", name))
+    models.cache = IdentityCache(models)
+    models.stats = ImportStats()
+    # The reactions whose counts and equations are updated at the end are those of the kinetic
+    # models whose kinetics library was imported, and those whose kinetics were cleared
+    models.kinetics_model_ids = set()
+    models.cleared_reaction_ids = set()
 
+    return models
+
+
+def get_import_jobs(model_paths, state, models, incremental=False):
+    """
+    Get the kinetic models to import along with which of their libraries to import
+    """
+
+    existing_model_names = set(models.KineticModel.objects.values_list("model_name", flat=True))
     for rmg_model_name, thermo_path, kinetics_path, source_path in model_paths:
-        logger.info(f"IMPORTING KINETIC MODEL: {rmg_model_name}")
-        safe_import(
-            import_kinetic_model, rmg_model_name, thermo_path, kinetics_path, source_path, models
-        )
+        dictionary_path = os.path.join(os.path.dirname(kinetics_path), "dictionary.txt")
+        digests = {
+            "source": get_files_digest(source_path),
+            "thermo": get_files_digest(thermo_path),
+            "kinetics": get_files_digest(kinetics_path, dictionary_path),
+        }
+        if incremental and rmg_model_name in existing_model_names:
+            libraries = [
+                library
+                for library in LIBRARIES
+                if state.get_digest(rmg_model_name, library) != digests[library]
+            ]
+        else:
+            libraries = LIBRARIES
+
+        if libraries:
+            yield SimpleNamespace(
+                name=rmg_model_name,
+                thermo_path=thermo_path,
+                kinetics_path=kinetics_path,
+                source_path=source_path,
+                libraries=libraries,
+                digests=digests,
+            )
+        else:
+            logger.info(f"Skipping unchanged kinetic model {rmg_model_name}")
 
 
-def import_kinetic_model(rmg_model_name, thermo_path, kinetics_path, source_path, models):
-    now = datetime.now()
-    kinetic_model = models.KineticModel.objects.create(
-        model_name=rmg_model_name, info=f"Imported via RMG-models migration at {now.isoformat()}"
+def prefetch_references(jobs, doi_resolver):
+    """
+    Look up the DOIs of the sources to import all at once, so they can be looked up in batches
+    """
+
+    dois = []
+    for job in jobs:
+        if "source" in job.libraries:
+            try:
+                dois.append(get_doi(job.source_path))
+            except (FileNotFoundError, ValueError):
+                pass
+
+    try:
+        doi_resolver.resolve(dois)
+    except Exception:
+        logger.exception(f"Failed to look up {len(dois)} DOIs, looking them up one at a time")
+
+
+def parse_kinetic_models(jobs, workers=1):
+    """
+    Parse the libraries of every kinetic model in `jobs`, yielding them in the same order.
+
+    With more than one worker the parsing is done in a pool of forked processes,
+    so the caller can write one model to the database while the next ones are being parsed.
+    Results are yielded in order, so the database ends up the same as with a serial import.
+    """
+
+    if workers <= 1:
+        yield from map(parse_kinetic_model, jobs)
+    else:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            yield from pool.imap(parse_kinetic_model, jobs)
+
+
+def parse_kinetic_model(job):
+    """
+    Load the thermo and kinetics libraries of a kinetic model into plain (picklable) data.
+
+    This doesn't touch the database, so it can run in a worker process.
+    """
+
+    return SimpleNamespace(
+        name=job.name,
+        libraries=job.libraries,
+        digests=job.digests,
+        paths={
+            "source": job.source_path,
+            "thermo": job.thermo_path,
+            "kinetics": job.kinetics_path,
+        },
+        source=job.source_path,
+        thermo=parse_library(parse_thermo_library, job.thermo_path, job.name)
+        if "thermo" in job.libraries
+        else None,
+        kinetics=parse_library(parse_kinetics_library, job.kinetics_path, job.name)
+        if "kinetics" in job.libraries
+        else None,
+        stats=parse_stats.pop(),
     )
 
+
+def parse_library(func, path, label):
+    with parse_stats.time(func.__name__) as stage:
+        try:
+            entries = func(path, label)
+            error = None
+        except Exception:
+            entries = []
+            error = traceback.format_exc()
+        canonicalization_cache.commit()
+        stage.entries = len(entries)
+
+    return SimpleNamespace(path=path, entries=entries, error=error)
+
+
+def import_kinetic_model(kinetic_model_data, state, models):
+    now = datetime.now()
+    kinetic_model, created = models.KineticModel.objects.get_or_create(
+        model_name=kinetic_model_data.name
+    )
+    kinetic_model.info = f"Imported via RMG-models migration at {now.isoformat()}"
     kinetic_model.save()
-    logger.info(f"Importing Source {source_path}")
-    safe_import(import_source, source_path, kinetic_model, models)
-    logger.info(f"Importing Thermo Library {thermo_path}")
-    safe_import(import_thermo, thermo_path, kinetic_model, models)
-    logger.info(f"Importing Kinetics Library {kinetics_path}")
-    safe_import(import_kinetics, kinetics_path, kinetic_model, models)
+
+    library_importers = [
+        ("source", "Source", import_source),
+        ("thermo", "Thermo Library", import_thermo),
+        ("kinetics", "Kinetics Library", import_kinetics),
+    ]
+    for library, library_name, importer in library_importers:
+        if library not in kinetic_model_data.libraries:
+            continue
+        logger.info(f"Importing {library_name} {kinetic_model_data.paths[library]}")
+        digest = kinetic_model_data.digests[library]
+        progress = LibraryProgress(state, kinetic_model.model_name, library, digest)
+        imported = safe_import(
+            import_library,
+            library,
+            importer,
+            getattr(kinetic_model_data, library),
+            kinetic_model,
+            progress,
+            models,
+            clear=not created and not progress.done,
+            error_message=f"Failed to execute {importer.__name__}",
+            atomic=nullcontext,
+        )
+        if imported:
+            state.set_digest(kinetic_model.model_name, library, digest)
+
+    state.complete_model(kinetic_model.model_name)
+    transaction.on_commit(state.save)
+
+
+def import_library(library, importer, library_data, kinetic_model, progress, models, clear=False):
+    """
+    Import a library of a kinetic model, clearing what a previous import linked to it first.
+
+    The source is imported in a single transaction, while the thermo and kinetics libraries
+    are committed in batches so their import can be resumed from the last checkpoint.
+    """
+
+    if library == "kinetics":
+        models.kinetics_model_ids.add(kinetic_model.id)
+    if clear:
+        with models.cache.atomic():
+            clear_library(library, kinetic_model, models)
+    if library == "source":
+        with models.stats.time("source", entries=1), models.cache.atomic():
+            importer(library_data, kinetic_model, models)
+    else:
+        importer(library_data, kinetic_model, progress, models)
+
+
+def clear_library(library, kinetic_model, models):
+    """
+    Remove what a previous import of the library linked to the kinetic model,
+    so it can be imported again
+    """
+
+    if library == "source":
+        kinetic_model.source = None
+        kinetic_model.save()
+    elif library == "thermo":
+        comments = models.ThermoComment.objects.filter(kinetic_model=kinetic_model)
+        thermo_ids = set(comments.values_list("thermo_id", flat=True))
+        comments.delete()
+        # Thermo no other model comments on would be left over, since the new import makes its own
+        models.Thermo.objects.filter(pk__in=thermo_ids, thermocomment__isnull=True).delete()
+        models.SpeciesName.objects.filter(kinetic_model=kinetic_model).exclude(name="").delete()
+    elif library == "kinetics":
+        comments = models.KineticsComment.objects.filter(kinetic_model=kinetic_model)
+        kinetics_ids = set(comments.values_list("kinetics_id", flat=True))
+        models.cleared_reaction_ids.update(comments.values_list("kinetics__reaction_id", flat=True))
+        comments.delete()
+        # Their efficiencies are deleted with them
+        models.Kinetics.objects.filter(pk__in=kinetics_ids, kineticscomment__isnull=True).delete()
+        models.SpeciesName.objects.filter(kinetic_model=kinetic_model, name="").delete()
 
 
 def safe_save(instance):
@@ -132,26 +463,70 @@ def get_species_hash(isomers):
     return hashlib.md5(bytes(isomer_fingerprint, "UTF-8")).hexdigest()
 
 
+def parse_molecule(molecule):
+    """
+    Get the identifiers of an RMG molecule needed to create its Formula, Isomer and Structure
+
+    These are looked up by adjacency list in the canonicalization cache when possible,
+    since generating SMILES and InChIs is expensive.
+    """
+
+    adjacency_list = molecule.to_adjacency_list()
+    molecule_data = canonicalization_cache.get(adjacency_list)
+    if molecule_data is None:
+        with parse_stats.time("molecule_conversion", entries=1):
+            molecule_data = SimpleNamespace(
+                formula=molecule.get_formula(),
+                smiles=molecule.to_smiles(),
+                inchi=molecule.to_augmented_inchi(),
+                adjacency_list=adjacency_list,
+                multiplicity=molecule.multiplicity,
+            )
+        canonicalization_cache.add(molecule_data)
+
+    return molecule_data
+
+
 def get_or_create_species(kinetic_model, name, molecules, models):
-    formula = molecules[0].get_formula()
-    formula_obj, _ = models.Formula.objects.get_or_create(formula=formula)
+    cache = models.cache
+    formula = molecules[0].formula
+    formula_id = cache.get_or_create(
+        "formulas",
+        formula,
+        lambda: models.Formula.objects.get_or_create(formula=formula)[0].id,
+    )
     isomers = []
     for molecule in molecules:
-        smiles = molecule.to_smiles()
-        augmented_inchi = molecule.to_augmented_inchi()
-        adjacency_list = molecule.to_adjacency_list()
-        multiplicity = molecule.multiplicity
-        isomer, _ = models.Isomer.objects.get_or_create(inchi=augmented_inchi, formula=formula_obj)
-        isomers.append(isomer)
-        models.Structure.objects.get_or_create(
-            adjacency_list=adjacency_list,
-            defaults={"smiles": smiles, "multiplicity": multiplicity, "isomer": isomer},
+        isomer_id = cache.get_or_create(
+            "isomers",
+            molecule.inchi,
+            lambda: models.Isomer.objects.get_or_create(
+                inchi=molecule.inchi, formula_id=formula_id
+            )[0].id,
+        )
+        isomers.append(models.Isomer(id=isomer_id, inchi=molecule.inchi, formula_id=formula_id))
+        cache.get_or_create(
+            "structures",
+            molecule.adjacency_list,
+            lambda: models.Structure.objects.get_or_create(
+                adjacency_list=molecule.adjacency_list,
+                defaults={
+                    "smiles": molecule.smiles,
+                    "multiplicity": molecule.multiplicity,
+                    "isomer_id": isomer_id,
+                },
+            )[0].id,
         )
 
     species_hash = get_species_hash(isomers)
-    species, species_created = models.Species.objects.get_or_create(hash=species_hash)
-    if species_created:
-        species.isomers.add(*isomers)
+    species_id = cache.get("species", species_hash)
+    if species_id is None:
+        species, species_created = models.Species.objects.get_or_create(hash=species_hash)
+        if species_created:
+            species.isomers.add(*isomers)
+        cache.add("species", species_hash, species.id)
+    else:
+        species = models.Species(id=species_id, hash=species_hash)
 
     models.SpeciesName.objects.get_or_create(
         name=name, species=species, kinetic_model=kinetic_model
@@ -168,37 +543,54 @@ def get_reaction_hash(stoich_data):
     return hashlib.md5(bytes(reaction_fingerprint, "UTF-8")).hexdigest()
 
 
-def get_or_create_reaction(kinetic_model, rmg_reaction, models):
+def parse_reaction(rmg_reaction):
     """
-    Create and save a reaction from an RMG reaction
-
-    The kinetic model argument is needed to create species that are not yet in the database.
-    If a reaction already exists, it is looked up and returned.
-    The uniqueness of a reaction consists of a set of species
-    and respective stoichiometric coefficients.
+    Get the species of an RMG reaction along with their reactant and product coefficients
     """
 
-    reversible = rmg_reaction.reversible
     reactants = rmg_reaction.reactants
     products = rmg_reaction.products
     reaction_species = [*reactants, *products]
-    stoich_data = []
     species_map = {}
     for s in reaction_species:
         name = s.label
         if species_map.get(name) is None:
             species_map[name] = s
 
-    with transaction.atomic():
-        for rmg_species in species_map.values():
+    return SimpleNamespace(
+        reversible=rmg_reaction.reversible,
+        species=[
+            SimpleNamespace(
+                molecules=[parse_molecule(molecule) for molecule in rmg_species.molecule],
+                reactant_coeff=sum(-1 for reactant in reactants if reactant == rmg_species),
+                product_coeff=sum(1 for product in products if product == rmg_species),
+            )
+            for rmg_species in species_map.values()
+        ],
+    )
+
+
+def get_or_create_reaction(kinetic_model, reaction_data, models):
+    """
+    Create and save a reaction from a parsed RMG reaction
+
+    The kinetic model argument is needed to create species that are not yet in the database.
+    If a reaction already exists, it is looked up and returned.
+    The uniqueness of a reaction consists of a set of species
+    and respective stoichiometric coefficients.
+    """
+
+    stoich_data = []
+    with models.cache.atomic():
+        for reaction_species in reaction_data.species:
             species = get_or_create_species(
                 kinetic_model,
                 "",
-                rmg_species.molecule,
+                reaction_species.molecules,
                 models,
             )
-            reactant_coeff = sum(-1 for reactant in reactants if reactant == rmg_species)
-            product_coeff = sum(1 for product in products if product == rmg_species)
+            reactant_coeff = reaction_species.reactant_coeff
+            product_coeff = reaction_species.product_coeff
 
             if reactant_coeff != 0:
                 stoich_data.append((reactant_coeff, species))
@@ -206,7 +598,8 @@ def get_or_create_reaction(kinetic_model, rmg_reaction, models):
                 stoich_data.append((product_coeff, species))
 
         reaction, created = models.Reaction.objects.get_or_create(
-            hash=get_reaction_hash(stoich_data=stoich_data), defaults={"reversible": reversible}
+            hash=get_reaction_hash(stoich_data=stoich_data),
+            defaults={"reversible": reaction_data.reversible},
         )
         if created:
             for stoich_coeff, species in stoich_data:
@@ -264,7 +657,7 @@ def create_pdep_arrhenius(rmg_kinetics_data):
         type="pdep_arrhenius",
         pressure_set=[
             kd.Pressure(arrhenius=create_arrhenius(a), pressure=p)
-            for a, p in zip(rmg_kinetics_data.pressures.value_si, rmg_kinetics_data.arrhenius)
+            for p, a in zip(rmg_kinetics_data.pressures.value_si, rmg_kinetics_data.arrhenius)
         ],
     )
 
@@ -324,9 +717,16 @@ def create_general_kinetics_data(rmg_kinetics_data):
     )
 
 
-def create_and_save_efficiencies(kinetic_model, kinetics_instance, rmg_kinetics_data, models):
-    for rmg_molecule, efficiency in rmg_kinetics_data.efficiencies.items():
-        species = get_or_create_species(kinetic_model, "", [rmg_molecule], models)
+def parse_efficiencies(rmg_kinetics_data):
+    return [
+        (parse_molecule(rmg_molecule), efficiency)
+        for rmg_molecule, efficiency in rmg_kinetics_data.efficiencies.items()
+    ]
+
+
+def create_and_save_efficiencies(kinetic_model, kinetics_instance, efficiencies, models):
+    for molecule, efficiency in efficiencies:
+        species = get_or_create_species(kinetic_model, "", [molecule], models)
         efficiency = models.Efficiency.objects.create(
             species=species, kinetics=kinetics_instance, efficiency=efficiency
         )
@@ -352,7 +752,7 @@ def get_base_kinetics_data_fields(rmg_kinetics_data):
     )
 
 
-def create_kinetics_data(kinetic_model, rmg_kinetics_data, models):
+def create_kinetics_data(rmg_kinetics_data):
     kinetics_factory = {
         "KineticsData": create_general_kinetics_data,
         "Arrhenius": create_arrhenius,
@@ -371,7 +771,7 @@ def create_kinetics_data(kinetic_model, rmg_kinetics_data, models):
     return kinetics_data
 
 
-def import_kinetics(kinetics_path, kinetic_model, models):
+def parse_kinetics_library(kinetics_path, label):
     local_context = {
         "KineticsData": kinetics.KineticsData,
         "Arrhenius": kinetics.Arrhenius,
@@ -385,74 +785,533 @@ def import_kinetics(kinetics_path, kinetic_model, models):
         "Troe": kinetics.Troe,
         "R": constants.R,
     }
-    library = KineticsLibrary(label=kinetic_model.model_name)
+    library = KineticsLibrary(label=label)
     library.SKIP_DUPLICATES = True
     library.load(kinetics_path, local_context=local_context)
-    for entry in library.entries.values():
-        try:
-            with transaction.atomic():
-                rmg_kinetics_data = entry.data
-                comment = entry.short_desc
-                rmg_reaction = entry.item
-                reaction = get_or_create_reaction(kinetic_model, rmg_reaction, models)
-                kinetics_data = create_kinetics_data(kinetic_model, rmg_kinetics_data, models)
-                base_fields = get_base_kinetics_data_fields(rmg_kinetics_data)
-
-                kinetics_instance, created = models.Kinetics.objects.get_or_create(
-                    reaction=reaction, raw_data=kinetics_data, defaults=base_fields
-                )
-                if created and kinetics_data.get("type") not in [
-                    "arrhenius",
-                    "arrhenius_ep",
-                    "multi_arrhenius",
-                ]:
-                    create_and_save_efficiencies(
-                        kinetic_model, kinetics_instance, rmg_kinetics_data, models
-                    )
-
-                models.KineticsComment.objects.get_or_create(
-                    kinetics=kinetics_instance,
-                    kinetic_model=kinetic_model,
-                    defaults={"comment": comment},
+
+    return [parse_kinetics_entry(entry) for entry in library.entries.values()]
+
+
+def parse_kinetics_entry(entry):
+    entry_data = SimpleNamespace(label=entry.label, error=None)
+    try:
+        rmg_kinetics_data = entry.data
+        entry_data.comment = entry.short_desc
+        entry_data.reaction = parse_reaction(entry.item)
+        entry_data.data = create_kinetics_data(rmg_kinetics_data)
+        entry_data.base_fields = get_base_kinetics_data_fields(rmg_kinetics_data)
+        if entry_data.data.get("type") not in ["arrhenius", "arrhenius_ep", "multi_arrhenius"]:
+            entry_data.efficiencies = parse_efficiencies(rmg_kinetics_data)
+        else:
+            entry_data.efficiencies = []
+    except Exception:
+        entry_data.error = traceback.format_exc()
+
+    return entry_data
+
+
+def import_kinetics(kinetics_library, kinetic_model, progress, models):
+    if kinetics_library.error:
+        raise ParseError(kinetics_library.error)
+
+    entries = []
+    for entry in kinetics_library.entries:
+        if entry.error:
+            logger.error(f"Failed to import reaction {entry.label}\n{entry.error}")
+        else:
+            entries.append(entry)
+
+    with models.stats.time("kinetics", entries=len(entries) - progress.done):
+        import_entries(
+            entries, bulk_import_kinetics, import_kinetics_entry, kinetic_model, progress, models
+        )
+
+
+def import_kinetics_entry(entry, kinetic_model, models):
+    try:
+        with models.cache.atomic():
+            reaction = get_or_create_reaction(kinetic_model, entry.reaction, models)
+            kinetics_instance, created = models.Kinetics.objects.get_or_create(
+                reaction=reaction, raw_data=entry.data, defaults=entry.base_fields
+            )
+            if created:
+                create_and_save_efficiencies(
+                    kinetic_model, kinetics_instance, entry.efficiencies, models
                 )
-        except Exception:
-            logger.exception(f"Failed to import reaction {entry.label}")
+
+            models.KineticsComment.objects.get_or_create(
+                kinetics=kinetics_instance,
+                kinetic_model=kinetic_model,
+                defaults={"comment": entry.comment},
+            )
+    except Exception:
+        logger.exception(f"Failed to import reaction {entry.label}")
 
 
-def import_thermo(thermo_path, kinetic_model, models):
+def parse_thermo_library(thermo_path, label):
     local_context = {
         "ThermoData": ThermoData,
         "Wilhoit": Wilhoit,
         "NASAPolynomial": NASAPolynomial,
         "NASA": NASA,
     }
-    library = ThermoLibrary(label=kinetic_model.model_name)
+    library = ThermoLibrary(label=label)
     # NOTE: In order for this feature to run we have to be on "rmg-py/importer" branch, may require reinstall # noqa: E501
     library.SKIP_DUPLICATES = True
     library.load(thermo_path, local_context=local_context)
-    for species_name, entry in library.entries.items():
-        logger.info(f"Importing Thermo entry for {species_name}")
-        try:
-            species = get_or_create_species(kinetic_model, species_name, [entry.item], models)
-            thermo_data = entry.data
-            poly1, poly2 = thermo_data.polynomials
-            thermo, _ = models.Thermo.objects.get_or_create(
-                species=species,
-                coeffs_poly1=poly1.coeffs.tolist(),
-                coeffs_poly2=poly2.coeffs.tolist(),
-                temp_min_1=poly1.Tmin.value_si,
-                temp_max_1=poly1.Tmax.value_si,
-                temp_min_2=poly2.Tmin.value_si,
-                temp_max_2=poly2.Tmax.value_si,
+
+    return [
+        parse_thermo_entry(species_name, entry) for species_name, entry in library.entries.items()
+    ]
+
+
+def parse_thermo_entry(species_name, entry):
+    """
+    The molecules and the thermo data are parsed separately,
+    so a species is still created for an entry whose thermo data can't be imported
+    """
+
+    entry_data = SimpleNamespace(label=species_name, molecules=None, fields=None, error=None)
+    try:
+        entry_data.molecules = [parse_molecule(entry.item)]
+        poly1, poly2 = entry.data.polynomials
+        entry_data.fields = dict(
+            coeffs_poly1=poly1.coeffs.tolist(),
+            coeffs_poly2=poly2.coeffs.tolist(),
+            temp_min_1=poly1.Tmin.value_si,
+            temp_max_1=poly1.Tmax.value_si,
+            temp_min_2=poly2.Tmin.value_si,
+            temp_max_2=poly2.Tmax.value_si,
+        )
+        entry_data.comment = entry.long_desc or entry.short_desc
+    except Exception:
+        entry_data.error = traceback.format_exc()
+
+    return entry_data
+
+
+def import_thermo(thermo_library, kinetic_model, progress, models):
+    if thermo_library.error:
+        raise ParseError(thermo_library.error)
+
+    entries = []
+    for entry in thermo_library.entries:
+        if entry.error:
+            logger.error(f"Failed to import entry {entry.label}\n{entry.error}")
+        if entry.molecules is not None:
+            entries.append(entry)
+
+    with models.stats.time("thermo", entries=len(entries) - progress.done):
+        import_entries(
+            entries, bulk_import_thermo, import_thermo_entry, kinetic_model, progress, models
+        )
+
+
+def import_thermo_entry(entry, kinetic_model, models):
+    logger.info(f"Importing Thermo entry for {entry.label}")
+    try:
+        with models.cache.atomic():
+            species = get_or_create_species(kinetic_model, entry.label, entry.molecules, models)
+            if entry.fields is not None:
+                thermo, _ = models.Thermo.objects.get_or_create(species=species, **entry.fields)
+                thermo_comment = models.ThermoComment.objects.create(
+                    kinetic_model=kinetic_model, thermo=thermo
+                )
+                thermo_comment.comment = entry.comment or thermo_comment.comment
+                thermo.save()
+                thermo_comment.save()
+    except Exception:
+        logger.exception("Failed to import entry")
+
+
+def import_entries(entries, bulk_import, import_entry, kinetic_model, progress, models):
+    """
+    Import the entries of a library in batches, each committed in its own transaction.
+
+    Each batch is bulk imported, falling back to importing its entries one at a time.
+    The number of entries committed is recorded in the checkpoint after every batch,
+    and the entries committed before the checkpoint are skipped.
+    """
+
+    start = progress.done
+    if start:
+        logger.info(f"Resuming from checkpoint after {start} of {len(entries)} entries")
+    for batch_start in range(start, len(entries), IMPORT_BATCH_SIZE):
+        batch_end = batch_start + IMPORT_BATCH_SIZE
+        batch = entries[batch_start:batch_end]
+        with models.cache.atomic():
+            try:
+                with models.cache.atomic():
+                    bulk_import(batch, kinetic_model, models)
+            except Exception:
+                logger.exception("Failed to bulk import batch, importing entries one at a time")
+                for entry in batch:
+                    import_entry(entry, kinetic_model, models)
+        progress.update(batch_start + len(batch))
+        transaction.on_commit(progress.state.save)
+
+
+"""
+Bulk Import:
+The bulk versions of the importers collect the rows of a whole library per table,
+so that importing a library takes a few queries per table instead of a few per entry.
+Rows are inserted in the order they are first seen in the library,
+so the resulting ids (and therefore the species and reaction hashes) are deterministic.
+"""
+
+BULK_BATCH_SIZE = 1000
+# Inserts of at least this many rows are loaded with COPY on PostgreSQL, 0 disables COPY
+COPY_THRESHOLD = int(os.getenv("RMGIMPORTCOPYTHRESHOLD", 0))
+
+
+def bulk_insert(model, instances):
+    """
+    Insert the instances, skipping any that conflict with a unique column
+    """
+
+    if COPY_THRESHOLD and len(instances) >= COPY_THRESHOLD and copy_loader.is_supported():
+        copy_loader.copy_insert(model, instances)
+    else:
+        model.objects.bulk_create(instances, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+
+def bulk_get_or_create_species(kinetic_model, named_molecules, models):
+    """
+    Bulk version of `get_or_create_species`
+
+    Takes a list of (name, molecules) pairs and returns the ids of their species in the same order
+    """
+
+    cache = models.cache
+    formulas = dict.fromkeys(molecules[0].formula for _, molecules in named_molecules)
+    formula_ids, new_formulas = cache.partition("formulas", formulas)
+    bulk_insert(models.Formula, [models.Formula(formula=formula) for formula in new_formulas])
+    for formula, formula_id in models.Formula.objects.filter(formula__in=new_formulas).values_list(
+        "formula", "id"
+    ):
+        formula_ids[formula] = formula_id
+        cache.add("formulas", formula, formula_id)
+
+    isomer_formula_ids = {}
+    structures = {}
+    for _, molecules in named_molecules:
+        for molecule in molecules:
+            isomer_formula_ids.setdefault(molecule.inchi, formula_ids[molecules[0].formula])
+            structures.setdefault(molecule.adjacency_list, molecule)
+    isomer_ids, new_inchis = cache.partition("isomers", isomer_formula_ids)
+    bulk_insert(
+        models.Isomer,
+        [models.Isomer(inchi=inchi, formula_id=isomer_formula_ids[inchi]) for inchi in new_inchis],
+    )
+    for inchi, isomer_id in models.Isomer.objects.filter(inchi__in=new_inchis).values_list(
+        "inchi", "id"
+    ):
+        isomer_ids[inchi] = isomer_id
+        cache.add("isomers", inchi, isomer_id)
+
+    _, new_adjacency_lists = cache.partition("structures", structures)
+    bulk_insert(
+        models.Structure,
+        [
+            models.Structure(
+                adjacency_list=adjacency_list,
+                smiles=structures[adjacency_list].smiles,
+                multiplicity=structures[adjacency_list].multiplicity,
+                isomer_id=isomer_ids[structures[adjacency_list].inchi],
             )
-            thermo_comment = models.ThermoComment.objects.create(
-                kinetic_model=kinetic_model, thermo=thermo
+            for adjacency_list in new_adjacency_lists
+        ],
+    )
+    for adjacency_list, structure_id in models.Structure.objects.filter(
+        adjacency_list__in=new_adjacency_lists
+    ).values_list("adjacency_list", "id"):
+        cache.add("structures", adjacency_list, structure_id)
+
+    species_hashes = []
+    species_isomer_ids = {}
+    for _, molecules in named_molecules:
+        ids = list(dict.fromkeys(isomer_ids[molecule.inchi] for molecule in molecules))
+        species_hash = get_species_hash([models.Isomer(id=isomer_id) for isomer_id in ids])
+        species_hashes.append(species_hash)
+        species_isomer_ids.setdefault(species_hash, ids)
+    species_ids, uncached_hashes = cache.partition("species", species_isomer_ids)
+    existing_hashes = set(
+        models.Species.objects.filter(hash__in=uncached_hashes).values_list("hash", flat=True)
+    )
+    new_hashes = [h for h in uncached_hashes if h not in existing_hashes]
+    bulk_insert(models.Species, [models.Species(hash=species_hash) for species_hash in new_hashes])
+    for species_hash, species_id in models.Species.objects.filter(
+        hash__in=uncached_hashes
+    ).values_list("hash", "id"):
+        species_ids[species_hash] = species_id
+        cache.add("species", species_hash, species_id)
+    SpeciesIsomer = models.Species.isomers.through
+    bulk_insert(
+        SpeciesIsomer,
+        [
+            SpeciesIsomer(species_id=species_ids[species_hash], isomer_id=isomer_id)
+            for species_hash in new_hashes
+            for isomer_id in species_isomer_ids[species_hash]
+        ],
+    )
+
+    names = dict.fromkeys(
+        (name, species_ids[species_hash])
+        for (name, _), species_hash in zip(named_molecules, species_hashes)
+    )
+    existing_names = set(
+        models.SpeciesName.objects.filter(
+            kinetic_model=kinetic_model, species_id__in=species_ids.values()
+        ).values_list("name", "species_id")
+    )
+    bulk_insert(
+        models.SpeciesName,
+        [
+            models.SpeciesName(name=name, species_id=species_id, kinetic_model=kinetic_model)
+            for name, species_id in names
+            if (name, species_id) not in existing_names
+        ],
+    )
+
+    return [species_ids[species_hash] for species_hash in species_hashes]
+
+
+def bulk_get_or_create_reactions(kinetic_model, reactions_data, models):
+    """
+    Bulk version of `get_or_create_reaction`, returns the ids of the reactions in the same order
+    """
+
+    reaction_species = [species for r in reactions_data for species in r.species]
+    species_ids = iter(
+        bulk_get_or_create_species(
+            kinetic_model, [("", species.molecules) for species in reaction_species], models
+        )
+    )
+
+    reaction_hashes = []
+    reactions = {}
+    for reaction_data in reactions_data:
+        stoich_data = []
+        for reaction_species in reaction_data.species:
+            species = models.Species(id=next(species_ids))
+            if reaction_species.reactant_coeff != 0:
+                stoich_data.append((reaction_species.reactant_coeff, species))
+            if reaction_species.product_coeff != 0:
+                stoich_data.append((reaction_species.product_coeff, species))
+        reaction_hash = get_reaction_hash(stoich_data=stoich_data)
+        reaction_hashes.append(reaction_hash)
+        reactions.setdefault(reaction_hash, (reaction_data.reversible, stoich_data))
+
+    existing_hashes = set(
+        models.Reaction.objects.filter(hash__in=reactions).values_list("hash", flat=True)
+    )
+    new_hashes = [h for h in reactions if h not in existing_hashes]
+    bulk_insert(
+        models.Reaction,
+        [
+            models.Reaction(hash=reaction_hash, reversible=reactions[reaction_hash][0])
+            for reaction_hash in new_hashes
+        ],
+    )
+    reaction_ids = dict(
+        models.Reaction.objects.filter(hash__in=reactions).values_list("hash", "id")
+    )
+    bulk_insert(
+        models.Stoichiometry,
+        [
+            models.Stoichiometry(
+                reaction_id=reaction_ids[reaction_hash], species_id=species.id, coeff=coeff
             )
-            thermo_comment.comment = entry.long_desc or entry.short_desc or thermo_comment.comment
-            thermo.save()
-            thermo_comment.save()
-        except Exception:
-            logger.exception("Failed to import entry")
+            for reaction_hash in new_hashes
+            for coeff, species in reactions[reaction_hash][1]
+        ],
+    )
+
+    return [reaction_ids[reaction_hash] for reaction_hash in reaction_hashes]
+
+
+def get_kinetics_data_key(data):
+    """
+    A hashable key for kinetics raw data that compares like the JSON column does,
+    ie. integers and floats with the same value are equal
+    """
+
+    def normalize(value):
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [normalize(v) for v in value]
+        elif isinstance(value, int) and not isinstance(value, bool):
+            return float(value)
+        else:
+            return value
+
+    return json.dumps(normalize(data), sort_keys=True)
+
+
+def get_kinetics_ids(reaction_ids, models):
+    """
+    Map the (reaction id, raw data key) pairs of the kinetics of the reactions to their ids
+    """
+
+    kinetics = models.Kinetics.objects.filter(reaction_id__in=set(reaction_ids))
+
+    values = kinetics.values_list("id", "reaction_id", "raw_data")
+
+    return {
+        (reaction_id, get_kinetics_data_key(raw_data)): kinetics_id
+        for kinetics_id, reaction_id, raw_data in values
+    }
+
+
+def bulk_import_kinetics(entries, kinetic_model, models):
+    """
+    Bulk version of `import_kinetics_entry` for all entries of a library
+    """
+
+    valid_entries = []
+    for entry in entries:
+        if any(s.reactant_coeff != 0 or s.product_coeff != 0 for s in entry.reaction.species):
+            valid_entries.append(entry)
+        else:
+            logger.error(f"Failed to import reaction {entry.label}: Reaction has no species")
+
+    with models.stats.time("reactions", entries=len(valid_entries)):
+        reaction_ids = bulk_get_or_create_reactions(
+            kinetic_model, [entry.reaction for entry in valid_entries], models
+        )
+    keys = [
+        (reaction_id, get_kinetics_data_key(entry.data))
+        for entry, reaction_id in zip(valid_entries, reaction_ids)
+    ]
+    existing_kinetics_ids = get_kinetics_ids(reaction_ids, models)
+    new_kinetics = {}
+    for key, entry in zip(keys, valid_entries):
+        if key not in existing_kinetics_ids:
+            new_kinetics.setdefault(key, entry)
+    bulk_insert(
+        models.Kinetics,
+        [
+            models.Kinetics(reaction_id=reaction_id, raw_data=entry.data, **entry.base_fields)
+            for (reaction_id, _), entry in new_kinetics.items()
+        ],
+    )
+    kinetics_ids = get_kinetics_ids(reaction_ids, models)
+
+    efficiencies = [
+        (kinetics_ids[key], molecule, efficiency)
+        for key, entry in new_kinetics.items()
+        for molecule, efficiency in entry.efficiencies
+    ]
+    with models.stats.time("species", entries=len(efficiencies)):
+        efficiency_species_ids = bulk_get_or_create_species(
+            kinetic_model, [("", [molecule]) for _, molecule, _ in efficiencies], models
+        )
+    bulk_insert(
+        models.Efficiency,
+        [
+            models.Efficiency(kinetics_id=kinetics_id, species_id=species_id, efficiency=efficiency)
+            for (kinetics_id, _, efficiency), species_id in zip(
+                efficiencies, efficiency_species_ids
+            )
+        ],
+    )
+
+    comments = {}
+    for key, entry in zip(keys, valid_entries):
+        comments.setdefault(kinetics_ids[key], entry.comment)
+    existing_comments = set(
+        models.KineticsComment.objects.filter(
+            kinetic_model=kinetic_model, kinetics_id__in=comments
+        ).values_list("kinetics_id", flat=True)
+    )
+    bulk_insert(
+        models.KineticsComment,
+        [
+            models.KineticsComment(
+                kinetics_id=kinetics_id, kinetic_model=kinetic_model, comment=comment
+            )
+            for kinetics_id, comment in comments.items()
+            if kinetics_id not in existing_comments
+        ],
+    )
+
+
+THERMO_FIELDS = [
+    "coeffs_poly1",
+    "coeffs_poly2",
+    "temp_min_1",
+    "temp_max_1",
+    "temp_min_2",
+    "temp_max_2",
+]
+
+
+def get_thermo_key(species_id, fields):
+    return (
+        species_id,
+        *(tuple(fields[f]) if isinstance(fields[f], list) else fields[f] for f in THERMO_FIELDS),
+    )
+
+
+def has_field(model, name):
+    """
+    Whether the model has the field, which historical models of earlier migrations may not
+    """
+
+    return any(field.name == name for field in model._meta.get_fields())
+
+
+def set_thermo_summaries(thermos, models):
+    """
+    Fill in the fields that `Thermo.save` computes, since `bulk_create` doesn't call it.
+    The historical model of the import migration doesn't have them yet.
+    """
+
+    if not has_field(models.Thermo, "enthalpy298"):
+        return
+    thermos = list(thermos)
+    for thermo, summary in zip(thermos, get_thermo_summaries(thermos)):
+        for field, value in summary.items():
+            setattr(thermo, field, value)
+
+
+def bulk_import_thermo(entries, kinetic_model, models):
+    """
+    Bulk version of `import_thermo_entry` for all entries of a library
+    """
+
+    with models.stats.time("species", entries=len(entries)):
+        species_ids = bulk_get_or_create_species(
+            kinetic_model, [(entry.label, entry.molecules) for entry in entries], models
+        )
+    thermo_entries = [
+        (get_thermo_key(species_id, entry.fields), entry)
+        for entry, species_id in zip(entries, species_ids)
+        if entry.fields is not None
+    ]
+    existing_thermo = models.Thermo.objects.filter(species_id__in=set(species_ids))
+    thermo_ids = {
+        get_thermo_key(fields["species_id"], fields): fields["id"]
+        for fields in existing_thermo.values("id", "species_id", *THERMO_FIELDS)
+    }
+    new_thermo = {}
+    for key, entry in thermo_entries:
+        if key not in thermo_ids:
+            new_thermo.setdefault(key, models.Thermo(species_id=key[0], **entry.fields))
+    set_thermo_summaries(new_thermo.values(), models)
+    models.Thermo.objects.bulk_create(new_thermo.values(), batch_size=BULK_BATCH_SIZE)
+    thermo_ids.update((key, thermo.id) for key, thermo in new_thermo.items())
+
+    models.ThermoComment.objects.bulk_create(
+        [
+            models.ThermoComment(
+                thermo_id=thermo_ids[key], kinetic_model=kinetic_model, comment=entry.comment or ""
+            )
+            for key, entry in thermo_entries
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
 
 
 def create_and_save_authorships(source, author_data, models):
@@ -467,10 +1326,12 @@ def create_and_save_authorships(source, author_data, models):
 
 
 def import_source(source_path, kinetic_model, models):
-    crossref = habanero.Crossref(mailto="kianmehrabani@gmail.com")
     try:
         doi = get_doi(source_path)
-        reference = crossref.works(ids=doi).get("message", "") if doi else {}
+        with models.stats.time("doi_lookup", entries=1):
+            reference = models.doi_resolver.resolve([doi])[doi]
+        if reference is None:
+            raise ValueError(f"Could not look up DOI {doi}")
         created_info = reference.get("created", "")
         date = parser.parse(created_info.get("date-time", "")) if created_info else None
         year = date.year if date else ""
@@ -488,17 +1349,21 @@ def import_source(source_path, kinetic_model, models):
             journal_volume_number=volume_number,
             page_numbers=page_numbers,
         )
-        source, created = models.Source.objects.get_or_create(doi=doi)
-        if created:
+        source, _ = models.Source.objects.get_or_create(doi=doi)
+        # Sources imported before their DOI could be looked up are filled in once it can be
+        blank = not any(getattr(source, k) for k in fields)
+        if blank:
             for k, v in fields.items():
                 setattr(source, k, v)
 
         source.kineticmodel_set.add(kinetic_model)
         source.save()
-        if author_data is not None:
-            create_and_save_authorships(source, author_data, models)
-        else:
+        if not blank:
+            logger.info("Source already imported")
+        elif author_data is None:
             logger.warning("Could not find author data")
+        elif not source.authors.exists():
+            create_and_save_authorships(source, author_data, models)
     except FileNotFoundError:
         logger.warning("source.txt not found")
 
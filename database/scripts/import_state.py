@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+
+
+def get_files_digest(*paths):
+    """
+    Get a digest of the contents of the files, where a missing file counts as an empty one
+    """
+
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(bytes(os.path.basename(path), "UTF-8"))
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            pass
+
+    return digest.hexdigest()
+
+
+class ImportState:
+    """
+    What has been imported from RMG-models, persisted as a JSON file between imports.
+
+    For every kinetic model it records the digests of the files of the libraries
+    that were imported successfully, so unchanged libraries can be skipped next time.
+    While an import is running it also keeps a checkpoint of the kinetic models it completed
+    and of how many entries of each library it committed, so a failed import can be resumed.
+    Passing an empty path keeps the state in memory only.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {"digests": {}, "checkpoint": {"completed": [], "entries": {}}}
+        if path:
+            try:
+                with open(path, "r") as f:
+                    self.data.update(json.load(f))
+            except FileNotFoundError:
+                pass
+
+    def get_digest(self, model_name, library):
+        return self.data["digests"].get(model_name, {}).get(library)
+
+    def set_digest(self, model_name, library, digest):
+        self.data["digests"].setdefault(model_name, {})[library] = digest
+
+    @property
+    def checkpoint(self):
+        return self.data["checkpoint"]
+
+    def has_checkpoint(self):
+        return bool(self.checkpoint["completed"] or self.checkpoint["entries"])
+
+    def clear_checkpoint(self):
+        self.data["checkpoint"] = {"completed": [], "entries": {}}
+
+    def is_completed(self, model_name):
+        return model_name in self.checkpoint["completed"]
+
+    def complete_model(self, model_name):
+        self.checkpoint["entries"].pop(model_name, None)
+        if not self.is_completed(model_name):
+            self.checkpoint["completed"].append(model_name)
+
+    def get_entries_done(self, model_name, library, digest):
+        """
+        Get how many entries of the library were committed, or 0 if its files changed since
+        """
+
+        entries = self.checkpoint["entries"].get(model_name, {}).get(library)
+        if entries is None or entries["digest"] != digest:
+            return 0
+
+        return entries["count"]
+
+    def set_entries_done(self, model_name, library, digest, count):
+        self.checkpoint["entries"].setdefault(model_name, {})[library] = {
+            "digest": digest,
+            "count": count,
+        }
+
+    def save(self):
+        if self.path:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+class LibraryProgress:
+    """
+    The checkpoint of the entries of one library of a kinetic model
+    """
+
+    def __init__(self, state, model_name, library, digest):
+        self.state = state
+        self.model_name = model_name
+        self.library = library
+        self.digest = digest
+
+    @property
+    def done(self):
+        return self.state.get_entries_done(self.model_name, self.library, self.digest)
+
+    def update(self, count):
+        self.state.set_entries_done(self.model_name, self.library, self.digest, count)
@@ -0,0 +1,87 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from django.db import connection
+
+
+class ImportStats:
+    """
+    The time spent, entries processed and queries made in each stage of an import.
+
+    Stages can be nested, in which case the inner stages are also counted in the outer ones.
+    The number of entries of a stage can be given up front, or set on the object it yields
+    when it is only known at the end.
+    """
+
+    def __init__(self):
+        self.seconds = Counter()
+        self.entries = Counter()
+        self.queries = Counter()
+
+    @contextmanager
+    def time(self, stage, entries=0):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        timer = SimpleNamespace(entries=entries)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                yield timer
+        finally:
+            self.add(
+                stage, seconds=time.perf_counter() - start, entries=timer.entries, queries=queries
+            )
+
+    def add(self, stage, seconds=0, entries=0, queries=0):
+        self.seconds[stage] += seconds
+        self.entries[stage] += entries
+        self.queries[stage] += queries
+
+    def merge(self, other):
+        self.seconds.update(other.seconds)
+        self.entries.update(other.entries)
+        self.queries.update(other.queries)
+
+    def pop(self):
+        """
+        Get the stats recorded so far and start over
+        """
+
+        stats = ImportStats()
+        stats.merge(self)
+        self.__init__()
+
+        return stats
+
+    def summary(self):
+        return {
+            stage: {
+                "seconds": round(seconds, 3),
+                "entries": self.entries[stage],
+                "entries_per_second": (
+                    round(self.entries[stage] / seconds, 1)
+                    if self.entries[stage] and seconds
+                    else None
+                ),
+                "queries": self.queries[stage],
+            }
+            for stage, seconds in self.seconds.items()
+        }
+
+
+def write_summary(path, record):
+    """
+    Append the record to a JSON lines file, unless the path is empty
+    """
+
+    if path:
+        with open(path, "a") as f:
+            f.write(json.dumps(record, sort_keys=True) + "\n")
@@ -0,0 +1,246 @@
+import os
+import random
+
+"""
+Synthetic RMG-models:
+Generates directories laid out like RMG-models, for benchmarking the importer.
+The species are linear alkanes CnH2n+2 and their 1-alkyl radicals CnH2n+1, along with H and H2.
+Bimolecular reactions are H abstractions (CnH2n+2 + H <=> CnH2n+1 + H2, and between
+an alkyl radical and a longer alkane), association reactions are recombinations
+(CnH2n+1 + H <=> CnH2n+2, and between two alkyl radicals).
+"""
+
+BIMOLECULAR_KINETICS = ["arrhenius", "multi_arrhenius", "pdep_arrhenius", "chebyshev"]
+ASSOCIATION_KINETICS = ["third_body", "lindemann", "troe"]
+KINETICS_TYPES = BIMOLECULAR_KINETICS + ASSOCIATION_KINETICS
+DEFAULT_KINETICS_MIX = {
+    "arrhenius": 6,
+    "multi_arrhenius": 1,
+    "pdep_arrhenius": 1,
+    "chebyshev": 1,
+    "third_body": 1,
+    "lindemann": 1,
+    "troe": 1,
+}
+EFFICIENCIES = "{'C': 2, '[H][H]': 2}"
+
+
+def generate_rmg_models(path, models=1, species=50, reactions=100, kinetics_mix=None, seed=0):
+    """
+    Write `models` synthetic kinetic models to `path`, each with about `species` species
+    in its thermo library and `reactions` reactions in its kinetics library.
+
+    `kinetics_mix` maps the kinetics types to their relative frequency.
+    The output only depends on the arguments, so it can be regenerated to compare imports.
+    """
+
+    kinetics_mix = kinetics_mix or DEFAULT_KINETICS_MIX
+    unknown_types = set(kinetics_mix) - set(KINETICS_TYPES)
+    if unknown_types:
+        raise ValueError(f"Unknown kinetics types {', '.join(sorted(unknown_types))}")
+
+    carbons = max(1, (species - 2) // 2)
+    rng = random.Random(seed)
+    for index in range(models):
+        name = f"Synthetic{index}"
+        model_path = os.path.join(path, name)
+        thermo_path = os.path.join(model_path, "RMG-Py-thermo-library")
+        kinetics_path = os.path.join(model_path, "RMG-Py-kinetics-library")
+        os.makedirs(thermo_path, exist_ok=True)
+        os.makedirs(kinetics_path, exist_ok=True)
+
+        species_list = get_species(carbons)
+        with open(os.path.join(model_path, "source.txt"), "w") as f:
+            f.write(f"Synthetic kinetic model for benchmarks\ndoi: 10.0000/synthetic.{index}\n")
+        with open(os.path.join(thermo_path, "ThermoLibrary.py"), "w") as f:
+            f.write(get_header(name))
+            for entry_index, (label, adjacency_list) in enumerate(species_list, start=1):
+                f.write(get_thermo_entry(entry_index, label, adjacency_list, rng))
+        with open(os.path.join(kinetics_path, "dictionary.txt"), "w") as f:
+            for label, adjacency_list in species_list:
+                f.write(f"{label}\n{adjacency_list}\n")
+        with open(os.path.join(kinetics_path, "reactions.py"), "w") as f:
+            f.write(get_header(name))
+            for entry_index, (label, kinetics_type) in enumerate(
+                get_reactions(carbons, reactions, kinetics_mix, rng), start=1
+            ):
+                f.write(get_kinetics_entry(entry_index, label, kinetics_type, rng))
+
+
+def alkane(n):
+    return f"C{n}H{2 * n + 2}"
+
+
+def alkyl(n):
+    return f"C{n}H{2 * n + 1}"
+
+
+def get_species(carbons):
+    species_list = [
+        ("H", "multiplicity 2\n1 H u1 p0 c0\n"),
+        ("H2", "1 H u0 p0 c0 {2,S}\n2 H u0 p0 c0 {1,S}\n"),
+    ]
+    for n in range(1, carbons + 1):
+        species_list.append((alkane(n), get_alkyl_adjacency_list(n, radical=False)))
+        species_list.append((alkyl(n), get_alkyl_adjacency_list(n, radical=True)))
+
+    return species_list
+
+
+def get_alkyl_adjacency_list(n, radical):
+    """
+    Get the adjacency list of the linear alkane with `n` carbons, or of its 1-alkyl radical
+    """
+
+    bonds = {i: [] for i in range(1, n + 1)}
+    for i in range(1, n):
+        bonds[i].append(i + 1)
+        bonds[i + 1].append(i)
+    hydrogens = []
+    for i in range(1, n + 1):
+        for _ in range(4 - len(bonds[i]) - (radical and i == 1)):
+            hydrogen = n + len(hydrogens) + 1
+            hydrogens.append(hydrogen)
+            bonds[i].append(hydrogen)
+            bonds[hydrogen] = [i]
+
+    lines = ["multiplicity 2"] if radical else []
+    for atom in range(1, n + len(hydrogens) + 1):
+        element = "C" if atom <= n else "H"
+        electrons = 1 if radical and atom == 1 else 0
+        atom_bonds = " ".join(f"{{{bond},S}}" for bond in bonds[atom])
+        lines.append(f"{atom} {element} u{electrons} p0 c0 {atom_bonds}")
+
+    return "\n".join(lines) + "\n"
+
+
+def get_reactions(carbons, count, kinetics_mix, rng):
+    """
+    Get the labels and kinetics types of `count` distinct reactions,
+    or of as many as there are for the number of carbons
+    """
+
+    bimolecular = [f"{alkane(n)} + H <=> {alkyl(n)} + H2" for n in range(1, carbons + 1)]
+    bimolecular += [
+        f"{alkyl(m)} + {alkane(k)} <=> {alkane(m)} + {alkyl(k)}"
+        for m in range(1, carbons + 1)
+        for k in range(m + 1, carbons + 1)
+    ]
+    association = [f"{alkyl(n)} + H <=> {alkane(n)}" for n in range(1, carbons + 1)]
+    association += [
+        f"{alkyl(m)} + {alkyl(k)} <=> {alkane(m + k)}"
+        for m in range(1, carbons + 1)
+        for k in range(m, carbons + 1 - m)
+    ]
+    pools = {"bimolecular": iter(bimolecular), "association": iter(association)}
+
+    def get_pool(kinetics_type):
+        return "association" if kinetics_type in ASSOCIATION_KINETICS else "bimolecular"
+
+    reactions = []
+    while len(reactions) < count:
+        types = [t for t, weight in kinetics_mix.items() if weight > 0 and get_pool(t) in pools]
+        if not types:
+            break
+        kinetics_type = rng.choices(types, [kinetics_mix[t] for t in types])[0]
+        pool = get_pool(kinetics_type)
+        label = next(pools[pool], None)
+        if label is None:
+            del pools[pool]
+        else:
+            reactions.append((label, kinetics_type))
+
+    return reactions
+
+
+def get_header(name):
+    return (
+        "#!/usr/bin/env python\n"
+        "# encoding: utf-8\n\n"
+        f'name = "{name}"\n'
+        'shortDesc = ""\n'
+        'longDesc = """\nSynthetic library for benchmarks\n"""\n'
+    )
+
+
+def get_nasa(rng):
+    low = [3.5 + rng.random(), -2e-3, 1e-5, -1e-8, 4e-12, -1e4 * rng.random(), 1 + rng.random()]
+    high = [2 + rng.random(), 5e-3, -2e-6, 4e-10, -3e-14, -1e4 * rng.random(), 9 + rng.random()]
+
+    return (
+        "NASA(\n"
+        "        polynomials = [\n"
+        f"            NASAPolynomial(coeffs={low!r}, Tmin=(200,'K'), Tmax=(1000,'K')),\n"
+        f"            NASAPolynomial(coeffs={high!r}, Tmin=(1000,'K'), Tmax=(6000,'K')),\n"
+        "        ],\n"
+        "        Tmin = (200,'K'),\n"
+        "        Tmax = (6000,'K'),\n"
+        "    )"
+    )
+
+
+def get_thermo_entry(index, label, adjacency_list, rng):
+    return (
+        f"\nentry(\n"
+        f"    index = {index},\n"
+        f'    label = "{label}",\n'
+        f'    molecule = \n"""\n{adjacency_list}""",\n'
+        f"    thermo = {get_nasa(rng)},\n"
+        f'    shortDesc = """Synthetic thermo for {label}""",\n'
+        f'    longDesc = \n"""\nSynthetic thermo for {label}\n""",\n'
+        f")\n"
+    )
+
+
+def get_arrhenius(rng, units="cm^3/(mol*s)"):
+    return (
+        f"Arrhenius(A=({10 ** rng.uniform(10, 14):.4e}, '{units}'), n={rng.uniform(0, 3):.3f}, "
+        f"Ea=({rng.uniform(0, 30):.3f}, 'kcal/mol'), T0=(1, 'K'))"
+    )
+
+
+def get_kinetics(kinetics_type, rng):
+    if kinetics_type == "arrhenius":
+        return get_arrhenius(rng)
+    elif kinetics_type == "multi_arrhenius":
+        return f"MultiArrhenius(arrhenius=[{get_arrhenius(rng)}, {get_arrhenius(rng)}])"
+    elif kinetics_type == "pdep_arrhenius":
+        arrhenius = ", ".join(get_arrhenius(rng) for _ in range(3))
+        return f"PDepArrhenius(pressures=([0.1, 1, 10], 'atm'), arrhenius=[{arrhenius}])"
+    elif kinetics_type == "chebyshev":
+        coeffs = [[round(rng.uniform(-1, 1), 4) for _ in range(4)] for _ in range(6)]
+        coeffs[0][0] += 10
+        return (
+            f"Chebyshev(coeffs={coeffs!r}, kunits='cm^3/(mol*s)', Tmin=(300, 'K'), "
+            f"Tmax=(3000, 'K'), Pmin=(0.01, 'bar'), Pmax=(100, 'bar'))"
+        )
+    elif kinetics_type == "third_body":
+        return (
+            f"ThirdBody(arrheniusLow={get_arrhenius(rng, units='cm^6/(mol^2*s)')}, "
+            f"efficiencies={EFFICIENCIES})"
+        )
+    elif kinetics_type == "lindemann":
+        return (
+            f"Lindemann(arrheniusHigh={get_arrhenius(rng)}, "
+            f"arrheniusLow={get_arrhenius(rng, units='cm^6/(mol^2*s)')}, "
+            f"efficiencies={EFFICIENCIES})"
+        )
+    elif kinetics_type == "troe":
+        return (
+            f"Troe(arrheniusHigh={get_arrhenius(rng)}, "
+            f"arrheniusLow={get_arrhenius(rng, units='cm^6/(mol^2*s)')}, "
+            f"alpha={rng.uniform(0.1, 0.9):.3f}, T3=({rng.uniform(50, 500):.1f}, 'K'), "
+            f"T1=({rng.uniform(1000, 5000):.1f}, 'K'), efficiencies={EFFICIENCIES})"
+        )
+
+
+def get_kinetics_entry(index, label, kinetics_type, rng):
+    return (
+        f"\nentry(\n"
+        f"    index = {index},\n"
+        f'    label = "{label}",\n'
+        f"    kinetics = {get_kinetics(kinetics_type, rng)},\n"
+        f'    shortDesc = """Synthetic {kinetics_type} kinetics""",\n'
+        f'    longDesc = \n"""\nSynthetic {kinetics_type} kinetics for {label}\n""",\n'
+        f")\n"
+    )
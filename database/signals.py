@@ -1,16 +1,74 @@
 from django.dispatch import receiver
-from django.db.models.signals import m2m_changed
-from .models import Reaction, Species
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from .equilibrium import invalidate_equilibrium_cache
+from .rates import invalidate_rates_cache
+from .models import (
+    KineticModel,
+    Kinetics,
+    KineticsComment,
+    Reaction,
+    Species,
+    Stoichiometry,
+    Thermo,
+    ThermoComment,
+    update_reaction_counts,
+    update_reaction_equations,
+)
 from .scripts.import_rmg_models import get_species_hash, get_reaction_hash
 
 
+POST_M2M_ACTIONS = {"post_add", "post_remove", "post_clear"}
+
+
 @receiver(m2m_changed, sender=Reaction.species.through)
-def change_reaction_hash_on_stoichiometry_change(instance, **kwargs):
+def change_reaction_hash_on_stoichiometry_change(instance, action, **kwargs):
+    if action not in POST_M2M_ACTIONS:
+        return
     instance.hash = get_reaction_hash(instance.stoich_species())
+    instance.equation = instance.get_equation()
     instance.save()
 
 
+@receiver(post_save, sender=Reaction)
+def update_equation_on_reversible_change(instance, **kwargs):
+    # The stoichiometry has its own receivers, so only the arrow can be out of date here
+    if instance.equation and ("<=>" in instance.equation) != instance.reversible:
+        instance.equation = instance.get_equation()
+        Reaction.objects.filter(pk=instance.pk).update(equation=instance.equation)
+
+
+@receiver(post_save, sender=Stoichiometry)
+@receiver(post_delete, sender=Stoichiometry)
+def update_equation_on_stoichiometry_change(instance, **kwargs):
+    update_reaction_equations(Reaction.objects.filter(pk=instance.reaction_id))
+
+
+@receiver(post_save, sender=Kinetics)
+@receiver(post_delete, sender=Kinetics)
+def update_reaction_counts_on_kinetics_change(instance, **kwargs):
+    update_reaction_counts(Reaction.objects.filter(pk=instance.reaction_id))
+
+
+@receiver(post_save, sender=KineticsComment)
+@receiver(post_delete, sender=KineticsComment)
+def update_reaction_counts_on_kinetics_comment_change(instance, **kwargs):
+    update_reaction_counts(Reaction.objects.filter(kinetics=instance.kinetics_id))
+
+
 @receiver(m2m_changed, sender=Species.isomers.through)
-def change_species_hash_on_isomers_change(instance, **kwargs):
+def change_species_hash_on_isomers_change(instance, action, **kwargs):
+    if action not in POST_M2M_ACTIONS:
+        return
     instance.hash = get_species_hash(instance.isomers.all())
+    instance.formula = instance.get_formula()
     instance.save()
+    update_reaction_equations(Reaction.objects.filter(species=instance))
+
+
+for sender in [Thermo, ThermoComment, Stoichiometry]:
+    post_save.connect(invalidate_equilibrium_cache, sender=sender)
+    post_delete.connect(invalidate_equilibrium_cache, sender=sender)
+
+for sender in [Kinetics, KineticsComment, KineticModel]:
+    post_save.connect(invalidate_rates_cache, sender=sender)
+    post_delete.connect(invalidate_rates_cache, sender=sender)
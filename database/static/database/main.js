@@ -17,4 +17,40 @@ function copy() {
 }
 
 var button = document.querySelector("#copy")
-button.addEventListener("click", copy)
+if (button) {
+    button.addEventListener("click", copy)
+}
+
+// Structure drawings are loaded as SVG in batches, one request per page (or autocomplete
+// results) instead of one per image. The batch size is DrawStructures.max_structures.
+const structureDrawingsUrl = document.currentScript.dataset.structureDrawingsUrl;
+const structureBatchSize = 100;
+
+function loadStructureDrawings() {
+    const images = {};
+    document.querySelectorAll("img.structure-drawing:not([data-loading])").forEach((image) => {
+        image.dataset.loading = "true";
+        const id = image.dataset.structureId;
+        (images[id] = images[id] || []).push(image);
+    });
+    const ids = Object.keys(images);
+    for (let start = 0; start < ids.length; start += structureBatchSize) {
+        const batch = ids.slice(start, start + structureBatchSize);
+        fetch(`${structureDrawingsUrl}?ids=${batch.join(",")}`)
+            .then((response) => response.json())
+            .then((drawings) => {
+                for (const [id, svg] of Object.entries(drawings)) {
+                    // As images, so the ids inside each SVG don't clash with the others'
+                    const src = `data:image/svg+xml;charset=utf-8,${encodeURIComponent(svg)}`;
+                    images[id].forEach((image) => (image.src = src));
+                }
+            })
+            .catch((error) => console.warn("Could not load structure drawings:", error));
+    }
+}
+
+loadStructureDrawings();
+new MutationObserver(loadStructureDrawings).observe(document.body, {
+    childList: true,
+    subtree: true,
+});
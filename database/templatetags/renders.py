@@ -2,6 +2,7 @@ from django import template
 from django.utils.safestring import mark_safe
 from django.urls import reverse
 
+from database.drawing import get_image_url
 from database.templatetags.utils import pluralize, param_replace
 
 
@@ -168,6 +169,62 @@ def render_pagination(context, objects, page_name):
     )
 
 
+@register.simple_tag(takes_context=True)
+def render_keyset_pagination(context, objects, after_name, before_name):
+    """
+    Render the first, previous and next links of a `KeysetPage`
+    """
+
+    disabled = """
+    <li class="page-item disabled">
+        <a class="page-link" tabindex="-1" aria-disabled="true" href="#">{label}</a>
+    </li>
+    """
+    enabled = """<li class="page-item"><a class="page-link" href="?{args}">{label}</a></li>"""
+    if objects.has_previous():
+        first_args = param_replace(context, **{after_name: "", before_name: ""})
+        prev_args = param_replace(context, **{after_name: "", before_name: objects.previous_key})
+        prev = enabled.format(args=first_args, label="First") + enabled.format(
+            args=prev_args, label="Previous"
+        )
+    else:
+        prev = disabled.format(label="First") + disabled.format(label="Previous")
+    if objects.has_next():
+        next_args = param_replace(context, **{after_name: objects.next_key, before_name: ""})
+        nxt = enabled.format(args=next_args, label="Next")
+    else:
+        nxt = disabled.format(label="Next")
+
+    return mark_safe(
+        f"""
+        <nav aria-label="Pagination">
+            <ul class="pagination">
+                {prev}
+                {nxt}
+            </ul>
+        </nav>
+        """
+    )
+
+
+@register.filter
+def structure_image_url(structure):
+    return get_image_url(structure)
+
+
+@register.filter
+def render_structure_drawing(structure):
+    """
+    Render a placeholder that main.js fills with the structure's SVG drawing,
+    which it loads along with the others on the page in one request
+    """
+
+    return mark_safe(
+        f'<img class="structure-drawing" data-structure-id="{structure.pk}" '
+        f'alt="Structure {structure.pk}" />'
+    )
+
+
 def render_species_list_card(species):
     if species.names:
         names_inner = "\n".join(
@@ -187,7 +244,7 @@ def render_species_list_card(species):
         structures_inner = "\n".join(
             f"""
             <li class='list-group-item'>
-                <img src='{reverse('draw-structure', args=[structure.pk])}'/>
+                {render_structure_drawing(structure)}
             </li>
             """.strip()
             for structure in species.structures
@@ -307,6 +364,10 @@ def render_thermo_list_card(thermo):
     else:
         models_render = ""
     thermo_url = reverse("thermo-detail", args=[thermo.pk])
+    enthalpy298, entropy298 = (
+        r"\text{N/A}" if value is None else f"{value:.1f}"
+        for value in [thermo.enthalpy298, thermo.entropy298]
+    )
     return mark_safe(
         fr"""
         <div class="list-group-item list-group-item-action flex-column align-items-start">
@@ -315,9 +376,9 @@ def render_thermo_list_card(thermo):
             >
                 <div class="d-flex w-100 justify-content-between">
                     <h5 class="mb-1">
-                        $\Delta H_f \, (298 \, K):{thermo.enthalpy298:.1f} \, \frac{{J}}{{mol}}$
+                        $\Delta H_f \, (298 \, K):{enthalpy298} \, \frac{{J}}{{mol}}$
                         <br>
-                        $S \, (298 \, K):{thermo.entropy298:.1f} \, \frac{{J}}{{mol-K}}$
+                        $S \, (298 \, K):{entropy298} \, \frac{{J}}{{mol-K}}$
                     </h5>
                     <small>ID: {thermo.pk}</small>
                 </div>
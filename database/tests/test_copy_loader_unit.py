@@ -0,0 +1,50 @@
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+
+from database import models
+from database.scripts.copy_loader import copy_insert, format_value
+
+
+class TestFormatValue(SimpleTestCase):
+    def test_null_and_empty_string(self):
+        self.assertEqual(format_value(None), "")
+        self.assertEqual(format_value(""), '""')
+
+    def test_scalars(self):
+        self.assertEqual(format_value(True), "t")
+        self.assertEqual(format_value(2), "2")
+        self.assertEqual(format_value(0.1), "0.1")
+        self.assertEqual(format_value('say "hi"'), '"say ""hi"""')
+
+    def test_array(self):
+        self.assertEqual(format_value([[1.0, 2.5], [None, 3]]), '"{{1.0,2.5},{NULL,3}}"')
+
+    def test_json(self):
+        self.assertEqual(format_value({"type": "arrhenius"}), '"{""type"": ""arrhenius""}"')
+
+
+class TestCopyInsert(TestCase):
+    def test_inserts_in_order_skipping_conflicts(self):
+        models.Formula.objects.create(formula="H2O")
+        copy_insert(
+            models.Formula,
+            [models.Formula(formula=formula) for formula in ["O2", "H2O", "N2", "O2"]],
+        )
+
+        formulas = list(models.Formula.objects.order_by("id").values_list("formula", flat=True))
+        self.assertEqual(formulas, ["H2O", "O2", "N2"])
+
+    def test_json_field(self):
+        reaction = models.Reaction.objects.create(hash="abc", reversible=True)
+        raw_data = {"type": "arrhenius", "a": 1e13, "a_si": 1e13, "a_delta": None}
+        copy_insert(models.Kinetics, [models.Kinetics(reaction=reaction, raw_data=raw_data)])
+
+        self.assertEqual(models.Kinetics.objects.get(reaction=reaction).raw_data, raw_data)
+
+    def test_failed_insert(self):
+        with self.assertRaises(IntegrityError):
+            copy_insert(models.Formula, [models.Formula(formula=None)])
+
+        # The staging table was dropped with the savepoint, and the transaction is still usable
+        copy_insert(models.Formula, [models.Formula(formula="O2")])
+        self.assertEqual(list(models.Formula.objects.values_list("formula", flat=True)), ["O2"])
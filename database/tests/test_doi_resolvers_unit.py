@@ -0,0 +1,64 @@
+import os
+import json
+import tempfile
+
+from django.test import SimpleTestCase
+
+from database.scripts.doi_resolvers import CachedResolver, FileResolver
+
+
+class CountingResolver:
+    def __init__(self, references):
+        self.references = references
+        self.resolved = []
+
+    def resolve(self, dois):
+        self.resolved.append(list(dois))
+        return {doi: self.references.get(doi) for doi in dois}
+
+
+class TestDoiResolvers(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.json")
+        self.reference = {"DOI": "10.1021/jp003224c", "volume": "105"}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_file_resolver(self):
+        path = os.path.join(self.directory.name, "dois.json")
+        with open(path, "w") as f:
+            json.dump({"10.1021/JP003224C": self.reference}, f)
+
+        references = FileResolver(path).resolve(["10.1021/jp003224c", "10.1002/kin.20049"])
+
+        self.assertEqual(references["10.1021/jp003224c"], self.reference)
+        self.assertIsNone(references["10.1002/kin.20049"])
+
+    def test_cached_resolver_looks_up_missing_dois_once(self):
+        resolver = CountingResolver({"10.1021/jp003224c": self.reference})
+        cached = CachedResolver(self.path, resolver=resolver)
+
+        cached.resolve(["10.1021/jp003224c", "10.1002/kin.20049"])
+        references = cached.resolve(["10.1021/jp003224c", "10.1002/kin.20049"])
+
+        self.assertEqual(resolver.resolved, [["10.1021/jp003224c", "10.1002/kin.20049"]])
+        self.assertEqual(references["10.1021/jp003224c"], self.reference)
+        self.assertIsNone(references["10.1002/kin.20049"])
+
+    def test_dois_not_found_are_not_persisted(self):
+        resolver = CountingResolver({})
+        CachedResolver(self.path, resolver=resolver).resolve(["10.1002/kin.20049"])
+        CachedResolver(self.path, resolver=resolver).resolve(["10.1002/kin.20049"])
+
+        self.assertEqual(resolver.resolved, [["10.1002/kin.20049"], ["10.1002/kin.20049"]])
+
+    def test_cache_is_persisted(self):
+        resolver = CountingResolver({"10.1021/jp003224c": self.reference})
+        CachedResolver(self.path, resolver=resolver).resolve(["10.1021/jp003224c"])
+
+        offline = CachedResolver(self.path)
+        self.assertEqual(
+            offline.resolve(["10.1021/jp003224c"])["10.1021/jp003224c"], self.reference
+        )
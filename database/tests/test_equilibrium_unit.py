@@ -0,0 +1,92 @@
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from rmgpy.constants import R
+
+from database import models
+from database.equilibrium import get_reaction_equilibrium, get_reverse_rate_coefficients
+
+COEFFS = [3.5, 1e-3, -2e-6, 3e-9, -1e-12, -1000.0, 4.0]
+TEMPS = [500.0, 1000.0]
+
+
+def create_species_with_thermo(hash, enthalpy_shift, kinetic_model):
+    """
+    Create a species whose enthalpy is shifted by `enthalpy_shift` * R (J/mol)
+    from the same NASA polynomial
+    """
+
+    species = models.Species.objects.create(hash=hash)
+    coeffs = COEFFS[:5] + [COEFFS[5] + enthalpy_shift] + COEFFS[6:]
+    thermo = models.Thermo.objects.create(
+        species=species,
+        coeffs_poly1=coeffs,
+        coeffs_poly2=coeffs,
+        temp_min_1=200,
+        temp_max_1=1000,
+        temp_min_2=1000,
+        temp_max_2=6000,
+    )
+    models.ThermoComment.objects.create(thermo=thermo, kinetic_model=kinetic_model)
+
+    return species
+
+
+class TestEquilibrium(TestCase):
+    def setUp(self):
+        cache.clear()
+        source = models.Source.objects.create()
+        self.kinetic_model = models.KineticModel.objects.create(source=source)
+        a = create_species_with_thermo("a", 0.0, self.kinetic_model)
+        b = create_species_with_thermo("b", -1000.0, self.kinetic_model)
+        self.reaction = models.Reaction.objects.create(hash="a<=>2b", reversible=True)
+        models.Stoichiometry.objects.create(reaction=self.reaction, species=a, coeff=-1)
+        models.Stoichiometry.objects.create(reaction=self.reaction, species=b, coeff=2)
+        self.b = b
+
+    def test_reaction_equilibrium(self):
+        temps = np.array(TEMPS)
+        a_thermo, b_thermo = models.Thermo.objects.order_by("id")
+        gibbs_energy = 2 * b_thermo.free_energy(temps) - a_thermo.free_energy(temps)
+
+        equilibrium = get_reaction_equilibrium(self.reaction, temps, self.kinetic_model)
+
+        np.testing.assert_array_equal(equilibrium.reaction_ids, [self.reaction.id])
+        np.testing.assert_allclose(equilibrium.gibbs_energies[0], gibbs_energy)
+        np.testing.assert_allclose(
+            equilibrium.equilibrium_constants[0],
+            np.exp(-gibbs_energy / (R * temps)) * 1e5 / (R * temps),
+        )
+
+    def test_cached_until_thermo_changes(self):
+        get_reaction_equilibrium(self.reaction, TEMPS)
+        with self.assertNumQueries(0):
+            get_reaction_equilibrium(self.reaction, TEMPS)
+
+        thermo = models.Thermo.objects.get(species=self.b)
+        thermo.coeffs_poly1 = COEFFS
+        thermo.save()
+        with self.assertNumQueries(2):
+            get_reaction_equilibrium(self.reaction, TEMPS)
+
+    def test_reverse_rate_coefficients(self):
+        raw_data = {
+            "type": "arrhenius",
+            "a": 1e6,
+            "a_si": 1e6,
+            "a_units": "s^-1",
+            "n": 0,
+            "e": 0,
+            "e_si": 0,
+            "e_units": "J/mol",
+        }
+        kinetics = models.Kinetics.objects.create(reaction=self.reaction, raw_data=raw_data)
+        models.KineticsComment.objects.create(kinetics=kinetics, kinetic_model=self.kinetic_model)
+
+        reverse_rate_coefficients = get_reverse_rate_coefficients(self.kinetic_model, TEMPS)
+        equilibrium = get_reaction_equilibrium(self.reaction, TEMPS, self.kinetic_model)
+
+        self.assertTrue(reverse_rate_coefficients.reverse[0])
+        np.testing.assert_allclose(
+            reverse_rate_coefficients.values[0], 1e6 / equilibrium.equilibrium_constants[0]
+        )
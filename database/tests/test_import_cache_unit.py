@@ -0,0 +1,112 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+
+from database import models
+from database.scripts.import_cache import IdentityCache, CanonicalizationCache
+
+
+class TestIdentityCache(TestCase):
+    def setUp(self):
+        self.formula = models.Formula.objects.create(formula="H2O")
+        self.isomer = models.Isomer.objects.create(inchi="InChI=1S/H2O/h1H2", formula=self.formula)
+        self.cache = IdentityCache(models)
+
+    def test_preloaded(self):
+        self.assertEqual(self.cache.get("formulas", "H2O"), self.formula.id)
+        self.assertEqual(self.cache.get("isomers", "InChI=1S/H2O/h1H2"), self.isomer.id)
+
+    def test_hits_and_misses(self):
+        self.cache.get("formulas", "H2O")
+        self.cache.get("formulas", "O2")
+        self.cache.get("formulas", "O2")
+
+        self.assertEqual(self.cache.hits["formulas"], 1)
+        self.assertEqual(self.cache.misses["formulas"], 2)
+
+    def test_get_or_create_only_creates_misses(self):
+        created = []
+
+        def create():
+            formula = models.Formula.objects.create(formula="O2")
+            created.append(formula)
+            return formula.id
+
+        first = self.cache.get_or_create("formulas", "O2", create)
+        second = self.cache.get_or_create("formulas", "O2", create)
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(first, second)
+
+    def test_partition(self):
+        found, missing = self.cache.partition("formulas", ["H2O", "O2"])
+
+        self.assertEqual(found, {"H2O": self.formula.id})
+        self.assertEqual(missing, ["O2"])
+
+    def test_rollback_forgets_ids(self):
+        with self.assertRaises(IntegrityError):
+            with self.cache.atomic():
+                formula = models.Formula.objects.create(formula="O2")
+                self.cache.add("formulas", "O2", formula.id)
+                with self.cache.atomic():
+                    formula = models.Formula.objects.create(formula="N2")
+                    self.cache.add("formulas", "N2", formula.id)
+                models.Formula.objects.create(formula="H2O")
+
+        self.assertIsNone(self.cache.get("formulas", "O2"))
+        self.assertIsNone(self.cache.get("formulas", "N2"))
+        self.assertIsNotNone(self.cache.get("formulas", "H2O"))
+
+
+class TestCanonicalizationCache(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite3")
+        self.molecule = SimpleNamespace(
+            adjacency_list="multiplicity 2\n1 H u1 p0 c0\n",
+            formula="H",
+            smiles="[H]",
+            inchi="InChI=1S/H/u1",
+            multiplicity=2,
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_persisted_after_commit(self):
+        cache = CanonicalizationCache(self.path, version="3.0")
+        cache.add(self.molecule)
+        cache.commit()
+
+        cached = CanonicalizationCache(self.path, version="3.0").get(self.molecule.adjacency_list)
+        self.assertEqual(cached, self.molecule)
+
+    def test_open_another_file(self):
+        cache = CanonicalizationCache(self.path, version="3.0")
+        cache.add(self.molecule)
+        cache.commit()
+
+        cache.open(os.path.join(self.directory.name, "other.sqlite3"))
+        self.assertIsNone(cache.get(self.molecule.adjacency_list))
+        cache.open(self.path)
+        self.assertEqual(cache.get(self.molecule.adjacency_list), self.molecule)
+
+    def test_emptied_for_new_version(self):
+        cache = CanonicalizationCache(self.path, version="3.0")
+        cache.add(self.molecule)
+        cache.commit()
+
+        cached = CanonicalizationCache(self.path, version="3.1").get(self.molecule.adjacency_list)
+        self.assertIsNone(cached)
+
+    def test_disabled(self):
+        cache = CanonicalizationCache("")
+        cache.add(self.molecule)
+        cache.commit()
+
+        self.assertEqual(cache.get(self.molecule.adjacency_list), self.molecule)
+        self.assertFalse(os.path.exists(self.path))
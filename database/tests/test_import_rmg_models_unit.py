@@ -0,0 +1,393 @@
+import os
+import re
+import json
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from database.models import KineticModel, Reaction, Source, Thermo, ThermoComment
+from database.scripts import import_rmg_models as importer
+from database.scripts.import_state import ImportState, LibraryProgress
+from database.scripts.synthetic_rmg_models import generate_rmg_models
+
+# The fields of the rows the importer writes, with the foreign keys followed to natural keys,
+# since the ids of the rows that are deleted and created again differ
+ROW_FIELDS = {
+    "Formula": ["formula"],
+    "Isomer": ["inchi", "formula__formula"],
+    "Structure": ["adjacency_list", "smiles", "multiplicity", "isomer__inchi"],
+    "Species": ["hash", "isomers__inchi"],
+    "SpeciesName": ["name", "species__hash", "kinetic_model__model_name"],
+    "Reaction": ["hash", "reversible"],
+    "Stoichiometry": ["reaction__hash", "species__hash", "coeff"],
+    "Kinetics": [
+        "reaction__hash",
+        "raw_data",
+        "min_temp",
+        "max_temp",
+        "min_pressure",
+        "max_pressure",
+    ],
+    "Efficiency": ["kinetics__reaction__hash", "kinetics__raw_data", "species__hash", "efficiency"],
+    "KineticsComment": [
+        "kinetics__reaction__hash",
+        "kinetics__raw_data",
+        "kinetic_model__model_name",
+        "comment",
+    ],
+    "Thermo": ["species__hash", *importer.THERMO_FIELDS, "enthalpy298", "entropy298"],
+    "ThermoComment": [
+        "thermo__species__hash",
+        "thermo__coeffs_poly1",
+        "kinetic_model__model_name",
+        "comment",
+    ],
+}
+# The rows linking the rows above to a kinetic model
+MODEL_ROWS = ["SpeciesName", "KineticsComment", "ThermoComment"]
+# The fields filled in at the end of an import
+SUMMARY_FIELDS = {
+    "Species": ["hash", "formula"],
+    "Reaction": ["hash", "kinetics_count", "kinetic_model_count", "equation"],
+}
+
+
+def get_rows(fields):
+    rows = {}
+    for model_name, model_fields in fields.items():
+        model = apps.get_model("database", model_name)
+        rows[model_name] = list(model.objects.order_by(*model_fields).values_list(*model_fields))
+
+    return rows
+
+
+def get_counts():
+    return {model_name: len(rows) for model_name, rows in get_rows(ROW_FIELDS).items()}
+
+
+class ImportTestCase(TransactionTestCase):
+    """
+    Imports synthetic kinetic models, with the import state and stats kept in a temporary
+    directory and the DOIs of their sources looked up in a file.
+
+    The sequences are reset, so the ids of the rows and therefore the species and reaction
+    hashes of two imports of the same models are the same.
+    """
+
+    reset_sequences = True
+    kinetics_mix = {"arrhenius": 1}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.models_path = os.path.join(self.directory.name, "rmg-models")
+        self.state_path = os.path.join(self.directory.name, "rmg-import-state.json")
+        generate_rmg_models(
+            self.models_path, models=2, species=10, reactions=20, kinetics_mix=self.kinetics_mix
+        )
+        dois_path = os.path.join(self.directory.name, "rmg-dois.json")
+        with open(dois_path, "w") as f:
+            json.dump(
+                {
+                    f"10.0000/synthetic.{index}": {
+                        "title": [f"Synthetic kinetic model {index}"],
+                        "author": [{"given": "Synthetic", "family": "Author"}],
+                    }
+                    for index in range(2)
+                },
+                f,
+            )
+        environ = mock.patch.dict(
+            os.environ,
+            {
+                "RMGIMPORTSTATE": self.state_path,
+                "RMGIMPORTSTATS": os.path.join(self.directory.name, "rmg-import-stats.jsonl"),
+                "RMGDOIRESOLVER": "file",
+                "RMGDOIFILE": dois_path,
+                "RMGDOICACHE": "",
+            },
+        )
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def import_models(self, **kwargs):
+        importer.import_rmg_models(apps, None, path=self.models_path, **kwargs)
+
+    def clean_import(self):
+        """
+        Import the models into an empty database, as if they were never imported before
+        """
+
+        call_command("flush", interactive=False, verbosity=0)
+        os.remove(self.state_path)
+        self.import_models()
+
+    def edit(self, path, pattern, replacement):
+        """
+        Replace the first match of the pattern in a file of the synthetic models
+        """
+
+        path = os.path.join(self.models_path, path)
+        with open(path, "r") as f:
+            text = f.read()
+        with open(path, "w") as f:
+            f.write(re.sub(pattern, replacement, text, count=1))
+
+
+class TestImportSource(ImportTestCase):
+    def test_blank_source_is_filled_in(self):
+        Source.objects.create(doi="10.0000/synthetic.0")
+
+        self.import_models()
+
+        source = Source.objects.get(doi="10.0000/synthetic.0")
+        self.assertEqual(source.source_title, "Synthetic kinetic model 0")
+        self.assertEqual(source.authors.count(), 1)
+        self.assertEqual(source.kineticmodel_set.get().model_name, "Synthetic0")
+
+    def test_unknown_doi(self):
+        with open(os.environ["RMGDOIFILE"], "w") as f:
+            json.dump({}, f)
+
+        self.import_models()
+
+        self.assertFalse(Source.objects.exists())
+        # The source is imported again by the next import
+        self.assertIsNone(ImportState(self.state_path).get_digest("Synthetic0", "source"))
+
+
+class TestParseKineticModels(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        generate_rmg_models(self.directory.name, models=3, species=10, reactions=20)
+
+    def get_jobs(self):
+        return [
+            SimpleNamespace(
+                name=name,
+                thermo_path=thermo_path,
+                kinetics_path=kinetics_path,
+                source_path=source_path,
+                libraries=importer.LIBRARIES,
+                digests={},
+            )
+            for name, thermo_path, kinetics_path, source_path in importer.get_models(
+                self.directory.name
+            )
+        ]
+
+    def parse(self, workers):
+        # The stats are timings, which differ between runs
+        return [
+            {key: value for key, value in vars(model_data).items() if key != "stats"}
+            for model_data in importer.parse_kinetic_models(self.get_jobs(), workers=workers)
+        ]
+
+    def test_workers_parse_the_same(self):
+        models_data = self.parse(workers=1)
+
+        self.assertEqual(
+            sorted(data["name"] for data in models_data), ["Synthetic0", "Synthetic1", "Synthetic2"]
+        )
+        for data in models_data:
+            self.assertIsNone(data["thermo"].error)
+            self.assertIsNone(data["kinetics"].error)
+        self.assertEqual(self.parse(workers=2), models_data)
+
+
+class TestIncrementalImport(ImportTestCase):
+    def test_unchanged_models_are_skipped(self):
+        self.import_models()
+        rows = get_rows({**ROW_FIELDS, **SUMMARY_FIELDS})
+        info = dict(KineticModel.objects.values_list("model_name", "info"))
+
+        with self.assertLogs(importer.logger, "INFO") as logs:
+            self.import_models(incremental=True)
+
+        self.assertIn(
+            f"INFO:{importer.logger.name}:Skipping unchanged kinetic model Synthetic0", logs.output
+        )
+        self.assertEqual(get_rows({**ROW_FIELDS, **SUMMARY_FIELDS}), rows)
+        self.assertEqual(dict(KineticModel.objects.values_list("model_name", "info")), info)
+
+    def assert_reimport_matches_clean_import(self, path, pattern, replacement):
+        self.import_models()
+        counts = get_counts()
+        self.edit(path, pattern, replacement)
+
+        self.import_models(incremental=True)
+        rows = get_rows({**ROW_FIELDS, **SUMMARY_FIELDS})
+        self.clean_import()
+
+        self.assertEqual(get_counts(), counts)
+        self.assertEqual(rows, get_rows({**ROW_FIELDS, **SUMMARY_FIELDS}))
+
+    def test_changed_kinetics_entry(self):
+        self.assert_reimport_matches_clean_import(
+            "Synthetic0/RMG-Py-kinetics-library/reactions.py", r" n=\d", " n=9"
+        )
+
+    def test_changed_thermo_entry(self):
+        self.assert_reimport_matches_clean_import(
+            "Synthetic0/RMG-Py-thermo-library/ThermoLibrary.py", r"coeffs=\[\d", "coeffs=[9"
+        )
+
+    def test_unchanged_library_is_skipped(self):
+        self.import_models()
+        thermo_ids = set(Thermo.objects.values_list("id", flat=True))
+        comment_ids = set(ThermoComment.objects.values_list("id", flat=True))
+        self.edit("Synthetic0/RMG-Py-kinetics-library/reactions.py", r" n=\d", " n=9")
+
+        self.import_models(incremental=True)
+
+        self.assertEqual(set(Thermo.objects.values_list("id", flat=True)), thermo_ids)
+        self.assertEqual(set(ThermoComment.objects.values_list("id", flat=True)), comment_ids)
+
+
+class TestBulkImport(ImportTestCase):
+    """
+    The bulk importers of the thermo and kinetics libraries, compared with the importers
+    of one entry at a time that they fall back to
+    """
+
+    # Every kinetics type, so there are efficiencies too
+    kinetics_mix = None
+
+    def setUp(self):
+        super().setUp()
+        model_path = os.path.join(self.models_path, "Synthetic0")
+        self.thermo = importer.parse_library(
+            importer.parse_thermo_library,
+            os.path.join(model_path, "RMG-Py-thermo-library", "ThermoLibrary.py"),
+            "Synthetic0",
+        )
+        self.kinetics = importer.parse_library(
+            importer.parse_kinetics_library,
+            os.path.join(model_path, "RMG-Py-kinetics-library", "reactions.py"),
+            "Synthetic0",
+        )
+
+    def import_libraries(self, model_name):
+        models = importer.get_import_models(apps)
+        kinetic_model = KineticModel.objects.create(model_name=model_name)
+        state = ImportState("")
+        for library, import_library, library_data in [
+            ("thermo", importer.import_thermo, self.thermo),
+            ("kinetics", importer.import_kinetics, self.kinetics),
+        ]:
+            progress = LibraryProgress(state, model_name, library, "")
+            import_library(library_data, kinetic_model, progress, models)
+
+    def import_libraries_per_entry(self, model_name):
+        """
+        Import the libraries with failing bulk importers, so each entry is imported on its own
+        """
+
+        with mock.patch.object(
+            importer, "bulk_import_thermo", side_effect=IntegrityError
+        ) as bulk_import_thermo, mock.patch.object(
+            importer, "bulk_import_kinetics", side_effect=IntegrityError
+        ) as bulk_import_kinetics:
+            self.import_libraries(model_name)
+
+        bulk_import_thermo.assert_called()
+        bulk_import_kinetics.assert_called()
+
+    def test_per_entry_import_matches(self):
+        self.import_libraries("Synthetic0")
+        rows = get_rows(ROW_FIELDS)
+        call_command("flush", interactive=False, verbosity=0)
+
+        self.import_libraries_per_entry("Synthetic0")
+
+        self.assertTrue(all(rows[model_name] for model_name in ROW_FIELDS))
+        self.assertEqual(get_rows(ROW_FIELDS), rows)
+
+    def test_existing_rows_are_reused(self):
+        self.import_libraries("Synthetic0")
+        counts = get_counts()
+
+        self.import_libraries("Bulk")
+        self.import_libraries_per_entry("PerEntry")
+
+        new_counts = get_counts()
+        for model_name in ROW_FIELDS:
+            if model_name not in MODEL_ROWS:
+                self.assertEqual(new_counts[model_name], counts[model_name], model_name)
+        for model_name in MODEL_ROWS:
+            model = apps.get_model("database", model_name)
+            model_counts = {
+                name: model.objects.filter(kinetic_model__model_name=name).count()
+                for name in ["Synthetic0", "Bulk", "PerEntry"]
+            }
+            self.assertEqual(model_counts["Bulk"], model_counts["PerEntry"], model_name)
+            # Names are only given to the species of efficiencies when their kinetics are new
+            if model_name != "SpeciesName":
+                self.assertEqual(model_counts["Bulk"], model_counts["Synthetic0"], model_name)
+
+
+class TestResumeImport(ImportTestCase):
+    def import_with_failure(self, failing_batch):
+        """
+        Import the models in batches of 5 entries, interrupting the import in the given batch
+        of kinetics, and resume it. Returns the checkpoint the interrupted import left.
+        """
+
+        bulk_import_kinetics = importer.bulk_import_kinetics
+        batches = []
+
+        def fail_batch(*args):
+            batches.append(args)
+            if len(batches) == failing_batch:
+                raise KeyboardInterrupt
+            bulk_import_kinetics(*args)
+
+        with mock.patch.object(importer, "IMPORT_BATCH_SIZE", 5):
+            with mock.patch.object(
+                importer, "bulk_import_kinetics", side_effect=fail_batch
+            ), self.assertRaises(KeyboardInterrupt):
+                self.import_models()
+            checkpoint = ImportState(self.state_path).checkpoint
+            self.import_models()
+
+        self.assertFalse(ImportState(self.state_path).has_checkpoint())
+
+        return checkpoint
+
+    def assert_matches_clean_import(self):
+        # Without duplicate names or comments from the batches imported before the failure
+        rows = get_rows({**ROW_FIELDS, **SUMMARY_FIELDS})
+        self.clean_import()
+        self.assertEqual(get_rows({**ROW_FIELDS, **SUMMARY_FIELDS}), rows)
+
+    def test_resume_after_failure(self):
+        checkpoint = self.import_with_failure(3)
+
+        # The import stopped in the kinetics of the first model, after two batches were committed
+        self.assertEqual(checkpoint["completed"], [])
+        ((_, libraries),) = checkpoint["entries"].items()
+        self.assertEqual(libraries["kinetics"]["count"], 10)
+        self.assert_matches_clean_import()
+
+    def test_resume_after_completed_model(self):
+        # Each model has 4 batches of kinetics, so this is the second batch of the second model
+        checkpoint = self.import_with_failure(6)
+
+        self.assertEqual(len(checkpoint["completed"]), 1)
+        ((_, libraries),) = checkpoint["entries"].items()
+        self.assertEqual(libraries["kinetics"]["count"], 5)
+        # The counts and equations of the completed model's reactions are updated by the resumed run
+        reactions = Reaction.objects.filter(
+            kinetics__kineticscomment__kinetic_model__model_name=checkpoint["completed"][0]
+        )
+        self.assertTrue(reactions.exists())
+        self.assertFalse(reactions.filter(kinetics_count=0).exists())
+        self.assertFalse(reactions.filter(kinetic_model_count=0).exists())
+        self.assertFalse(reactions.filter(equation="").exists())
+        self.assert_matches_clean_import()
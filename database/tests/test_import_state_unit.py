@@ -0,0 +1,83 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from database.scripts.import_state import ImportState, LibraryProgress, get_files_digest
+
+
+class TestImportState(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, contents):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as f:
+            f.write(contents)
+
+        return path
+
+    def test_digest_changes_with_contents(self):
+        path = self.write("reactions.py", "entry()")
+        digest = get_files_digest(path)
+        self.assertEqual(digest, get_files_digest(path))
+
+        self.write("reactions.py", "entry(index=1)")
+        self.assertNotEqual(digest, get_files_digest(path))
+
+    def test_missing_file_digest(self):
+        path = os.path.join(self.directory.name, "missing.txt")
+        self.assertEqual(get_files_digest(path), get_files_digest(self.write("missing.txt", "")))
+
+    def test_saved_state_is_loaded(self):
+        state = ImportState(self.path)
+        state.set_digest("GRI-Mech3.0", "thermo", "abc")
+        state.save()
+
+        loaded = ImportState(self.path)
+        self.assertEqual(loaded.get_digest("GRI-Mech3.0", "thermo"), "abc")
+        self.assertIsNone(loaded.get_digest("GRI-Mech3.0", "kinetics"))
+
+    def test_disabled(self):
+        state = ImportState("")
+        state.set_digest("GRI-Mech3.0", "thermo", "abc")
+        state.save()
+
+        self.assertEqual(state.get_digest("GRI-Mech3.0", "thermo"), "abc")
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_checkpoint(self):
+        state = ImportState(self.path)
+        state.complete_model("GRI-Mech3.0")
+        state.set_entries_done("BurkeH2O2", "kinetics", "abc", 5000)
+        state.save()
+
+        loaded = ImportState(self.path)
+        self.assertTrue(loaded.has_checkpoint())
+        self.assertTrue(loaded.is_completed("GRI-Mech3.0"))
+        self.assertEqual(loaded.get_entries_done("BurkeH2O2", "kinetics", "abc"), 5000)
+        self.assertEqual(loaded.get_entries_done("BurkeH2O2", "kinetics", "def"), 0)
+        self.assertEqual(loaded.get_entries_done("BurkeH2O2", "thermo", "abc"), 0)
+
+    def test_complete_model_drops_entries(self):
+        state = ImportState(self.path)
+        progress = LibraryProgress(state, "BurkeH2O2", "thermo", "abc")
+        progress.update(100)
+        self.assertEqual(progress.done, 100)
+
+        state.complete_model("BurkeH2O2")
+        self.assertEqual(progress.done, 0)
+        self.assertTrue(state.is_completed("BurkeH2O2"))
+
+    def test_clear_checkpoint_keeps_digests(self):
+        state = ImportState(self.path)
+        state.set_digest("GRI-Mech3.0", "thermo", "abc")
+        state.complete_model("GRI-Mech3.0")
+        state.clear_checkpoint()
+
+        self.assertFalse(state.has_checkpoint())
+        self.assertEqual(state.get_digest("GRI-Mech3.0", "thermo"), "abc")
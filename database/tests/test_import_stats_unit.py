@@ -0,0 +1,58 @@
+import os
+import json
+import tempfile
+
+from django.test import TestCase
+
+from database import models
+from database.scripts.import_stats import ImportStats, write_summary
+
+
+class TestImportStats(TestCase):
+    def test_counts_queries_and_entries(self):
+        stats = ImportStats()
+        with stats.time("formulas", entries=2):
+            models.Formula.objects.create(formula="H2O")
+            models.Formula.objects.create(formula="O2")
+        with stats.time("formulas") as stage:
+            list(models.Formula.objects.all())
+            stage.entries = 2
+
+        summary = stats.summary()["formulas"]
+        self.assertEqual(summary["entries"], 4)
+        self.assertEqual(summary["queries"], 3)
+        self.assertGreater(summary["seconds"], 0)
+
+    def test_nested_stages(self):
+        stats = ImportStats()
+        with stats.time("kinetic_model"):
+            with stats.time("thermo"):
+                models.Formula.objects.create(formula="H2O")
+
+        self.assertEqual(stats.queries["kinetic_model"], 1)
+        self.assertEqual(stats.queries["thermo"], 1)
+
+    def test_pop_and_merge(self):
+        stats = ImportStats()
+        stats.add("thermo", seconds=1, entries=10, queries=5)
+        popped = stats.pop()
+        self.assertEqual(stats.summary(), {})
+
+        merged = ImportStats()
+        merged.merge(popped)
+        merged.merge(popped)
+        self.assertEqual(
+            merged.summary()["thermo"],
+            {"seconds": 2, "entries": 20, "entries_per_second": 10.0, "queries": 10},
+        )
+
+    def test_write_summary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.jsonl")
+            write_summary(path, {"kinetic_model": "GRI-Mech3.0"})
+            write_summary(path, {"kinetic_model": None})
+
+            with open(path, "r") as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(records, [{"kinetic_model": "GRI-Mech3.0"}, {"kinetic_model": None}])
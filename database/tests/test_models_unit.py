@@ -0,0 +1,378 @@
+import math
+from unittest import mock
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+from database import models
+from database.filters import ReactionFilter, SpeciesFilter
+from database.models import kinetic_data, thermo_transport
+from database.tests.utils import get_si_arrhenius_data
+
+R = 8.314462618
+
+
+def get_arrhenius_data(a=1e13):
+    return {
+        "type": "arrhenius",
+        "a": a,
+        "a_si": a / 1e6,
+        "a_units": "cm^3/(mol*s)",
+        "n": 0.5,
+        "e": 10,
+        "e_si": 41840,
+        "e_units": "kcal/mol",
+    }
+
+
+class TestKineticsData(SimpleTestCase):
+    def test_dispatch_on_type(self):
+        data = kinetic_data.validate_kinetics_data(get_arrhenius_data(), returns=True)
+
+        self.assertIsInstance(data, kinetic_data.Arrhenius)
+        self.assertIs(kinetic_data.kinetics_data_types["troe"], kinetic_data.Troe)
+
+    def test_invalid_type(self):
+        with self.assertRaisesMessage(ValidationError, "Invalid type: falloff"):
+            kinetic_data.validate_kinetics_data({"type": "falloff"})
+
+    def test_invalid_fields(self):
+        raw_data = get_arrhenius_data()
+        del raw_data["n"]
+
+        with self.assertRaisesMessage(ValidationError, "n: field required"):
+            kinetic_data.validate_kinetics_data(raw_data)
+
+    def test_data_is_parsed_once(self):
+        kinetics = models.Kinetics(raw_data=get_arrhenius_data())
+        with mock.patch.object(
+            kinetic_data,
+            "validate_kinetics_data",
+            wraps=kinetic_data.validate_kinetics_data,
+        ) as validate:
+            kinetics.data
+            kinetics.type
+            kinetics.data.table_data()
+
+        self.assertEqual(validate.call_count, 1)
+
+    def test_data_changes_with_raw_data(self):
+        kinetics = models.Kinetics(raw_data=get_arrhenius_data())
+        self.assertEqual(kinetics.data.a, 1e13)
+
+        kinetics.raw_data["a"] = 2e13
+        self.assertEqual(kinetics.data.a, 2e13)
+
+        kinetics.raw_data = get_arrhenius_data(a=3e13)
+        self.assertEqual(kinetics.data.a, 3e13)
+
+
+class TestRateCoefficients(SimpleTestCase):
+    def test_arrhenius(self):
+        arrhenius = kinetic_data.Arrhenius(**get_si_arrhenius_data(1e7, n=0.5, e=4e4))
+        temps = np.array([300.0, 1000.0, 2000.0])
+
+        np.testing.assert_allclose(
+            arrhenius.get_rate_coefficient(temps),
+            1e7 * temps**0.5 * np.exp(-4e4 / (R * temps)),
+            rtol=1e-6,
+        )
+
+    def test_arrhenius_ep_activation_energy(self):
+        def get_arrhenius_ep(e0_si):
+            return kinetic_data.ArrheniusEP(
+                type="arrhenius_ep",
+                a=1e13,
+                a_si=1e7,
+                a_units="cm^3/(mol*s)",
+                n=0,
+                alpha=0.5,
+                e0=e0_si / 4184,
+                e0_si=e0_si,
+                e0_units="kcal/mol",
+            )
+
+        arrhenius_ep = get_arrhenius_ep(1e4)
+        self.assertEqual(arrhenius_ep.get_activation_energy(-5e4), 0)
+        self.assertEqual(arrhenius_ep.get_activation_energy(-3e4), -5e3)
+        self.assertEqual(arrhenius_ep.get_activation_energy(3e4), 2.5e4)
+        self.assertEqual(arrhenius_ep.get_activation_energy(5e4), 5e4)
+        # Without a positive intrinsic barrier the energy isn't clamped
+        arrhenius_ep = get_arrhenius_ep(-1e4)
+        self.assertEqual(arrhenius_ep.get_activation_energy(-5e4), -3.5e4)
+        self.assertEqual(arrhenius_ep.get_activation_energy(5e4), 1.5e4)
+
+    def test_pdep_arrhenius_interpolates_in_log_pressure(self):
+        pdep_arrhenius = kinetic_data.PDepArrhenius(
+            type="pdep_arrhenius",
+            pressure_set=[
+                {"pressure": 1e4, "arrhenius": get_si_arrhenius_data(1e6)},
+                {"pressure": 1e6, "arrhenius": get_si_arrhenius_data(1e8)},
+            ],
+        )
+
+        np.testing.assert_allclose(
+            pdep_arrhenius.get_rate_coefficient(1000, [1e3, 1e4, 1e5, 1e6, 1e7]),
+            [1e6, 1e6, 1e7, 1e8, 1e8],
+        )
+        with self.assertRaises(ValueError):
+            pdep_arrhenius.get_rate_coefficient(1000)
+
+    def test_troe_over_a_grid(self):
+        troe = kinetic_data.Troe(
+            type="troe",
+            low_arrhenius=get_si_arrhenius_data(1e4, n=-1),
+            high_arrhenius=get_si_arrhenius_data(1e8, n=0.2, e=1e4),
+            alpha=0.6,
+            t1=1000,
+            t3=100,
+        )
+        temps = np.array([500.0, 1500.0])
+        pressures = np.array([1e3, 1e5, 1e7])
+
+        def get_troe_rate_coefficient(temp, pressure):
+            k_inf = 1e8 * temp**0.2 * math.exp(-1e4 / (R * temp))
+            reduced_pressure = 1e4 / temp * pressure / (R * temp) / k_inf
+            log_f_cent = math.log10(0.4 * math.exp(-temp / 100) + 0.6 * math.exp(-temp / 1000))
+            c = -0.4 - 0.67 * log_f_cent
+            n = 0.75 - 1.27 * log_f_cent
+            x = (math.log10(reduced_pressure) + c) / (n - 0.14 * (math.log10(reduced_pressure) + c))
+            f = 10 ** (log_f_cent / (1 + x**2))
+            return k_inf * reduced_pressure / (1 + reduced_pressure) * f
+
+        np.testing.assert_allclose(
+            troe.get_rate_coefficient(temps[:, None], pressures[None, :]),
+            [[get_troe_rate_coefficient(t, p) for p in pressures] for t in temps],
+            rtol=1e-6,
+        )
+
+    def test_chebyshev_requires_bounds(self):
+        chebyshev = kinetic_data.Chebyshev(
+            type="chebyshev", coefficient_matrix=[[10.0, 0.5], [-1.0, 0.2]], units="m^3/(mol*s)"
+        )
+
+        with self.assertRaises(ValueError):
+            chebyshev.get_rate_coefficient(1000, 1e5)
+        # At the center of the reduced ranges only the constant coefficient contributes
+        center_temp = 2 / (1 / 300 + 1 / 2000)
+        k = chebyshev.get_rate_coefficient(center_temp, 1e5, 300, 2000, 1e3, 1e7)
+        self.assertAlmostEqual(float(np.log10(k)), 10.0)
+
+    def test_kinetics_passes_its_bounds(self):
+        raw_data = {
+            "type": "chebyshev",
+            "coefficient_matrix": [[10.0, 0.5], [-1.0, 0.2]],
+            "units": "m^3/(mol*s)",
+        }
+        kinetics = models.Kinetics(
+            raw_data=raw_data, min_temp=300, max_temp=2000, min_pressure=1e3, max_pressure=1e7
+        )
+
+        self.assertEqual(kinetics.get_rate_coefficient([500, 1000], 1e5).shape, (2,))
+
+
+COEFFS_POLY1 = [3.5, 1e-3, -2e-6, 3e-9, -1e-12, -1000.0, 4.0]
+COEFFS_POLY2 = [3.0, 2e-3, -5e-7, 8e-11, -5e-15, -900.0, 6.0]
+
+
+def get_nasa_enthalpy(coeffs, temp):
+    c1, c2, c3, c4, c5, c6, _ = coeffs
+    return (
+        c1 * temp + c2 * temp**2 / 2 + c3 * temp**3 / 3 + c4 * temp**4 / 4 + c5 * temp**5 / 5 + c6
+    ) * R
+
+
+class TestThermoPolynomials(SimpleTestCase):
+    def setUp(self):
+        self.thermo = models.Thermo(
+            coeffs_poly1=COEFFS_POLY1,
+            coeffs_poly2=COEFFS_POLY2,
+            temp_min_1=200,
+            temp_max_1=1000,
+            temp_min_2=1000,
+            temp_max_2=6000,
+        )
+
+    def test_selects_polynomial_per_temperature(self):
+        temps = np.array([300.0, 999.0, 1000.0, 3000.0])
+        expected = [
+            get_nasa_enthalpy(COEFFS_POLY1 if temp < 1000 else COEFFS_POLY2, temp) for temp in temps
+        ]
+
+        np.testing.assert_allclose(self.thermo.enthalpy(temps), expected)
+        self.assertAlmostEqual(self.thermo.enthalpy(300.0), expected[0])
+        self.assertAlmostEqual(
+            self.thermo.heat_capacity(300.0),
+            (3.5 + 1e-3 * 300 - 2e-6 * 300**2 + 3e-9 * 300**3 - 1e-12 * 300**4) * R,
+        )
+        np.testing.assert_allclose(
+            self.thermo.free_energy(temps),
+            self.thermo.enthalpy(temps) - temps * self.thermo.entropy(temps),
+        )
+
+    def test_update_summary(self):
+        self.thermo.update_summary()
+
+        self.assertAlmostEqual(self.thermo.enthalpy298, get_nasa_enthalpy(COEFFS_POLY1, 298.15))
+        self.assertAlmostEqual(self.thermo.entropy298, self.thermo.entropy(298.15))
+        np.testing.assert_allclose(
+            self.thermo.heat_capacities,
+            self.thermo.heat_capacity(thermo_transport.HEAT_CAPACITY_TEMPS),
+        )
+
+        self.thermo.temp_min_1 = 400
+        self.thermo.update_summary()
+        self.assertIsNone(self.thermo.enthalpy298)
+        self.assertIsNone(self.thermo.heat_capacities[0])
+        self.assertIsNotNone(self.thermo.heat_capacities[1])
+
+    def test_out_of_bounds(self):
+        with self.assertRaises(ValueError):
+            self.thermo.entropy(100.0)
+        with self.assertRaises(ValueError):
+            self.thermo.entropy([300.0, 7000.0])
+
+    def test_batch(self):
+        temps = np.array([300.0, 1500.0, 3000.0])
+        other = {
+            "coeffs_poly1": COEFFS_POLY2,
+            "coeffs_poly2": COEFFS_POLY1,
+            "temp_min_1": 300,
+            "temp_max_1": 500,
+            "temp_max_2": 2000,
+        }
+        properties = thermo_transport.get_thermo_properties([self.thermo, other], temps)
+
+        self.assertEqual(properties["heat_capacity"].shape, (2, 3))
+        for name in ["heat_capacity", "enthalpy", "entropy", "free_energy"]:
+            np.testing.assert_allclose(properties[name][0], getattr(self.thermo, name)(temps))
+        np.testing.assert_allclose(
+            properties["enthalpy"][1, :2],
+            [get_nasa_enthalpy(COEFFS_POLY2, 300.0), get_nasa_enthalpy(COEFFS_POLY1, 1500.0)],
+        )
+        self.assertTrue(np.isnan(properties["enthalpy"][1, 2]))
+
+
+class TestThermoSummary(TestCase):
+    def create_thermo(self, hash, constant):
+        species = models.Species.objects.create(hash=hash)
+        return models.Thermo.objects.create(
+            species=species,
+            coeffs_poly1=[3.5, 0, 0, 0, 0, constant, 4.0],
+            coeffs_poly2=[3.5, 0, 0, 0, 0, constant, 4.0],
+            temp_min_1=200,
+            temp_max_1=1000,
+            temp_min_2=1000,
+            temp_max_2=6000,
+        )
+
+    def test_saved_and_filtered(self):
+        low = self.create_thermo("low", -1000.0)
+        high = self.create_thermo("high", 1000.0)
+
+        self.assertEqual(
+            list(models.Thermo.objects.order_by("enthalpy298").values_list("id", flat=True)),
+            [low.id, high.id],
+        )
+        species_filter = SpeciesFilter(
+            {"thermo__enthalpy298_min": "0"}, queryset=models.Species.objects.all()
+        )
+        self.assertEqual(list(species_filter.qs), [high.species])
+
+
+class TestReactionCounts(TestCase):
+    def test_counts_follow_kinetics(self):
+        source = models.Source.objects.create()
+        kinetic_models = [
+            models.KineticModel.objects.create(model_name=name, source=source)
+            for name in ["model1", "model2"]
+        ]
+        reaction = models.Reaction.objects.create(hash="reaction", reversible=True)
+        kinetics = [
+            models.Kinetics.objects.create(reaction=reaction, raw_data=get_arrhenius_data())
+            for _ in range(2)
+        ]
+        models.KineticsComment.objects.create(kinetics=kinetics[0], kinetic_model=kinetic_models[0])
+        models.KineticsComment.objects.create(kinetics=kinetics[1], kinetic_model=kinetic_models[0])
+        comment = models.KineticsComment.objects.create(
+            kinetics=kinetics[1], kinetic_model=kinetic_models[1]
+        )
+
+        reaction.refresh_from_db()
+        self.assertEqual((reaction.kinetics_count, reaction.kinetic_model_count), (2, 2))
+
+        comment.delete()
+        kinetics[0].delete()
+        reaction.refresh_from_db()
+        self.assertEqual((reaction.kinetics_count, reaction.kinetic_model_count), (1, 1))
+
+    def test_update_reaction_counts(self):
+        reaction = models.Reaction.objects.create(hash="reaction", reversible=True)
+        models.Kinetics.objects.bulk_create(
+            [models.Kinetics(reaction=reaction, raw_data=get_arrhenius_data())]
+        )
+
+        models.update_reaction_counts(models.Reaction.objects.all())
+        reaction.refresh_from_db()
+        self.assertEqual((reaction.kinetics_count, reaction.kinetic_model_count), (1, 0))
+
+
+class TestReactionEquations(TestCase):
+    def create_species(self, formula):
+        formula, _ = models.Formula.objects.get_or_create(formula=formula)
+        isomer = models.Isomer.objects.create(inchi=f"InChI={formula}", formula=formula)
+        species = models.Species.objects.create(hash=formula.formula)
+        species.isomers.add(isomer)
+
+        return species
+
+    def create_reactions(self):
+        h, h2, ch4, ch3 = [self.create_species(f) for f in ["H", "H2", "CH4", "CH3"]]
+        for index, stoichiometry in enumerate([[(-1, ch4), (-1, h), (1, ch3), (1, h2)], [(-2, h)]]):
+            reaction = models.Reaction.objects.create(hash=str(index), reversible=True)
+            for coeff, species in stoichiometry:
+                models.Stoichiometry.objects.create(reaction=reaction, species=species, coeff=coeff)
+
+    def test_stored_equations(self):
+        self.create_reactions()
+
+        with self.assertNumQueries(1):
+            equations = [reaction.equation for reaction in models.Reaction.objects.order_by("id")]
+
+        self.assertEqual(equations, ["CH4 + H <=> H2 + CH3", "2H <=> "])
+        self.assertTrue(models.Species.objects.filter(formula="CH4").exists())
+        self.assertTrue(models.Reaction.objects.filter(equation__contains="H2 + CH3").exists())
+
+    def test_filter_by_equation(self):
+        self.create_reactions()
+
+        reaction_filter = ReactionFilter(
+            {"equation": "ch4 + h"}, queryset=models.Reaction.objects.all()
+        )
+        self.assertEqual([r.equation for r in reaction_filter.qs], ["CH4 + H <=> H2 + CH3"])
+
+    def test_equation_on_reaction_save(self):
+        self.create_reactions()
+        reaction = models.Reaction.objects.order_by("id").first()
+
+        with self.assertNumQueries(1):
+            reaction.save()
+        reaction.reversible = False
+        reaction.save()
+
+        reaction.refresh_from_db()
+        self.assertEqual(reaction.equation, "CH4 + H -> H2 + CH3")
+
+    def test_update_equations(self):
+        self.create_reactions()
+        expected = [reaction.get_equation() for reaction in models.Reaction.objects.order_by("id")]
+        models.Species.objects.update(formula="")
+        models.Reaction.objects.update(equation="")
+
+        models.update_species_formulas(models.Species.objects.all())
+        with self.assertNumQueries(4):
+            models.update_reaction_equations(models.Reaction.objects.all(), batch_size=10)
+
+        equations = [reaction.equation for reaction in models.Reaction.objects.order_by("id")]
+        self.assertEqual(equations, expected)
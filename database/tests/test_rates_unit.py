@@ -0,0 +1,215 @@
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from database import models
+from database.caching import get_cache_key, invalidate_cache
+from database.models import kinetic_data
+from database.rates import (
+    get_rate_coefficients,
+    get_kinetic_model_rate_coefficients,
+    get_reaction_rate_comparisons,
+)
+from database.tests.utils import get_si_arrhenius_data
+
+
+def get_row(raw_data, kinetics_id=1, **bounds):
+    row = {"id": kinetics_id, "reaction_id": kinetics_id, "reverse": False, "raw_data": raw_data}
+    for field in ["min_temp", "max_temp", "min_pressure", "max_pressure"]:
+        row[field] = bounds.get(field)
+
+    return row
+
+
+RAW_DATA = [
+    get_si_arrhenius_data(1e7, n=0.5, e=4e4),
+    {
+        "type": "multi_arrhenius",
+        "arrhenius_set": [get_si_arrhenius_data(1e6, e=1e4), get_si_arrhenius_data(1e8, e=6e4)],
+    },
+    {"type": "multi_arrhenius", "arrhenius_set": []},
+    {"type": "third_body", "low_arrhenius": get_si_arrhenius_data(1e3, n=-1), "efficiency_set": []},
+    {
+        "type": "lindemann",
+        "low_arrhenius": get_si_arrhenius_data(1e4, n=-1),
+        "high_arrhenius": get_si_arrhenius_data(1e8, n=0.2, e=1e4),
+        "efficiency_set": [],
+    },
+    {
+        "type": "troe",
+        "low_arrhenius": get_si_arrhenius_data(1e4, n=-1),
+        "high_arrhenius": get_si_arrhenius_data(1e8, n=0.2, e=1e4),
+        "alpha": 0.6,
+        "t1": 1000,
+        "t2": 0,
+        "t3": 100,
+        "efficiency_set": [],
+    },
+    {
+        "type": "pdep_arrhenius",
+        "pressure_set": [
+            {"pressure": 1e4, "arrhenius": get_si_arrhenius_data(1e6)},
+            {"pressure": 1e6, "arrhenius": get_si_arrhenius_data(1e8)},
+        ],
+    },
+]
+
+
+class TestGetRateCoefficients(SimpleTestCase):
+    temps = np.array([500.0, 1000.0, 1500.0])
+    pressures = np.array([1e3, 1e5, 1e7])
+
+    def test_matches_each_kinetics(self):
+        rows = [get_row(raw_data, index) for index, raw_data in enumerate(RAW_DATA, start=1)]
+        rate_coefficients = get_rate_coefficients(rows, self.temps, self.pressures)
+
+        self.assertEqual(rate_coefficients.values.shape, (len(RAW_DATA), 3, 3))
+        np.testing.assert_array_equal(rate_coefficients.kinetics_ids, range(1, len(RAW_DATA) + 1))
+        for raw_data, values in zip(RAW_DATA, rate_coefficients.values):
+            data = kinetic_data.validate_kinetics_data(raw_data, returns=True)
+            np.testing.assert_allclose(
+                values,
+                data.get_rate_coefficient(self.temps[:, np.newaxis], self.pressures),
+                rtol=1e-10,
+            )
+
+    def test_pressure_dependent_without_pressures(self):
+        rows = [get_row(raw_data, index) for index, raw_data in enumerate(RAW_DATA, start=1)]
+        rate_coefficients = get_rate_coefficients(rows, self.temps)
+
+        self.assertEqual(rate_coefficients.values.shape, (len(RAW_DATA), 3))
+        np.testing.assert_array_equal(
+            np.isnan(rate_coefficients.values).all(axis=1),
+            [raw_data["type"] not in ("arrhenius", "multi_arrhenius") for raw_data in RAW_DATA],
+        )
+
+    def test_arrhenius_ep_without_reaction_enthalpy(self):
+        raw_data = {
+            "type": "arrhenius_ep",
+            "a": 1e13,
+            "a_si": 1e7,
+            "a_units": "cm^3/(mol*s)",
+            "n": 0,
+            "alpha": 0.5,
+            "e0": 10,
+            "e0_si": 41840,
+            "e0_units": "kcal/mol",
+        }
+        rate_coefficients = get_rate_coefficients([get_row(raw_data)], self.temps)
+
+        self.assertTrue(np.isnan(rate_coefficients.values).all())
+
+    def test_invalid_raw_data(self):
+        rows = [get_row({"type": "unknown"}), get_row(RAW_DATA[0], 2)]
+        rate_coefficients = get_rate_coefficients(rows, self.temps)
+
+        self.assertTrue(np.isnan(rate_coefficients.values[0]).all())
+        self.assertFalse(np.isnan(rate_coefficients.values[1]).any())
+
+
+class TestGetKineticModelRateCoefficients(TestCase):
+    def test_kinetics_of_kinetic_model(self):
+        source = models.Source.objects.create()
+        kinetic_model = models.KineticModel.objects.create(source=source)
+        other_kinetic_model = models.KineticModel.objects.create(source=source)
+        kinetics = []
+        for index, raw_data in enumerate(RAW_DATA[:2]):
+            reaction = models.Reaction.objects.create(hash=f"reaction{index}", reversible=True)
+            kinetics.append(
+                models.Kinetics.objects.create(reaction=reaction, raw_data=raw_data, reverse=True)
+            )
+            models.KineticsComment.objects.create(
+                kinetics=kinetics[-1], kinetic_model=kinetic_model
+            )
+        reaction = models.Reaction.objects.create(hash="other", reversible=True)
+        other_kinetics = models.Kinetics.objects.create(reaction=reaction, raw_data=RAW_DATA[0])
+        models.KineticsComment.objects.create(
+            kinetics=other_kinetics, kinetic_model=other_kinetic_model
+        )
+
+        with self.assertNumQueries(1):
+            rate_coefficients = get_kinetic_model_rate_coefficients(kinetic_model, [1000.0])
+
+        np.testing.assert_array_equal(rate_coefficients.kinetics_ids, [k.id for k in kinetics])
+        np.testing.assert_array_equal(
+            rate_coefficients.reaction_ids, [k.reaction_id for k in kinetics]
+        )
+        self.assertTrue(rate_coefficients.reverse.all())
+        np.testing.assert_allclose(
+            rate_coefficients.values[:, 0],
+            [k.get_rate_coefficient(1000.0) for k in kinetics],
+        )
+
+
+class TestRateComparisons(TestCase):
+    def setUp(self):
+        cache.clear()
+        source = models.Source.objects.create()
+        self.reaction = models.Reaction.objects.create(hash="reaction", reversible=True)
+        for name, a in [("model1", 1e5), ("model2", 1e7)]:
+            kinetic_model = models.KineticModel.objects.create(model_name=name, source=source)
+            kinetics = models.Kinetics.objects.create(
+                reaction=self.reaction, raw_data=get_si_arrhenius_data(a)
+            )
+            models.KineticsComment.objects.create(kinetics=kinetics, kinetic_model=kinetic_model)
+
+    def test_spread_across_kinetic_models(self):
+        with self.assertNumQueries(2):
+            comparison = get_reaction_rate_comparisons([self.reaction.id], [500.0, 1000.0])[
+                self.reaction.id
+            ]
+        with self.assertNumQueries(0):
+            get_reaction_rate_comparisons([self.reaction.id], [500.0, 1000.0])
+
+        self.assertEqual(
+            [kinetics["kinetic_models"] for kinetics in comparison["kinetics"]],
+            [["model1"], ["model2"]],
+        )
+        self.assertEqual(comparison["statistics"]["count"], [2, 2])
+        np.testing.assert_allclose(comparison["statistics"]["min"], [1e5, 1e5])
+        np.testing.assert_allclose(comparison["statistics"]["max"], [1e7, 1e7])
+        np.testing.assert_allclose(comparison["statistics"]["log10_std"], [1.0, 1.0])
+
+    def test_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("reviewer"))
+
+        response = client.get(
+            reverse("api-reaction-rates", args=[self.reaction.id]), {"temps": "500,1000"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["temps"], [500.0, 1000.0])
+
+        response = client.get(reverse("api-reaction-list-rates"), {"ids": f"{self.reaction.id},0"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [comparison["reaction"] for comparison in response.data], [self.reaction.id]
+        )
+
+        response = client.get(reverse("api-reaction-list-rates"), {"ids": "a"})
+        self.assertEqual(response.status_code, 400)
+        for temps in ["nan", "500,inf"]:
+            response = client.get(
+                reverse("api-reaction-rates", args=[self.reaction.id]), {"temps": temps}
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class TestInvalidateCache(TestCase):
+    def test_invalidate(self):
+        key = get_cache_key("rates", "comparison")
+        invalidate_cache("rates")
+
+        self.assertNotEqual(get_cache_key("rates", "comparison"), key)
+
+    def test_without_cache_table(self):
+        with mock.patch.object(cache, "incr", side_effect=DatabaseError):
+            invalidate_cache("rates")
+
+        self.assertFalse(models.Kinetics.objects.exists())
@@ -0,0 +1,67 @@
+import os
+import random
+import tempfile
+
+from django.test import SimpleTestCase
+
+from database.scripts.synthetic_rmg_models import (
+    generate_rmg_models,
+    get_alkyl_adjacency_list,
+    get_reactions,
+)
+
+
+class TestSyntheticRmgModels(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, *path):
+        with open(os.path.join(self.directory.name, *path), "r") as f:
+            return f.read()
+
+    def test_layout(self):
+        generate_rmg_models(self.directory.name, models=2, species=10, reactions=5)
+
+        for name in ["Synthetic0", "Synthetic1"]:
+            self.assertIn("10.0000/synthetic", self.read(name, "source.txt"))
+            thermo = self.read(name, "RMG-Py-thermo-library", "ThermoLibrary.py")
+            self.assertEqual(thermo.count("entry("), 10)
+            reactions = self.read(name, "RMG-Py-kinetics-library", "reactions.py")
+            self.assertEqual(reactions.count("entry("), 5)
+            dictionary = self.read(name, "RMG-Py-kinetics-library", "dictionary.txt")
+            self.assertEqual(dictionary.count("\n\n"), 10)
+
+    def test_deterministic(self):
+        generate_rmg_models(self.directory.name, species=10, reactions=10, seed=1)
+        reactions = self.read("Synthetic0", "RMG-Py-kinetics-library", "reactions.py")
+        generate_rmg_models(self.directory.name, species=10, reactions=10, seed=1)
+
+        self.assertEqual(
+            reactions, self.read("Synthetic0", "RMG-Py-kinetics-library", "reactions.py")
+        )
+
+    def test_unknown_kinetics_type(self):
+        with self.assertRaises(ValueError):
+            generate_rmg_models(self.directory.name, kinetics_mix={"falloff": 1})
+
+    def test_alkyl_radical_adjacency_list(self):
+        self.assertEqual(
+            get_alkyl_adjacency_list(1, radical=True),
+            "multiplicity 2\n"
+            "1 C u1 p0 c0 {2,S} {3,S} {4,S}\n"
+            "2 H u0 p0 c0 {1,S}\n"
+            "3 H u0 p0 c0 {1,S}\n"
+            "4 H u0 p0 c0 {1,S}\n",
+        )
+
+    def test_reactions_are_distinct_and_match_kinetics_types(self):
+        reactions = get_reactions(4, 100, {"arrhenius": 1, "troe": 1}, random.Random(0))
+        labels = [label for label, _ in reactions]
+
+        self.assertEqual(len(labels), len(set(labels)))
+        for label, kinetics_type in reactions:
+            products = label.split(" <=> ")[1]
+            self.assertEqual(" + " not in products, kinetics_type == "troe")
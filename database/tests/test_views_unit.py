@@ -1,10 +1,17 @@
+import io
 import random
 import string
+import tempfile
 
 from django.core.files.base import ContentFile
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from database import models, views
+from database.drawing import get_image_name, get_image_url
 
 
 def create_kinetic_model_with_detail_view_dependencies():
@@ -94,6 +101,51 @@ class TestKineticModelDetail(TestCase):
         for thermo, transport in thermo_transport:
             self.assertEqual(thermo.thermo.species.pk, transport.transport.species.pk)
 
+    def create_species_with_thermo_transport(self, kinetic_model, count):
+        for _ in range(count):
+            species = create_species()
+            kinetic_model.thermo.add(create_thermo(species=species))
+            kinetic_model.transport.add(models.Transport.objects.create(species=species))
+
+    def test_keyset_pages(self):
+        kinetic_model = create_kinetic_model_with_detail_view_dependencies()
+        paginate_per_page = views.KineticModelDetail.cls.paginate_per_page
+        self.create_species_with_thermo_transport(kinetic_model, paginate_per_page + 5)
+        url = reverse("kinetic-model-detail", args=[kinetic_model.pk])
+
+        first_page = self.client.get(url).context["thermo_transport"]
+        last_page = self.client.get(url, {"after1": first_page.next_key}).context[
+            "thermo_transport"
+        ]
+        previous_page = self.client.get(url, {"before1": last_page.previous_key}).context[
+            "thermo_transport"
+        ]
+
+        self.assertEqual(len(first_page), paginate_per_page)
+        self.assertEqual(len(last_page), 5)
+        self.assertFalse(last_page.has_next())
+        species_ids = [thermo.thermo.species.pk for thermo, _ in first_page]
+        self.assertEqual(species_ids, sorted(species_ids))
+        self.assertLess(species_ids[-1], last_page.object_list[0][0].thermo.species.pk)
+        self.assertEqual(
+            [thermo.pk for thermo, _ in previous_page], [thermo.pk for thermo, _ in first_page]
+        )
+
+    def test_query_count_independent_of_model_size(self):
+        """
+        A page takes the same number of queries however many species the kinetic model has
+        """
+
+        kinetic_model = create_kinetic_model_with_detail_view_dependencies()
+        url = reverse("kinetic-model-detail", args=[kinetic_model.pk])
+        self.create_species_with_thermo_transport(kinetic_model, 2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        self.create_species_with_thermo_transport(kinetic_model, 40)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
 
     def test_download_links_present(self):
         kinetic_model = create_kinetic_model_with_detail_view_dependencies()
@@ -129,3 +181,137 @@ class TestKineticModelDetail(TestCase):
         download_content = "<h2>Downloads</h2>"
         response_content = "".join(response.content.decode("utf-8").split()).replace('"', "'")
         self.assertFalse(download_content in response_content)
+
+
+class TestSpeciesDetail(TestCase):
+    def test_query_budget(self):
+        """
+        A popular species renders with a fixed number of queries: the species, its names,
+        structures and isomers, its thermo and transport with their kinetic models,
+        and the count and page of its reactions
+        """
+
+        species = create_species()
+        for index in range(3):
+            kinetic_model = models.KineticModel.objects.create(model_name=str(index))
+            kinetic_model.thermo.add(create_thermo(species=species))
+            kinetic_model.transport.add(models.Transport.objects.create(species=species))
+        for index in range(views.SpeciesDetail.cls.paginate_per_page + 1):
+            reaction = models.Reaction.objects.create(hash=str(index), reversible=True)
+            models.Stoichiometry.objects.create(reaction=reaction, species=species, coeff=-1)
+
+        with self.assertNumQueries(10):
+            response = self.client.get(reverse("species-detail", args=[species.pk]))
+
+        self.assertEqual(len(response.context["thermo_list"]), 3)
+        paginate_per_page = views.SpeciesDetail.cls.paginate_per_page
+        self.assertEqual(len(response.context["reactions"]), paginate_per_page)
+
+
+class TestSidebarLookup(TestCase):
+    def test_found_redirects(self):
+        species = create_species()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("home"), {"species_pk": species.pk})
+
+        self.assertRedirects(response, reverse("species-detail", args=[species.pk]))
+
+    def test_missing_resolved_once(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("home"), {"reaction_pk": 1, "source_pk": 1})
+
+        self.assertEqual(response.context["reaction_invalid"], "Reaction with that ID wasn't found")
+        self.assertNotIn("source_invalid", response.context)
+
+    def test_invalid_id(self):
+        response = self.client.get(reverse("home"), {"species_pk": "abc"})
+
+        self.assertEqual(response.context["species_invalid"], "Species with that ID wasn't found")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestDrawStructure(TestCase):
+    def setUp(self):
+        formula = models.Formula.objects.create(formula="H")
+        isomer = models.Isomer.objects.create(inchi="InChI=1S/H", formula=formula)
+        self.structure = models.Structure.objects.create(
+            adjacency_list="multiplicity 2\n1 H u1 p0 c0", multiplicity=2, isomer=isomer
+        )
+        self.url = reverse("draw-structure", args=[self.structure.pk])
+
+    def test_stored_and_cached(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("no-cache", response["Cache-Control"])
+        name = get_image_name(self.structure.pk, self.structure.adjacency_list)
+        self.assertTrue(default_storage.exists(name))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_adjacency_list(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.structure.adjacency_list = "1 H u0 p0 c0 {2,S}\n2 H u0 p0 c0 {1,S}"
+        self.structure.save()
+
+        self.assertNotEqual(self.client.get(self.url)["ETag"], etag)
+
+    def test_versioned_url_cached(self):
+        url = get_image_url(self.structure)
+
+        self.assertIn("immutable", self.client.get(url)["Cache-Control"])
+        self.structure.adjacency_list = "1 H u0 p0 c0 {2,S}\n2 H u0 p0 c0 {1,S}"
+        self.structure.save()
+        self.assertNotEqual(get_image_url(self.structure), url)
+        self.assertIn("no-cache", self.client.get(url)["Cache-Control"])
+
+    def test_svg(self):
+        response = self.client.get(self.url, {"format": "svg"})
+
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", response.content)
+        self.assertNotEqual(response["ETag"], self.client.get(self.url)["ETag"])
+
+    def test_batch(self):
+        url = reverse("draw-structures")
+
+        response = self.client.get(url, {"ids": f"{self.structure.pk},0"})
+
+        drawings = response.json()
+        self.assertEqual(list(drawings), [str(self.structure.pk)])
+        self.assertIn("<svg", drawings[str(self.structure.pk)])
+        self.assertIn("no-cache", response["Cache-Control"])
+        response = self.client.get(
+            url, {"ids": f"{self.structure.pk},0"}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(url, {"ids": "a"}).status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestRenderStructures(TestCase):
+    def setUp(self):
+        formula = models.Formula.objects.create(formula="H")
+        isomer = models.Isomer.objects.create(inchi="InChI=1S/H", formula=formula)
+        self.structure = models.Structure.objects.create(
+            adjacency_list="multiplicity 2\n1 H u1 p0 c0", multiplicity=2, isomer=isomer
+        )
+
+    def image_exists(self, file_format):
+        return default_storage.exists(
+            get_image_name(self.structure.pk, self.structure.adjacency_list, file_format)
+        )
+
+    def test_svg(self):
+        call_command("render_structures", workers=1, format="svg", stdout=io.StringIO())
+
+        self.assertTrue(self.image_exists("svg"))
+        self.assertFalse(self.image_exists("png"))
+
+    def test_all_formats(self):
+        call_command("render_structures", workers=1, stdout=io.StringIO())
+
+        self.assertTrue(self.image_exists("png"))
+        self.assertTrue(self.image_exists("svg"))
@@ -0,0 +1,15 @@
+def get_si_arrhenius_data(a, n=0.0, e=0.0):
+    """
+    Get the raw data of an Arrhenius expression in SI units
+    """
+
+    return {
+        "type": "arrhenius",
+        "a": a,
+        "a_si": a,
+        "a_units": "m^3/(mol*s)",
+        "n": n,
+        "e": e,
+        "e_si": e,
+        "e_units": "J/mol",
+    }
@@ -42,4 +42,5 @@ urlpatterns = [
     path(r"kinetics/<int:pk>", views.KineticsDetail.as_view(), name="kinetics-detail"),
     path(r"kineticmodel/<int:pk>", views.KineticModelDetail.as_view(), name="kinetic-model-detail"),
     path(r"drawstructure/<int:pk>", views.DrawStructure.as_view(), name="draw-structure"),
+    path(r"drawstructures/", views.DrawStructures.as_view(), name="draw-structures"),
 ]
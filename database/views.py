@@ -7,13 +7,14 @@ from django.contrib.auth import login
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db.models import Prefetch, Q
 from django.views import View
 from django.views.generic import TemplateView, DetailView
 from django.views.generic.edit import FormView
 from django_filters.views import FilterView
-from django.http import HttpResponse
-from django.utils.html import format_html
-from rmgpy.molecule.draw import MoleculeDrawer
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
 
 from database import models
 from .models import (
@@ -25,13 +26,31 @@ from .models import (
     Source,
     Reaction,
     Kinetics,
+    ThermoComment,
+    TransportComment,
 )
+from .drawing import CONTENT_TYPES, get_adjacency_list_digest, get_structure_image
 from .filters import SpeciesFilter, ReactionFilter, SourceFilter
 from .forms import RegistrationForm
+from .pagination import get_keyset_page
 from database.templatetags import renders
 
 
 class SidebarLookup:
+    """
+    Wraps a view to redirect to the species, reaction or source searched by ID in the sidebar,
+    or to show an error in the sidebar if it isn't found.
+
+    The search is resolved once per request, with an `exists()` query,
+    and the result is shared between `get` and `get_context_data`.
+    """
+
+    lookups = [
+        ("species_pk", Species, "species-detail", "species_invalid", "Species"),
+        ("reaction_pk", Reaction, "reaction-detail", "reaction_invalid", "Reaction"),
+        ("source_pk", Source, "source-detail", "source_invalid", "Source"),
+    ]
+
     def __init__(self, cls, *args, **kwargs):
         cls.get = self.lookup_get(cls.get)
         cls.get_context_data = self.lookup_get_context_data(cls.get_context_data)
@@ -40,68 +59,55 @@ class SidebarLookup:
     def as_view(self, *args, **kwargs):
         return self.cls.as_view(*args, **kwargs)
 
+    @classmethod
+    def resolve(cls, request):
+        """
+        Get the (pk, lookup, found) of the first ID searched in the request, or None,
+        which is cached on the request
+        """
+
+        if not hasattr(request, "sidebar_lookup"):
+            request.sidebar_lookup = None
+            for lookup in cls.lookups:
+                pk = request.GET.get(lookup[0])
+                if pk:
+                    try:
+                        found = lookup[1].objects.filter(pk=pk).exists()
+                    except ValueError:
+                        found = False
+                    request.sidebar_lookup = (pk, lookup, found)
+                    break
+
+        return request.sidebar_lookup
+
     def lookup_get(self, func):
+        resolve = self.resolve
+
         @functools.wraps(func)
         def inner(self, request, *args, **kwargs):
-            species_pk = request.GET.get("species_pk")
-            reaction_pk = request.GET.get("reaction_pk")
-            source_pk = request.GET.get("source_pk")
-            if species_pk:
-                try:
-                    Species.objects.get(pk=species_pk)
-                    return HttpResponseRedirect(reverse("species-detail", args=[species_pk]))
-                except Species.DoesNotExist:
-                    response = func(self, request, *args, **kwargs)
-                    return response
-            elif reaction_pk:
-                try:
-                    Reaction.objects.get(pk=reaction_pk)
-                    return HttpResponseRedirect(reverse("reaction-detail", args=[reaction_pk]))
-                except Reaction.DoesNotExist:
-                    return func(self, request, *args, **kwargs)
-            elif source_pk:
-                try:
-                    Source.objects.get(pk=source_pk)
-                    return HttpResponseRedirect(reverse("source-detail", args=[source_pk]))
-                except Source.DoesNotExist:
-                    return func(self, request, *args, **kwargs)
-            else:
-                return func(self, request, *args, **kwargs)
+            resolved = resolve(request)
+            if resolved is not None:
+                pk, (_, _, url_name, _, _), found = resolved
+                if found:
+                    return HttpResponseRedirect(reverse(url_name, args=[pk]))
+
+            return func(self, request, *args, **kwargs)
 
         return inner
 
     def lookup_get_context_data(self, func):
+        resolve = self.resolve
+
         @functools.wraps(func)
         def inner(self, *args, **kwargs):
             context = func(self, *args, **kwargs)
-            species_pk = self.request.GET.get("species_pk")
-            reaction_pk = self.request.GET.get("reaction_pk")
-            source_pk = self.request.GET.get("source_pk")
-            species_invalid = "Species with that ID wasn't found"
-            reaction_invalid = "Reaction with that ID wasn't found"
-            source_invalid = "Source with that ID wasn't found"
-            if species_pk:
-                try:
-                    Species.objects.get(pk=species_pk)
-                except Species.DoesNotExist:
-                    context["species_invalid"] = species_invalid
-                    return context
-            if reaction_pk:
-                try:
-                    Reaction.objects.get(pk=reaction_pk)
-                    return context
-                except Reaction.DoesNotExist:
-                    context["reaction_invalid"] = reaction_invalid
-                    return context
-            if source_pk:
-                try:
-                    Source.objects.get(pk=source_pk)
-                    return context
-                except Source.DoesNotExist:
-                    context["source_invalid"] = source_invalid
-                    return context
-            else:
-                return context
+            resolved = resolve(self.request)
+            if resolved is not None:
+                _, (_, _, _, invalid_name, label), found = resolved
+                if not found:
+                    context[invalid_name] = f"{label} with that ID wasn't found"
+
+            return context
 
         return inner
 
@@ -137,9 +143,12 @@ class SpeciesDetail(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        species = self.get_object()
-        structures = Structure.objects.filter(isomer__species=species)
+        species = self.object
+        structures = list(Structure.objects.filter(isomer__species=species).order_by("id"))
         reactions = Reaction.objects.filter(species=species).order_by("id")
+        kinetic_models = Prefetch(
+            "kineticmodel_set", queryset=KineticModel.objects.only("id", "model_name")
+        )
 
         names_models = defaultdict(list)
         for values in species.speciesname_set.values(
@@ -150,11 +159,17 @@ class SpeciesDetail(DetailView):
                 names_models[name].append((model_name, model_id))
 
         context["names_models"] = sorted(list(names_models.items()), key=lambda x: -len(x[1]))
-        context["adjlists"] = structures.values_list("adjacency_list", flat=True)
-        context["smiles"] = structures.values_list("smiles", flat=True)
+        context["adjlists"] = [structure.adjacency_list for structure in structures]
+        context["smiles"] = [structure.smiles for structure in structures]
         context["isomer_inchis"] = species.isomers.values_list("inchi", flat=True)
-        context["thermo_list"] = Thermo.objects.filter(species=species)
-        context["transport_list"] = Transport.objects.filter(species=species)
+        context["thermo_list"] = list(
+            Thermo.objects.filter(species=species).order_by("id").prefetch_related(kinetic_models)
+        )
+        context["transport_list"] = list(
+            Transport.objects.filter(species=species)
+            .order_by("id")
+            .prefetch_related(kinetic_models)
+        )
         context["structures"] = structures
 
         paginator = Paginator(reactions, self.paginate_per_page)
@@ -214,11 +229,12 @@ class SourceDetail(DetailView):
 @SidebarLookup
 class ReactionDetail(DetailView):
     model = Reaction
+    queryset = Reaction.objects.prefetch_stoichiometry()
     context_object_name = "reaction"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        reaction = self.get_object()
+        reaction = self.object
 
         context["reactants"] = reaction.reactants()
         context["products"] = reaction.products()
@@ -233,26 +249,50 @@ class ReactionDetail(DetailView):
 @SidebarLookup
 class KineticModelDetail(DetailView):
     model = KineticModel
+    queryset = KineticModel.objects.select_related("source")
     context_object_name = "kinetic_model"
     paginate_per_page = 25
 
     def get_context_data(self, **kwargs):
-        kinetic_model = self.get_object()
+        kinetic_model = self.object
         context = super().get_context_data(**kwargs)
-        thermo = kinetic_model.thermocomment_set.order_by("thermo__species__id")
-        transport = kinetic_model.transportcomment_set.order_by("transport__species__id")
-        thermo_transport = list(zip_longest(thermo, transport))
-        kinetics_data = kinetic_model.kineticscomment_set.order_by("kinetics__reaction__id")
-
-        paginator1 = Paginator(thermo_transport, self.paginate_per_page)
-        page1 = self.request.GET.get("page1", 1)
-        try:
-            paginated_thermo_transport = paginator1.page(page1)
-        except PageNotAnInteger:
-            paginated_thermo_transport = paginator1.page(1)
-        except EmptyPage:
-            paginated_thermo_transport = paginator1.page(paginator1.num_pages)
+        thermo_comments = ThermoComment.objects.filter(kinetic_model=kinetic_model)
+        transport_comments = TransportComment.objects.filter(kinetic_model=kinetic_model)
+        species = Species.objects.filter(
+            Q(pk__in=thermo_comments.values("thermo__species"))
+            | Q(pk__in=transport_comments.values("transport__species"))
+        ).only("pk")
+        paginated_species = get_keyset_page(
+            species,
+            self.paginate_per_page,
+            after=self.request.GET.get("after1"),
+            before=self.request.GET.get("before1"),
+        )
+        species_ids = [species.pk for species in paginated_species]
+
+        thermo = defaultdict(list)
+        for thermo_comment in (
+            thermo_comments.filter(thermo__species__in=species_ids)
+            .select_related("thermo__species")
+            .order_by("id")
+        ):
+            thermo[thermo_comment.thermo.species_id].append(thermo_comment)
+        transport = defaultdict(list)
+        for transport_comment in (
+            transport_comments.filter(transport__species__in=species_ids)
+            .select_related("transport__species")
+            .order_by("id")
+        ):
+            transport[transport_comment.transport.species_id].append(transport_comment)
+        paginated_species.object_list = [
+            pair
+            for species_id in species_ids
+            for pair in zip_longest(thermo[species_id], transport[species_id])
+        ]
 
+        kinetics_data = kinetic_model.kineticscomment_set.select_related(
+            "kinetics__reaction"
+        ).order_by("kinetics__reaction__id")
         paginator2 = Paginator(kinetics_data, self.paginate_per_page)
         page2 = self.request.GET.get("page2", 1)
         try:
@@ -262,9 +302,8 @@ class KineticModelDetail(DetailView):
         except EmptyPage:
             paginated_kinetics_data = paginator2.page(paginator2.num_pages)
 
-        context["thermo_transport"] = paginated_thermo_transport
+        context["thermo_transport"] = paginated_species
         context["kinetics_data"] = paginated_kinetics_data
-        context["page1"] = page1
         context["page2"] = page2
         context["source"] = kinetic_model.source
 
@@ -287,15 +326,76 @@ class KineticsDetail(DetailView):
 
 
 class DrawStructure(View):
+    """
+    Serve the stored image of a structure, as a PNG or with `?format=svg` an SVG,
+    with an ETag of its adjacency list's digest.
+
+    URLs with the current digest as `?v=` (see `get_image_url`) are cached for a year,
+    since a changed adjacency list is linked with a new URL. Any other URL may show
+    a different drawing later, so it is revalidated on every use.
+    """
+
+    max_age = 60 * 60 * 24 * 365
+
     def get(self, request, pk):
-        structure = Structure.objects.get(pk=pk)
-        molecule = structure.to_rmg()
-        (
-            surface,
-            _,
-            _,
-        ) = MoleculeDrawer().draw(molecule, file_format="png")
-        response = HttpResponse(surface.write_to_png(), content_type="image/png")
+        file_format = request.GET.get("format", "png")
+        if file_format not in CONTENT_TYPES:
+            return HttpResponseBadRequest(f"Format must be one of {', '.join(CONTENT_TYPES)}")
+        adjacency_list = get_object_or_404(
+            Structure.objects.values_list("adjacency_list", flat=True), pk=pk
+        )
+        digest = get_adjacency_list_digest(adjacency_list)
+        etag = f'"{pk}-{digest}-{file_format}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                get_structure_image(pk, adjacency_list, file_format),
+                content_type=CONTENT_TYPES[file_format],
+            )
+        response["ETag"] = etag
+        if request.GET.get("v") == digest:
+            patch_cache_control(response, public=True, max_age=self.max_age, immutable=True)
+        else:
+            patch_cache_control(response, public=True, no_cache=True)
+
+        return response
+
+
+class DrawStructures(View):
+    """
+    Serve the SVG drawings of the structures with the comma separated `ids`
+    as a JSON object of id to SVG, so a page of structures loads with one request.
+
+    The URL doesn't change when an adjacency list does, so the response is revalidated
+    on every use, with an ETag of the structures' digests.
+    """
+
+    max_structures = 100
+
+    def get(self, request):
+        try:
+            ids = [int(item) for item in request.GET.get("ids", "").split(",")]
+        except ValueError:
+            return HttpResponseBadRequest("ids must be a comma separated list of structure ids")
+        if len(ids) > self.max_structures:
+            return HttpResponseBadRequest(f"At most {self.max_structures} structures are allowed")
+        structures = list(
+            Structure.objects.filter(pk__in=ids).order_by("pk").values_list("pk", "adjacency_list")
+        )
+        digests = [
+            f"{pk}-{get_adjacency_list_digest(adjacency_list)}" for pk, adjacency_list in structures
+        ]
+        etag = f'"{get_adjacency_list_digest(";".join(digests))}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = JsonResponse(
+                {
+                    pk: get_structure_image(pk, adjacency_list, "svg").decode()
+                    for pk, adjacency_list in structures
+                }
+            )
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, no_cache=True)
 
         return response
 
@@ -332,7 +432,7 @@ class SpeciesAutocompleteView(AutocompleteView):
     model = Species
     queries = [
         "speciesname__name__istartswith",
-        "isomers__formula__formula",
+        "formula",
         "prime_id",
         "cas_number",
         "id",
@@ -355,5 +455,4 @@ class StructureAutocompleteView(AutocompleteView):
     queries = ["adjacency_list__istartswith", "smiles__istartswith", "multiplicity", "id"]
 
     def get_result_label(self, item):
-        draw_url = reverse("draw-structure", args=[item.pk])
-        return format_html(f'<img src="{draw_url}" />')
+        return renders.render_structure_drawing(item)
@@ -104,6 +104,20 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared by the web workers and the management commands, so that invalidating the cached
+# results (see database/caching.py) in one process reaches all of them.
+# Create its table with `python manage.py createcachetable`.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "kms_cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -2,3 +2,6 @@ from .settings import *
 
 
 MIGRATION_MODULES = {"database": None}
+
+# The tests run in one process, and count their queries without the cache's
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}